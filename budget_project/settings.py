@@ -38,12 +38,17 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     'phonenumber_field',
     'budgeting',
+    'transactions',
+    'reporting',
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # Counts SQL queries and DB time per view; see budgeting.instrumentation.
+    "budgeting.instrumentation.QueryInstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -140,6 +145,10 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Uploaded files (GL uploads are persisted here until the import worker processes them)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -150,3 +159,56 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 FISCAL_YEAR_START_MONTH = 1 
 # Note: This setting will be critical for filtering and reporting logic
 # that needs to account for the Oct 1st budget cycle.
+
+# Number of GL rows validated and inserted per batch during CSV imports.
+# Keeps memory use flat for multi-million row ledgers.
+GL_IMPORT_BATCH_SIZE = 5000
+
+# Number of GL rows sent per COPY statement by the PostgreSQL bulk load path.
+GL_COPY_BATCH_SIZE = 50000
+
+# A RUNNING GL import job whose worker has not reported progress for this
+# many seconds is assumed dead and handed to another worker, up to
+# GL_IMPORT_JOB_MAX_ATTEMPTS claims in total.
+GL_IMPORT_JOB_TIMEOUT = 30 * 60
+GL_IMPORT_JOB_MAX_ATTEMPTS = 3
+
+# Cache for dimension lookups (budgeting.dimension_cache) and report results.
+# Entries are keyed by version counters kept in the database
+# (budgeting.data_versions), so every process sees every invalidation even
+# with the process-local default. Set REDIS_URL to share the cached entries
+# themselves between the web workers, the GL import worker and commands.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Per-request query counts and timings are logged as JSON lines by
+# budgeting.instrumentation: INFO for every request, WARNING when a view
+# exceeds its declared query budget. Set QUERY_LOG_LEVEL=WARNING to log
+# only the over-budget requests.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'budgeting.instrumentation': {
+            'handlers': ['console'],
+            'level': os.environ.get('QUERY_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Seconds a dimension lookup map stays cached. Edits invalidate it at once.
+DIMENSION_CACHE_TIMEOUT = 300
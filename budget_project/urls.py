@@ -11,6 +11,12 @@ urlpatterns = [
     # We use '' to set the budgeting app as the root for user-facing pages.
     # -----------------------------------------------------
     path('', include('budgeting.urls')),
+
+    # Background GL upload jobs (progress pages and status polling)
+    path('transactions/', include('transactions.urls')),
+
+    # Financial statements (P&L, Balance Sheet)
+    path('reports/', include('reporting.urls')),
     
     # Optional: Django's built-in auth URLs (used for /login/ and /logout/)
     path('', include('django.contrib.auth.urls')),
@@ -1,10 +1,16 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Max, Min
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from .models import (
     Region, State, Location, Fund,
-    Department, Sector, Scenario, Account, Grade, # AUMDriver, AUMRecord,
+    Department, Sector, Scenario, Account, Grade, DateDimension, # AUMDriver, AUMRecord,
     GLTransaction, FinancialRecord, CustomUser
 )
+from .date_dimension import generate_date_dimension
 from django.utils.translation import gettext_lazy as _
 
 # --- 0. Custom Admin User ---
@@ -49,13 +55,15 @@ class LocationInline(admin.TabularInline):
 class StateAdmin(admin.ModelAdmin):
     list_display = ('state_name', 'region')
     list_filter = ('region',)
+    list_select_related = ('region',)
     search_fields = ('state_name',)
     inlines = [LocationInline]
 
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('location_name', 'state', 'region')
-    list_filter = ('state__region', 'state') 
+    list_filter = ('state__region', 'state')
+    list_select_related = ('state__region', 'region')
     search_fields = ('location_name', 'state__state_name')
     readonly_fields = ('region',) 
 
@@ -113,6 +121,54 @@ class AccountAdmin(admin.ModelAdmin):
         }),
     )
 
+class DateRangeForm(forms.Form):
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        if start and end and end < start:
+            raise forms.ValidationError(_("The end date must not be before the start date."))
+        return cleaned_data
+
+@admin.register(DateDimension)
+class DateDimensionAdmin(admin.ModelAdmin):
+    list_display = ('full_date', 'year_month', 'year_quarter', 'week_of_year', 'fiscal_year', 'fiscal_month', 'fiscal_quarter')
+    list_filter = ('year', 'quarter', 'fiscal_year')
+    date_hierarchy = 'full_date'
+    readonly_fields = ('fiscal_year', 'fiscal_month', 'fiscal_quarter')
+    change_list_template = 'admin/budgeting/datedimension/change_list.html'
+    actions = ['regenerate_selected_range']
+
+    def get_urls(self):
+        custom_urls = [
+            path('generate/', self.admin_site.admin_view(self.generate_view), name='budgeting_datedimension_generate'),
+        ]
+        return custom_urls + super().get_urls()
+
+    def generate_view(self, request):
+        """Generates the Date Dimension for a date range with one bulk upsert."""
+        form = DateRangeForm(request.POST or None)
+        if request.method == 'POST' and form.is_valid():
+            count = generate_date_dimension(form.cleaned_data['start_date'], form.cleaned_data['end_date'])
+            self.message_user(request, f"Successfully generated {count} dates.", messages.SUCCESS)
+            return redirect('admin:budgeting_datedimension_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': _("Generate Date Dimension"),
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/budgeting/datedimension/generate.html', context)
+
+    @admin.action(description=_("Regenerate the date range spanned by the selected dates"))
+    def regenerate_selected_range(self, request, queryset):
+        bounds = queryset.aggregate(start=Min('full_date'), end=Max('full_date'))
+        count = generate_date_dimension(bounds['start'], bounds['end'])
+        self.message_user(request, f"Successfully regenerated {count} dates.", messages.SUCCESS)
+
 # --- 3. Module 2: AUM Management (New) --- (Commented out until models are defined)
 
 # @admin.register(AUMDriver)
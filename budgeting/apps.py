@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class BudgetingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "budgeting"
+
+    def ready(self):
+        from .cube import connect_rollup_signals
+        from .data_versions import connect_data_version_signals
+        from .dimension_cache import connect_invalidation_signals
+        from .hierarchy import connect_closure_signals
+        connect_data_version_signals()
+        connect_invalidation_signals()
+        connect_closure_signals()
+        connect_rollup_signals()
@@ -0,0 +1,343 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from .dimension_cache import get_dimension_labels, get_dimension_maps
+from .models import Account, FinancialRecord, FinancialRollup, Fund, StaleRollup, State
+
+# Cube queries over FinancialRecord. A query names the dimensions to group
+# by, the measures to sum and filters on any dimension. It is answered from
+# the coarsest pre-aggregated rollup in FinancialRollup that holds every
+# dimension it uses, and only falls back to the fact table when none does.
+# Pairs whose records changed since their rollups were built (StaleRollup)
+# are read from the fact table until `manage.py refresh_rollups` runs.
+
+FISCAL_START_MONTH = settings.FISCAL_YEAR_START_MONTH
+
+# name -> (column, dimension_cache name for labels, type of filter values)
+CUBE_DIMENSIONS = {
+    'scenario': ('scenario_id', 'scenario', int),
+    'fiscal_year': ('fiscal_year', None, int),
+    'fiscal_quarter': ('fiscal_quarter', None, int),
+    'fiscal_period': ('fiscal_period', None, int),
+    'fund_category': ('fund_category_id', 'fund_category', int),
+    'fund': ('fund_id', 'fund', int),
+    'region': ('region_id', 'region', int),
+    'state': ('state_id', 'state', int),
+    'sector': ('sector_id', 'sector', int),
+    'account': ('account_id', 'account', int),
+    'account_type': ('account_type', None, str),
+    'account_level_1': ('account_level_1', None, str),
+    'account_level_2': ('account_level_2', None, str),
+    'account_level_3': ('account_level_3', None, str),
+    'account_level_4': ('account_level_4', None, str),
+}
+
+# name -> (expression over a rollup, expression over the fact table)
+CUBE_MEASURES = {
+    'value': ('SUM(value)', 'SUM(value)'),
+    'records': ('SUM(record_count)::bigint', 'COUNT(*)'),
+}
+
+# Every rollup holds scenario and fiscal_year as well. Listed from coarsest
+# to finest: a query uses the first one holding all of its dimensions. A
+# rollup with fund or state also carries fund_category or region, which
+# never adds rows.
+ROLLUPS = {
+    'year': (),
+    'period': ('fiscal_quarter', 'fiscal_period'),
+    'fund_category_region_quarter': ('fund_category', 'region', 'fiscal_quarter'),
+    'account_level_quarter': ('account_type', 'account_level_1', 'account_level_2', 'fiscal_quarter'),
+    'slice_period': ('fund_category', 'fund', 'region', 'state', 'sector', 'fiscal_quarter', 'fiscal_period'),
+    'account_level_slice_period': (
+        'fund_category', 'fund', 'region', 'state', 'sector', 'account_type',
+        'account_level_1', 'account_level_2', 'account_level_3', 'account_level_4',
+        'fiscal_quarter', 'fiscal_period',
+    ),
+}
+ROLLUP_DIMENSIONS = [name for name in CUBE_DIMENSIONS if any(name in grain for grain in ROLLUPS.values())]
+
+# FinancialRecords with every cube dimension resolved, one row per record.
+FACTS_SQL = """
+SELECT fr.scenario_id, fr.year AS fiscal_year,
+       (fr.month - %(fiscal_start_month)s + 12) %% 12 / 3 + 1 AS fiscal_quarter,
+       (fr.month - %(fiscal_start_month)s + 12) %% 12 + 1 AS fiscal_period,
+       fund.fund_category_id, fr.fund_id, state.region_id, fr.state_id, fr.sector_id, fr.account_id,
+       account.account_type, account.hierarchy_level_1 AS account_level_1,
+       account.hierarchy_level_2 AS account_level_2, account.hierarchy_level_3 AS account_level_3,
+       account.hierarchy_level_4 AS account_level_4, fr.value
+FROM {financial_record} AS fr
+JOIN {fund} AS fund ON fund.id = fr.fund_id
+JOIN {account} AS account ON account.account_key = fr.account_id
+LEFT JOIN {state} AS state ON state.id = fr.state_id
+WHERE {where}
+"""
+
+REFRESH_PAIRS = "(%(scenario_ids)s::bigint[], %(fiscal_years)s::integer[])"
+
+DELETE_ROLLUPS_SQL = f"""
+DELETE FROM {{rollup}}
+WHERE (scenario_id, fiscal_year) IN (SELECT * FROM unnest{REFRESH_PAIRS})
+"""
+
+# Builds every rollup of the given (scenario, fiscal year) pairs in one pass
+# with GROUPING SETS; GROUPING() tells the grain each output row belongs to.
+REFRESH_ROLLUPS_SQL = """
+WITH facts AS ({facts})
+INSERT INTO {rollup} (grain, scenario_id, fiscal_year, {columns}, value, record_count)
+SELECT CASE GROUPING({columns}) {grains} END, scenario_id, fiscal_year, {columns}, SUM(value), COUNT(*)
+FROM facts
+GROUP BY GROUPING SETS ({grouping_sets})
+"""
+
+# Marks every (scenario, fiscal year) with records matching {where} stale.
+MARK_STALE_SQL = """
+INSERT INTO {stale_rollup} (scenario_id, fiscal_year, marked_at)
+SELECT DISTINCT scenario_id, year, NOW() FROM {financial_record} WHERE {where}
+ON CONFLICT (scenario_id, fiscal_year) DO UPDATE SET marked_at = EXCLUDED.marked_at
+"""
+
+# Dimension attributes the rollups copy from a record's fund, state or
+# account when they are built: model -> (FinancialRecord column, fields).
+ROLLUP_ATTRIBUTES = {
+    Fund: ('fund_id', ('fund_category_id',)),
+    State: ('state_id', ('region_id',)),
+    Account: ('account_id', (
+        'account_type', 'hierarchy_level_1', 'hierarchy_level_2', 'hierarchy_level_3', 'hierarchy_level_4',
+    )),
+}
+
+# A rollup grain with the rows of stale pairs replaced by the fact table's,
+# in the rollup's shape: one fact row counts as one record.
+ROLLUP_SOURCE_SQL = """
+(SELECT {columns}, value, record_count FROM {rollup}
+ WHERE grain = %(grain)s AND (scenario_id, fiscal_year) NOT IN (SELECT scenario_id, fiscal_year FROM {stale_rollup})
+ UNION ALL
+ SELECT {columns}, value, 1 FROM ({facts}) AS facts) AS source
+"""
+
+CUBE_QUERY_SQL = """
+SELECT {select}
+FROM {source}
+WHERE {where}
+GROUP BY {group_by}
+ORDER BY {order_by}
+"""
+
+# Serialises concurrent refreshes, which would otherwise both rebuild a pair.
+REFRESH_LOCK_ID = 0x62756467  # 'budg'
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    return {
+        'financial_record': qn(FinancialRecord._meta.db_table),
+        'fund': qn(Fund._meta.db_table),
+        'account': qn(Account._meta.db_table),
+        'state': qn(State._meta.db_table),
+        'rollup': qn(FinancialRollup._meta.db_table),
+        'stale_rollup': qn(StaleRollup._meta.db_table),
+    }
+
+
+def _refresh_sql():
+    columns = [CUBE_DIMENSIONS[name][0] for name in ROLLUP_DIMENSIONS]
+    grains, grouping_sets = [], []
+    for grain, dimensions in ROLLUPS.items():
+        # GROUPING() sets the bit of every column left out of the row's set, first column highest.
+        mask = sum(1 << (len(columns) - 1 - i) for i, name in enumerate(ROLLUP_DIMENSIONS) if name not in dimensions)
+        grains.append(f"WHEN {mask} THEN '{grain}'")
+        grouping_sets.append('(' + ', '.join(['scenario_id', 'fiscal_year'] + [
+            CUBE_DIMENSIONS[name][0] for name in dimensions
+        ]) + ')')
+    tables = _tables()
+    return REFRESH_ROLLUPS_SQL.format(
+        facts=FACTS_SQL.format(where=f"(fr.scenario_id, fr.year) IN (SELECT * FROM unnest{REFRESH_PAIRS})", **tables),
+        rollup=tables['rollup'],
+        columns=', '.join(columns),
+        grains=' '.join(grains),
+        grouping_sets=', '.join(grouping_sets),
+    )
+
+
+def refresh_rollups(pairs=()):
+    """
+    Rebuilds the rollups of the given (scenario_id, fiscal_year) pairs and
+    of every pair marked stale, in one pass over their FinancialRecords.
+    Returns the pairs refreshed.
+    """
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [REFRESH_LOCK_ID])
+        cursor.execute(f"DELETE FROM {qn(StaleRollup._meta.db_table)} RETURNING scenario_id, fiscal_year")
+        pairs = sorted(set(pairs) | set(cursor.fetchall()))
+        if not pairs:
+            return []
+        params = {
+            'fiscal_start_month': FISCAL_START_MONTH,
+            'scenario_ids': [scenario_id for scenario_id, _ in pairs],
+            'fiscal_years': [fiscal_year for _, fiscal_year in pairs],
+        }
+        cursor.execute(DELETE_ROLLUPS_SQL.format(**_tables()), params)
+        cursor.execute(_refresh_sql(), params)
+    return pairs
+
+
+def rebuild_rollups():
+    """Rebuilds all rollups from scratch. Returns the pairs built."""
+    with transaction.atomic():
+        FinancialRollup.objects.all().delete()
+        pairs = FinancialRecord.objects.order_by().values_list('scenario_id', 'year').distinct()
+        return refresh_rollups(list(pairs))
+
+
+def mark_rollups_stale(pairs):
+    """
+    Marks (scenario_id, fiscal_year) pairs for the next refresh_rollups. For
+    writes too small to be worth rebuilding their rollups straight away.
+    """
+    StaleRollup.objects.bulk_create(
+        [StaleRollup(scenario_id=scenario_id, fiscal_year=fiscal_year) for scenario_id, fiscal_year in set(pairs)],
+        ignore_conflicts=True,
+    )
+
+
+def mark_all_rollups_stale():
+    """
+    Marks every (scenario, fiscal year) with records stale. For changes to
+    dimension attributes across many records, such as a chart of accounts upload.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(MARK_STALE_SQL.format(where='TRUE', **_tables()))
+
+
+def choose_rollup(dimensions):
+    """Returns the coarsest rollup holding all of the given dimensions, or None if only the fact table does."""
+    needed = set(dimensions) - {'scenario', 'fiscal_year'}
+    for grain, grain_dimensions in ROLLUPS.items():
+        if needed <= set(grain_dimensions):
+            return grain
+    return None
+
+
+class CubeResult:
+    """Rows of a cube query: the dimension values followed by the measure values."""
+
+    def __init__(self, dimensions, measures, rows, source):
+        self.dimensions = dimensions
+        self.measures = measures
+        self.rows = rows
+        self.source = source
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_columnar(self):
+        """
+        Serialises the result for the cube API as parallel lists, with a
+        `<dimension>_label` list for dimensions that have names.
+        """
+        data = {'source': self.source, 'rows': {}, 'measures': {}}
+        maps = get_dimension_maps(*{CUBE_DIMENSIONS[name][1] for name in self.dimensions} - {None})
+        for i, name in enumerate(self.dimensions):
+            keys = [row[i] for row in self.rows]
+            data['rows'][name] = keys
+            label_dimension = CUBE_DIMENSIONS[name][1]
+            if label_dimension:
+                labels = get_dimension_labels(label_dimension, maps[label_dimension])
+                data['rows'][f'{name}_label'] = [labels.get(key, '') for key in keys]
+        for i, name in enumerate(self.measures, start=len(self.dimensions)):
+            data['measures'][name] = [
+                float(row[i]) if isinstance(row[i], Decimal) else row[i] for row in self.rows
+            ]
+        return data
+
+
+def cube_query(dimensions, measures=('value',), filters=None):
+    """
+    Groups FinancialRecords by `dimensions` and sums `measures`, keeping only
+    records whose dimension values are in `filters` ({dimension: value or
+    list of values}). Names come from CUBE_DIMENSIONS and CUBE_MEASURES;
+    unknown names and malformed filter values raise ValueError. Read only:
+    stale pairs come from the fact table rather than being refreshed here.
+    """
+    dimensions = list(dict.fromkeys(dimensions))
+    measures = list(dict.fromkeys(measures))
+    filters = dict(filters or {})
+    unknown = [name for name in dimensions + list(filters) if name not in CUBE_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dimension: {', '.join(unknown)}")
+    unknown = [name for name in measures if name not in CUBE_MEASURES]
+    if unknown or not measures:
+        raise ValueError(f"Unknown measure: {', '.join(unknown)}")
+
+    params = {'fiscal_start_month': FISCAL_START_MONTH}
+    where = []
+    for i, (name, values) in enumerate(filters.items()):
+        column, _, value_type = CUBE_DIMENSIONS[name]
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        params[f'filter_{i}'] = [value_type(value) for value in values]
+        where.append(f"{column} = ANY(%(filter_{i})s)")
+
+    grain = choose_rollup(dimensions + list(filters))
+    tables = _tables()
+    if grain is None:
+        source = f"({FACTS_SQL.format(where='TRUE', **tables)}) AS facts"
+        select = [CUBE_MEASURES[name][1] for name in measures]
+    else:
+        stale = f"(fr.scenario_id, fr.year) IN (SELECT scenario_id, fiscal_year FROM {tables['stale_rollup']})"
+        source = ROLLUP_SOURCE_SQL.format(
+            columns=', '.join(['scenario_id', 'fiscal_year'] + [CUBE_DIMENSIONS[name][0] for name in ROLLUPS[grain]]),
+            facts=FACTS_SQL.format(where=stale, **tables),
+            **tables,
+        )
+        select = [CUBE_MEASURES[name][0] for name in measures]
+        params['grain'] = grain
+
+    columns = [CUBE_DIMENSIONS[name][0] for name in dimensions]
+    sql = CUBE_QUERY_SQL.format(
+        select=', '.join(columns + select),
+        source=source,
+        where=' AND '.join(where) or 'TRUE',
+        group_by=', '.join(columns) or '()',
+        order_by=', '.join(columns) or '1',
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return CubeResult(dimensions, measures, rows, grain or 'financial_record')
+
+
+def _mark_on_change(sender, instance, **kwargs):
+    mark_rollups_stale([(instance.scenario_id, instance.year)])
+
+
+def _remember_attributes(sender, instance, raw=False, **kwargs):
+    """Notes whether a saved fund, state or account changes an attribute the rollups hold."""
+    fields = ROLLUP_ATTRIBUTES[sender][1]
+    old = sender.objects.filter(pk=instance.pk).values_list(*fields).first() if instance.pk and not raw else None
+    instance._rollup_attributes_changed = old is not None and old != tuple(getattr(instance, f) for f in fields)
+
+
+def _mark_on_attribute_change(sender, instance, **kwargs):
+    if getattr(instance, '_rollup_attributes_changed', False):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                MARK_STALE_SQL.format(where=f"{ROLLUP_ATTRIBUTES[sender][0]} = %s", **_tables()), [instance.pk],
+            )
+
+
+def connect_rollup_signals():
+    """
+    Marks a record's rollups stale whenever it is saved or deleted one by
+    one, and the rollups of all records of a fund, state or account whose
+    grouping attributes (fund category, region, account type or levels) change.
+    """
+    post_save.connect(_mark_on_change, sender=FinancialRecord, dispatch_uid='budgeting:rollups:save')
+    post_delete.connect(_mark_on_change, sender=FinancialRecord, dispatch_uid='budgeting:rollups:delete')
+    for model in ROLLUP_ATTRIBUTES:
+        uid = f'budgeting:rollups:{model._meta.model_name}'
+        pre_save.connect(_remember_attributes, sender=model, dispatch_uid=f'{uid}:pre_save')
+        post_save.connect(_mark_on_attribute_change, sender=model, dispatch_uid=f'{uid}:save')
@@ -0,0 +1,76 @@
+from datetime import date
+
+from django.db.models import Max, Q, Sum
+
+from transactions.models import GLImportJob
+from .dimension_cache import get_dimension_maps
+from .instrumentation import record_cache_miss
+from .models import DashboardSnapshot, FinancialRecord, GLTransaction
+from .pagination import estimate_count
+from .utils import get_current_fiscal_year, get_fiscal_months
+
+SNAPSHOT_KEY = 'home'
+
+
+def compute_dashboard_kpis(today=None):
+    """
+    Computes the home page KPIs: ledger freshness and size, and year-to-date
+    ACTUAL vs BUDGET by statement category and by fund for the current fiscal
+    year. Each figure is one aggregate query.
+    """
+    today = today or date.today()
+    fiscal_year = get_current_fiscal_year(today)
+    ytd_months = [m for m, y in get_fiscal_months(fiscal_year) if (y, m) <= (today.year, today.month)]
+    maps = get_dimension_maps('scenario', 'fund')
+    scenario_ids = maps['scenario']
+    actual_id = scenario_ids.get('ACTUAL')
+    budget_id = scenario_ids.get('BUDGET')
+
+    ytd = FinancialRecord.objects.filter(year=fiscal_year, month__in=ytd_months, scenario_id__in=[actual_id, budget_id])
+    measures = {
+        'actual': Sum('value', filter=Q(scenario_id=actual_id), default=0),
+        'budget': Sum('value', filter=Q(scenario_id=budget_id), default=0),
+    }
+    by_category = ytd.values('account__statement_category').annotate(**measures).order_by('account__statement_category')
+    by_fund = ytd.values('fund__fund_name').annotate(**measures).order_by('fund__fund_name')
+
+    last_import = (
+        GLImportJob.objects.filter(status=GLImportJob.STATUS_SUCCEEDED)
+        .order_by('-finished_at').values_list('finished_at', flat=True).first()
+    )
+    return {
+        'fiscal_year': fiscal_year,
+        'last_gl_import_at': last_import,
+        'last_gl_transaction_date': GLTransaction.objects.aggregate(latest=Max('transaction_date'))['latest'],
+        # The ledger can hold millions of rows; the planner estimate is enough here.
+        'gl_transaction_count': estimate_count(GLTransaction.objects.all()),
+        'financial_record_count': estimate_count(FinancialRecord.objects.all()),
+        'total_funds': len(maps['fund']),
+        'ytd_by_category': [
+            {'category': row['account__statement_category'], 'actual': row['actual'], 'budget': row['budget'],
+             'variance': row['actual'] - row['budget']}
+            for row in by_category
+        ],
+        'ytd_by_fund': [
+            {'fund': row['fund__fund_name'], 'actual': row['actual'], 'budget': row['budget'],
+             'variance': row['actual'] - row['budget']}
+            for row in by_fund
+        ],
+    }
+
+
+def refresh_dashboard_snapshot():
+    """Recomputes the dashboard KPIs and stores them. Returns the snapshot."""
+    snapshot, _ = DashboardSnapshot.objects.update_or_create(
+        key=SNAPSHOT_KEY, defaults={'data': compute_dashboard_kpis()},
+    )
+    return snapshot
+
+
+def get_dashboard_snapshot():
+    """Returns the stored dashboard snapshot, computing it on first use."""
+    snapshot = DashboardSnapshot.objects.filter(key=SNAPSHOT_KEY).first()
+    if snapshot is None:
+        record_cache_miss()
+        snapshot = refresh_dashboard_snapshot()
+    return snapshot
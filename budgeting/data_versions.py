@@ -0,0 +1,77 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import DataVersion, FinancialRecord
+
+# Moves named counters in one statement; names never bumped are at version 1.
+# Names are sorted so concurrent bumps lock rows in the same order.
+BUMP_VERSIONS_SQL = """
+INSERT INTO {data_version} (name, version)
+SELECT name, 2 FROM unnest(%s::varchar[]) AS name
+ON CONFLICT (name) DO UPDATE SET version = {data_version}.version + 1
+"""
+
+
+def get_versions(names):
+    """Returns {name: version} for the given counters in one query."""
+    names = list(names)
+    versions = dict(DataVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    return {name: versions.get(name, 1) for name in names}
+
+
+def bump_versions(*names):
+    """
+    Moves the given counters to a new version once the current transaction
+    commits, so readers never cache data from a rolled-back write.
+    """
+    def bump():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                BUMP_VERSIONS_SQL.format(data_version=connection.ops.quote_name(DataVersion._meta.db_table)),
+                [sorted(set(names))],
+            )
+    transaction.on_commit(bump)
+
+
+# A version number per scenario that moves whenever that scenario's
+# FinancialRecords change. Reports derived from the records include the
+# versions in their cache keys, so a write makes the old entries unreachable
+# instead of having to find and delete them.
+
+CACHE_PREFIX = 'budgeting:financial-data'
+
+
+def scenario_version_name(scenario_id):
+    """Name of a scenario's data version counter."""
+    return f'scenario:{scenario_id}'
+
+
+def get_scenario_version(scenario_id):
+    """Returns the current data version of a scenario, starting at 1."""
+    return get_scenario_versions([scenario_id])[scenario_id]
+
+
+def get_scenario_versions(scenario_ids):
+    """Returns {scenario_id: version} for several scenarios in one query."""
+    versions = get_versions(scenario_version_name(scenario_id) for scenario_id in scenario_ids)
+    return {scenario_id: versions[scenario_version_name(scenario_id)] for scenario_id in scenario_ids}
+
+
+def bump_scenario_versions(*scenario_ids):
+    """
+    Moves the given scenarios to a new data version once the current
+    transaction commits. The versions are shared by all processes, so writes
+    from management commands and the GL worker invalidate the site's reports.
+    Call this after any bulk write to FinancialRecord that bypasses signals.
+    """
+    bump_versions(*(scenario_version_name(scenario_id) for scenario_id in scenario_ids))
+
+
+def _bump_on_change(sender, instance, **kwargs):
+    bump_scenario_versions(instance.scenario_id)
+
+
+def connect_data_version_signals():
+    """Moves a scenario's version whenever one of its records is saved or deleted one by one."""
+    post_save.connect(_bump_on_change, sender=FinancialRecord, dispatch_uid=f'{CACHE_PREFIX}:save')
+    post_delete.connect(_bump_on_change, sender=FinancialRecord, dispatch_uid=f'{CACHE_PREFIX}:delete')
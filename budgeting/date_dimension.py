@@ -0,0 +1,106 @@
+import calendar
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import DateDimension
+
+MONTH_NAMES = np.array([calendar.month_name[m] for m in range(1, 13)])
+SHORT_MONTH_NAMES = np.array([calendar.month_abbr[m] for m in range(1, 13)])
+
+DATE_DIMENSION_UPDATE_FIELDS = [
+    'day', 'week_of_year', 'month', 'month_name', 'short_month_name',
+    'quarter', 'quarter_name', 'year', 'year_month', 'year_quarter',
+    'fiscal_year', 'fiscal_month', 'fiscal_quarter',
+]
+
+
+def build_date_attributes(start_date, end_date):
+    """
+    Computes every DateDimension column for the inclusive date range as NumPy arrays.
+    All attributes are derived with whole-array operations; there is no per-day loop.
+    """
+    dates = np.arange(np.datetime64(start_date, 'D'), np.datetime64(end_date, 'D') + 1)
+    month_starts = dates.astype('datetime64[M]')
+
+    years = dates.astype('datetime64[Y]').astype(int) + 1970
+    months = month_starts.astype(int) % 12 + 1
+    days = (dates - month_starts).astype(int) + 1
+    quarters = (months - 1) // 3 + 1
+
+    # ISO-8601 week: the week belongs to the year of its Thursday.
+    # 1970-01-01 was a Thursday, so Monday-based weekday = (days since epoch + 3) % 7.
+    weekdays = (dates.astype(int) + 3) % 7
+    thursdays = dates - weekdays + 3
+    weeks = (thursdays - thursdays.astype('datetime64[Y]')).astype(int) // 7 + 1
+
+    start_month = settings.FISCAL_YEAR_START_MONTH
+    fiscal_years = years - (months < start_month)
+    fiscal_months = (months - start_month) % 12 + 1
+    fiscal_quarters = (fiscal_months - 1) // 3 + 1
+
+    year_strings = years.astype(str)
+    quarter_names = np.char.add('Q', quarters.astype(str))
+
+    return {
+        'full_date': dates.astype(object),
+        'day': days,
+        'week_of_year': weeks,
+        'month': months,
+        'month_name': MONTH_NAMES[months - 1],
+        'short_month_name': SHORT_MONTH_NAMES[months - 1],
+        'quarter': quarters,
+        'quarter_name': quarter_names,
+        'year': years,
+        'year_month': np.char.add(np.char.add(year_strings, '-'), np.char.zfill(months.astype(str), 2)),
+        'year_quarter': np.char.add(np.char.add(year_strings, '-'), quarter_names),
+        'fiscal_year': fiscal_years,
+        'fiscal_month': fiscal_months,
+        'fiscal_quarter': fiscal_quarters,
+    }
+
+
+def generate_date_dimension(start_date, end_date):
+    """
+    Creates or refreshes the DateDimension rows for the inclusive date range
+    with a single bulk upsert. Returns the number of dates written.
+
+    On PostgreSQL each column is sent as a single delimited string and
+    expanded server-side with unnest(), so 50 years of dates is one statement
+    with 14 parameters rather than hundreds of thousands of bound values.
+    """
+    if end_date < start_date:
+        raise ValueError("The end date must not be before the start date.")
+
+    attributes = build_date_attributes(start_date, end_date)
+    columns = list(attributes)
+    # .tolist() turns the NumPy scalars into plain Python values for the driver.
+    values = {c: attributes[c].tolist() for c in columns}
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            _upsert_with_unnest(columns, values)
+        else:
+            DateDimension.objects.bulk_create(
+                [DateDimension(**dict(zip(columns, row))) for row in zip(*values.values())],
+                update_conflicts=True,
+                unique_fields=['full_date'],
+                update_fields=DATE_DIMENSION_UPDATE_FIELDS,
+            )
+    return len(values['full_date'])
+
+
+def _upsert_with_unnest(columns, values):
+    qn = connection.ops.quote_name
+    opts = DateDimension._meta
+    # Each column travels as one comma-separated string; none of the values contain commas.
+    arrays = ', '.join(f"string_to_array(%s, ',')::{opts.get_field(c).db_type(connection)}[]" for c in columns)
+    updates = ', '.join(f"{qn(c)} = EXCLUDED.{qn(c)}" for c in DATE_DIMENSION_UPDATE_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(opts.db_table)} ({', '.join(qn(c) for c in columns)}) "
+            f"SELECT * FROM unnest({arrays}) "
+            f"ON CONFLICT ({qn('full_date')}) DO UPDATE SET {updates}",
+            [','.join(map(str, values[c])) for c in columns],
+        )
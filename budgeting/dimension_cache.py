@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .data_versions import bump_versions, get_versions
+from .instrumentation import record_cache_miss
+from .models import Account, Department, Fund, FundCategory, Region, Scenario, Sector, State
+
+# name -> (model, natural key field, primary key field)
+DIMENSIONS = {
+    'account': (Account, 'account_code', 'account_key'),
+    'fund': (Fund, 'fund_name', 'pk'),
+    'fund_category': (FundCategory, 'category_name', 'pk'),
+    'department': (Department, 'department_name', 'pk'),
+    'region': (Region, 'region_name', 'pk'),
+    'state': (State, 'state_name', 'pk'),
+    'sector': (Sector, 'sector_name', 'pk'),
+    'scenario': (Scenario, 'scenario_name', 'pk'),
+}
+GL_DIMENSIONS = ('account', 'fund', 'department', 'state', 'sector')
+
+CACHE_PREFIX = 'budgeting:dimensions'
+
+
+def dimension_version_name(name):
+    """Name of a dimension's counter in budgeting.data_versions."""
+    return f'dimension:{name}'
+
+
+def get_dimension_version(name):
+    """Returns the current version of a dimension's cached map, starting at 1."""
+    return get_versions([dimension_version_name(name)])[dimension_version_name(name)]
+
+
+def invalidate_dimension(name):
+    """
+    Moves a dimension to a new version so every process rebuilds its map on
+    next use. The version lives in the database, so this reaches the GL import
+    worker and other processes even with a process-local cache. Old versions
+    are never read again and simply expire.
+    """
+    bump_versions(dimension_version_name(name))
+
+
+def load_dimension_map(name):
+    """Reads the natural key -> primary key map for a dimension straight from the database."""
+    model, natural_key, pk_field = DIMENSIONS[name]
+    return dict(model.objects.values_list(natural_key, pk_field))
+
+
+def get_dimension_maps(*names):
+    """
+    Returns {name: map} for several dimensions, reading their versions in one
+    query and their cached maps in one cache round trip.
+    """
+    versions = get_versions(dimension_version_name(name) for name in names)
+    keys = {name: f'{CACHE_PREFIX}:{name}:v{versions[dimension_version_name(name)]}' for name in names}
+    cached = cache.get_many(keys.values())
+    maps = {}
+    for name, key in keys.items():
+        maps[name] = cached.get(key)
+        if maps[name] is None:
+            record_cache_miss()
+            maps[name] = load_dimension_map(name)
+            cache.set(key, maps[name], timeout=settings.DIMENSION_CACHE_TIMEOUT)
+    return maps
+
+
+def get_dimension_map(name):
+    """
+    Returns the natural key -> primary key map for a dimension, e.g.
+    account code -> account_key. Built with one values_list query on a miss.
+    The returned dict is shared; copy it before changing it.
+    """
+    return get_dimension_maps(name)[name]
+
+
+def resolve(name, natural_key):
+    """Returns the primary key for a dimension's natural key, or None."""
+    return get_dimension_map(name).get(natural_key)
+
+
+def get_dimension_labels(name, lookup=None):
+    """
+    Returns the primary key -> natural key map for a dimension. `lookup` is
+    its map, if already fetched with get_dimension_maps.
+    """
+    lookup = get_dimension_map(name) if lookup is None else lookup
+    return {pk: natural_key for natural_key, pk in lookup.items()}
+
+
+def get_dimension_choices(name, lookup=None):
+    """Returns (primary key, natural key) pairs sorted by natural key, for select boxes."""
+    return sorted(get_dimension_labels(name, lookup).items(), key=lambda choice: choice[1])
+
+
+def get_gl_dimension_maps():
+    """
+    Returns the cached lookups used to resolve GL rows, keyed by dimension
+    name. Versions are bumped when a dimension row commits, so a fund or
+    account added a moment ago is already in them.
+    """
+    return get_dimension_maps(*GL_DIMENSIONS)
+
+
+def connect_invalidation_signals():
+    """Invalidates a dimension's cached map whenever one of its rows is saved or deleted."""
+    for name, (model, _, _) in DIMENSIONS.items():
+        def invalidate(sender, name=name, **kwargs):
+            invalidate_dimension(name)
+        post_save.connect(invalidate, sender=model, weak=False, dispatch_uid=f'{CACHE_PREFIX}:{name}:save')
+        post_delete.connect(invalidate, sender=model, weak=False, dispatch_uid=f'{CACHE_PREFIX}:{name}:delete')
@@ -0,0 +1,82 @@
+import csv
+import io
+import tempfile
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX export is optional.
+    Workbook = None
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Most rows an XLSX worksheet holds, header included; Excel will not open larger sheets.
+XLSX_MAX_SHEET_ROWS = 1048576
+
+# (header, values_list lookup) for each exported GL column.
+GL_EXPORT_COLUMNS = [
+    ('Date', 'transaction_date'),
+    ('Account Code', 'account__account_code'),
+    ('Account Name', 'account__account_name'),
+    ('Fund Name', 'fund__fund_name'),
+    ('Department', 'department__department_name'),
+    ('State', 'state__state_name'),
+    ('Sector', 'sector__sector_name'),
+    ('Scenario', 'scenario__scenario_name'),
+    ('Description', 'description'),
+    ('Amount', 'transaction_amount'),
+]
+
+
+def iter_gl_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields GL rows as plain tuples. values_list skips model instances, and
+    iterator() reads through a server-side cursor `chunk_size` rows at a time,
+    so memory use does not grow with the number of rows exported.
+    """
+    lookups = [lookup for _, lookup in GL_EXPORT_COLUMNS]
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(rows, header, rows_per_chunk=EXPORT_CHUNK_SIZE):
+    """Yields CSV text, one chunk per `rows_per_chunk` rows, starting with the header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_xlsx(rows, header, title='Export', max_sheet_rows=XLSX_MAX_SHEET_ROWS):
+    """
+    Writes rows to a temporary XLSX file using openpyxl's write-only mode,
+    which does not keep the rows in memory. Rows past a worksheet's limit
+    continue on further sheets ("Title (2)", ...), each with the header.
+    Returns the open file, rewound.
+    """
+    if Workbook is None:
+        raise ImproperlyConfigured("XLSX export requires the openpyxl package.")
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheets = None, max_sheet_rows, 0
+    for row in rows:
+        if sheet_rows == max_sheet_rows:
+            sheets += 1
+            sheet = workbook.create_sheet(title if sheets == 1 else f"{title[:25]} ({sheets})")
+            sheet.append(header)
+            sheet_rows = 1
+        sheet.append(row)
+        sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet(title).append(header)
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(output)
+    output.seek(0)
+    return output
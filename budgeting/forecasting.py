@@ -0,0 +1,234 @@
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+
+from .cube import refresh_rollups
+from .data_versions import bump_scenario_versions
+from .models import FinancialRecord, Scenario
+
+FISCAL_START_MONTH = settings.FISCAL_YEAR_START_MONTH
+SEASON_LENGTH = 12
+DEFAULT_HISTORY_MONTHS = 36
+
+# name -> function(history, horizon, **params) returning a (slices x horizon) array.
+FORECAST_METHODS = {}
+
+
+def register_forecast_method(name):
+    """Registers a forecast method under `name` so run_forecast() can select it."""
+    def decorator(func):
+        FORECAST_METHODS[name] = func
+        return func
+    return decorator
+
+
+def _require_history(history, months, method):
+    if history.shape[1] < months:
+        raise ValueError(f"The '{method}' method needs at least {months} months of history.")
+
+
+@register_forecast_method('run_rate')
+def run_rate(history, horizon):
+    """Carries the last actual month forward unchanged."""
+    _require_history(history, 1, 'run_rate')
+    return np.repeat(history[:, -1:], horizon, axis=1)
+
+
+@register_forecast_method('trailing_average')
+def trailing_average(history, horizon, window=3):
+    """Repeats the mean of the last `window` actual months."""
+    _require_history(history, window, 'trailing_average')
+    return np.repeat(history[:, -window:].mean(axis=1, keepdims=True), horizon, axis=1)
+
+
+@register_forecast_method('linear_trend')
+def linear_trend(history, horizon, window=12):
+    """Extends a least-squares line fitted to the last `window` months of every slice."""
+    _require_history(history, window, 'linear_trend')
+    y = history[:, -window:]
+    x = np.arange(window, dtype=float)
+    x_centered = x - x.mean()
+    slope = (y - y.mean(axis=1, keepdims=True)) @ x_centered / (x_centered ** 2).sum()
+    intercept = y.mean(axis=1) - slope * x.mean()
+    steps = np.arange(window, window + horizon, dtype=float)
+    return intercept[:, None] + slope[:, None] * steps
+
+
+@register_forecast_method('seasonal_naive')
+def seasonal_naive(history, horizon, season_length=SEASON_LENGTH):
+    """Uses the value of the same month one season (a year) earlier."""
+    _require_history(history, season_length, 'seasonal_naive')
+    columns = history.shape[1] - season_length + np.arange(horizon) % season_length
+    return history[:, columns]
+
+
+@register_forecast_method('holt_winters')
+def holt_winters(history, horizon, alpha=0.3, beta=0.1, gamma=0.1, season_length=SEASON_LENGTH):
+    """
+    Additive Holt-Winters (triple exponential smoothing).
+    The recursion runs once per month over all slices at the same time.
+    """
+    _require_history(history, 2 * season_length, 'holt_winters')
+    first_season = history[:, :season_length]
+    second_season = history[:, season_length:2 * season_length]
+
+    # Initial state from the first two seasons.
+    level = first_season.mean(axis=1)
+    trend = (second_season.mean(axis=1) - level) / season_length
+    seasonals = first_season - level[:, None]
+
+    for t in range(history.shape[1]):
+        s = t % season_length
+        observed = history[:, t]
+        previous_level = level
+        level = alpha * (observed - seasonals[:, s]) + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+        seasonals[:, s] = gamma * (observed - level) + (1 - gamma) * seasonals[:, s]
+
+    steps = np.arange(1, horizon + 1)
+    season_index = (history.shape[1] + steps - 1) % season_length
+    return level[:, None] + trend[:, None] * steps + seasonals[:, season_index]
+
+
+# Periods are numbered fiscal_year * 12 + fiscal period (0-11), so
+# consecutive months are consecutive integers across fiscal years.
+LOAD_ACTUALS_SQL = """
+SELECT account_id, fund_id, state_id, sector_id,
+       year * 12 + (month - %(fiscal_start_month)s + 12) %% 12 AS period,
+       value
+FROM {financial_record}
+WHERE scenario_id = %(actual_scenario_id)s
+  AND year * 12 + (month - %(fiscal_start_month)s + 12) %% 12 BETWEEN %(first_period)s AND %(last_period)s
+"""
+
+# Existing forecasts are updated first, matching a missing state or sector
+# as equal, because the unique constraint treats NULLs as distinct and
+# ON CONFLICT alone would insert a second row for such slices. The rest are
+# inserted; ON CONFLICT covers rows a concurrent run added meanwhile.
+WRITE_FORECAST_SQL = """
+WITH forecast AS (
+    SELECT *
+    FROM unnest(
+        string_to_array(%(account_ids)s, ',')::bigint[],
+        string_to_array(%(fund_ids)s, ',')::bigint[],
+        string_to_array(%(state_ids)s, ',', '')::bigint[],
+        string_to_array(%(sector_ids)s, ',', '')::bigint[],
+        string_to_array(%(months)s, ',')::integer[],
+        string_to_array(%(values)s, ',')::numeric[]
+    ) AS f(account_id, fund_id, state_id, sector_id, month, value)
+),
+updated AS (
+    UPDATE {financial_record} AS fr
+    SET value = f.value, is_editable = TRUE, version = fr.version + 1
+    FROM forecast AS f
+    WHERE fr.scenario_id = %(forecast_scenario_id)s AND fr.year = %(fiscal_year)s AND fr.month = f.month
+      AND fr.account_id = f.account_id AND fr.fund_id = f.fund_id
+      AND fr.state_id IS NOT DISTINCT FROM f.state_id AND fr.sector_id IS NOT DISTINCT FROM f.sector_id
+    RETURNING f.account_id, f.fund_id, f.state_id, f.sector_id, f.month
+),
+upserted AS (
+    INSERT INTO {financial_record} (
+        account_id, fund_id, state_id, sector_id, year, month, scenario_id, value, is_editable
+    )
+    SELECT account_id, fund_id, state_id, sector_id, %(fiscal_year)s, month,
+           %(forecast_scenario_id)s, value, TRUE
+    FROM forecast AS f
+    WHERE NOT EXISTS (
+        SELECT 1 FROM updated AS u
+        WHERE u.account_id = f.account_id AND u.fund_id = f.fund_id AND u.month = f.month
+          AND u.state_id IS NOT DISTINCT FROM f.state_id AND u.sector_id IS NOT DISTINCT FROM f.sector_id
+    )
+    ON CONFLICT (account_id, fund_id, year, month, scenario_id, state_id, sector_id)
+    DO UPDATE SET value = EXCLUDED.value, is_editable = TRUE, version = {financial_record}.version + 1
+    RETURNING (xmax = 0) AS created
+)
+SELECT COUNT(*) FILTER (WHERE created),
+       COUNT(*) FILTER (WHERE NOT created) + (SELECT COUNT(DISTINCT (account_id, fund_id, state_id, sector_id, month)) FROM updated)
+FROM upserted
+"""
+
+
+def load_actual_matrix(first_period, last_period):
+    """
+    Loads ACTUAL values between two period numbers (inclusive) as a dense
+    (slices x months) matrix. Months without a record are 0.
+    Returns (slices, matrix), where slices lists the (account, fund, state, sector) keys.
+    """
+    actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
+    sql = LOAD_ACTUALS_SQL.format(
+        financial_record=connection.ops.quote_name(FinancialRecord._meta.db_table),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'fiscal_start_month': FISCAL_START_MONTH,
+            'actual_scenario_id': actual_scenario.pk,
+            'first_period': first_period,
+            'last_period': last_period,
+        })
+        rows = cursor.fetchall()
+
+    slice_index = {}
+    row_numbers = np.fromiter(
+        (slice_index.setdefault(row[:4], len(slice_index)) for row in rows), dtype=np.int64, count=len(rows),
+    )
+    periods = np.fromiter((row[4] for row in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((row[5] for row in rows), dtype=float, count=len(rows))
+
+    matrix = np.zeros((len(slice_index), last_period - first_period + 1))
+    # Records with no state or sector can share a month; add them up.
+    np.add.at(matrix, (row_numbers, periods - first_period), values)
+    return list(slice_index), matrix
+
+
+def run_forecast(fiscal_year, actual_cutoff_month, actual_cutoff_year, method='run_rate',
+                 forecast_scenario_name='FORECAST', history_months=DEFAULT_HISTORY_MONTHS, **params):
+    """
+    Forecasts every month of the fiscal year after the actual cutoff for all
+    slices with ACTUALs in the last `history_months` months, and writes the
+    results to the forecast scenario in one upsert.
+    Returns a (records_created, records_updated) tuple.
+    """
+    if method not in FORECAST_METHODS:
+        raise ValueError(f"Unknown forecast method '{method}'. Choose from: {', '.join(sorted(FORECAST_METHODS))}.")
+    forecast_scenario = Scenario.objects.get(scenario_name=forecast_scenario_name)
+
+    cutoff_fiscal_year = actual_cutoff_year - (actual_cutoff_month < FISCAL_START_MONTH)
+    cutoff_period = cutoff_fiscal_year * 12 + (actual_cutoff_month - FISCAL_START_MONTH) % 12
+    first_forecast_period = max(cutoff_period + 1, fiscal_year * 12)
+    horizon = fiscal_year * 12 + 11 - first_forecast_period + 1
+    if horizon <= 0:
+        return 0, 0
+
+    slices, history = load_actual_matrix(cutoff_period - history_months + 1, cutoff_period)
+    if not slices:
+        return 0, 0
+
+    # Forecast from the cutoff, then keep only the months inside the fiscal year.
+    forecast = FORECAST_METHODS[method](history, first_forecast_period - cutoff_period - 1 + horizon, **params)
+    forecast = np.round(forecast[:, -horizon:], 2)
+
+    months = (np.arange(first_forecast_period, first_forecast_period + horizon) + FISCAL_START_MONTH - 1) % 12 + 1
+    account_ids, fund_ids, state_ids, sector_ids = zip(*slices)
+
+    def join(ids):
+        return ','.join('' if i is None else str(i) for i in np.repeat(np.array(ids, dtype=object), horizon))
+
+    sql = WRITE_FORECAST_SQL.format(
+        financial_record=connection.ops.quote_name(FinancialRecord._meta.db_table),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'fiscal_year': fiscal_year,
+            'forecast_scenario_id': forecast_scenario.pk,
+            'account_ids': join(account_ids),
+            'fund_ids': join(fund_ids),
+            'state_ids': join(state_ids),
+            'sector_ids': join(sector_ids),
+            'months': ','.join(map(str, np.tile(months, len(slices)).tolist())),
+            'values': ','.join(np.char.mod('%.2f', forecast.ravel())),
+        })
+        records_created, records_updated = cursor.fetchone()
+        refresh_rollups([(forecast_scenario.pk, fiscal_year)])
+        bump_scenario_versions(forecast_scenario.pk)
+
+    return records_created, records_updated
@@ -1,5 +1,5 @@
 from django import forms
-from .models import CustomUser, Fund, Sector, Grade, Scenario, FundCategory, Region, State, Location, Account, DateDimension
+from .models import CustomUser, Fund, Sector, Grade, Scenario, FundCategory, Region, State, Location, Account, DateDimension, Department
 from django.contrib.auth.forms import UserCreationForm
 
 class GLUploadForm(forms.Form):
@@ -104,6 +104,11 @@ class LocationForm(forms.ModelForm):
             'state': forms.Select(attrs={'class': 'form-control'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # State.__str__ shows the region; join it rather than fetching it per option.
+        self.fields['state'].queryset = State.objects.select_related('region')
+
 class AccountForm(forms.ModelForm):
     """Form for creating and updating Chart of Accounts records."""
     class Meta:
@@ -130,7 +135,7 @@ class AccountForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['parent_account'].queryset = Account.objects.order_by('account_code')
+        self.fields['parent_account'].queryset = Account.objects.only('account_key', 'account_code', 'account_name').order_by('account_code')
 
 class AccountUploadForm(forms.Form):
     """A simple form to handle the CSV file upload for the Chart of Accounts."""
@@ -165,6 +170,25 @@ class DateDimensionUploadForm(forms.Form):
         help_text='File must match the format of the downloadable template.'
     )
 
+class GLTransactionFilterForm(forms.Form):
+    """
+    Filters for the GL transaction list. Every field is optional.
+    """
+    q = forms.CharField(required=False, widget=forms.TextInput(attrs={'class': 'form-control form-control-sm', 'placeholder': 'Search Description...'}))
+    scenario = forms.ModelChoiceField(queryset=Scenario.objects.all(), required=False, empty_label='All scenarios', widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    fund = forms.ModelChoiceField(queryset=Fund.objects.only('id', 'fund_name').order_by('fund_name'), required=False, empty_label='All funds', widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    department = forms.ModelChoiceField(queryset=Department.objects.all(), required=False, empty_label='All departments', widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    state = forms.ModelChoiceField(queryset=State.objects.only('id', 'state_name'), required=False, empty_label='All states', widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control form-control-sm'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control form-control-sm'}))
+    order = forms.ChoiceField(choices=[('date', 'Newest first'), ('relevance', 'Best match')], required=False, widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # State.__str__ follows region; label from the state's own column instead.
+        self.fields['state'].label_from_instance = lambda state: state.state_name
+        self.fields['fund'].label_from_instance = lambda fund: fund.fund_name
+
 class CustomUserCreationForm(UserCreationForm):
     """
     Custom registration form based on Django's UserCreationForm.
@@ -0,0 +1,116 @@
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.signals import post_save, pre_delete
+
+from .models import Account, AccountClosure
+
+# Rebuilds the whole closure table from parent_account with a recursive CTE.
+# The path array stops a parent_account cycle from recursing forever.
+REBUILD_CLOSURE_SQL = """
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth, path) AS (
+    SELECT account_key, account_key, 0, ARRAY[account_key]
+    FROM {account}
+    UNION ALL
+    SELECT tree.ancestor_id, child.account_key, tree.depth + 1, tree.path || child.account_key
+    FROM tree
+    JOIN {account} AS child ON child.parent_account_id = tree.descendant_id
+    WHERE child.account_key <> ALL(tree.path)
+)
+INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, depth FROM tree
+"""
+
+# Cuts the subtree rooted at %(node)s off from all of its ancestors.
+DETACH_SUBTREE_SQL = """
+DELETE FROM {closure}
+WHERE descendant_id IN (SELECT descendant_id FROM {closure} WHERE ancestor_id = %(node)s)
+  AND ancestor_id NOT IN (SELECT descendant_id FROM {closure} WHERE ancestor_id = %(node)s)
+"""
+
+# Links every account in the subtree of %(node)s to %(parent)s and its ancestors.
+ATTACH_SUBTREE_SQL = """
+INSERT INTO {closure} (ancestor_id, descendant_id, depth)
+SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+FROM {closure} AS above
+CROSS JOIN {closure} AS below
+WHERE above.descendant_id = %(parent)s AND below.ancestor_id = %(node)s
+"""
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    return {'account': qn(Account._meta.db_table), 'closure': qn(AccountClosure._meta.db_table)}
+
+
+def rebuild_account_closure():
+    """Recomputes the closure table from parent_account in one statement. Returns the row count."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {_tables()['closure']}")
+        cursor.execute(REBUILD_CLOSURE_SQL.format(**_tables()))
+        return cursor.rowcount
+
+
+def sync_account_closure(account):
+    """
+    Brings the closure rows of `account` and its subtree in line with its
+    current parent_account. Costs one indexed lookup when the parent has not
+    changed, and two set-based statements when the subtree has moved.
+    """
+    node, parent = account.account_key, account.parent_account_id
+    links = AccountClosure.objects.filter(descendant_id=node)
+    if parent is None:
+        unchanged = links.filter(depth=0).exists() and not links.filter(depth__gt=0).exists()
+    else:
+        unchanged = links.filter(ancestor_id=parent, depth=1).exists()
+    if unchanged:
+        return
+
+    tables = _tables()
+    params = {'node': node, 'parent': parent}
+    with transaction.atomic(), connection.cursor() as cursor:
+        AccountClosure.objects.get_or_create(ancestor_id=node, descendant_id=node, defaults={'depth': 0})
+        cursor.execute(DETACH_SUBTREE_SQL.format(**tables), params)
+        if parent is not None:
+            cursor.execute(ATTACH_SUBTREE_SQL.format(**tables), params)
+
+
+def detach_account_closure(account):
+    """
+    Called before an account is deleted: its children become top-level
+    accounts (parent_account is SET_NULL), so the subtree loses its links to
+    the account's ancestors. The account's own rows go with it by CASCADE.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(DETACH_SUBTREE_SQL.format(**_tables()), {'node': account.account_key})
+
+
+def get_subtree_totals(queryset, value_field='value', ancestors=None):
+    """
+    Sums `value_field` of a FinancialRecord or GLTransaction queryset for every
+    account including its sub-accounts, in one query joined through the
+    closure table. Returns {account_key: total}, optionally limited to the
+    given ancestor account keys.
+    """
+    if ancestors is not None:
+        queryset = queryset.filter(account__ancestor_links__ancestor_id__in=ancestors)
+    rows = (
+        queryset.order_by()
+        .values_list('account__ancestor_links__ancestor_id')
+        .annotate(total=Sum(value_field))
+    )
+    return dict(rows)
+
+
+def _sync_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        sync_account_closure(instance)
+
+
+def _detach_on_delete(sender, instance, **kwargs):
+    detach_account_closure(instance)
+
+
+def connect_closure_signals():
+    """Keeps the closure table in step with single account saves and deletes."""
+    post_save.connect(_sync_on_save, sender=Account, dispatch_uid='budgeting:account_closure:save')
+    pre_delete.connect(_detach_on_delete, sender=Account, dispatch_uid='budgeting:account_closure:delete')
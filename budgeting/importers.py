@@ -0,0 +1,516 @@
+import codecs
+import csv
+import hashlib
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+
+from .cube import mark_all_rollups_stale
+from .dimension_cache import get_dimension_map, get_gl_dimension_maps, invalidate_dimension
+from .hierarchy import rebuild_account_closure
+from .models import GLTransaction, Account, StaleActualBucket
+from .partitions import ensure_gl_partitions
+from .utils import mark_stale_actual_buckets
+
+# Number of parsed rows held in memory before they are flushed to the database.
+GL_IMPORT_BATCH_SIZE = getattr(settings, 'GL_IMPORT_BATCH_SIZE', 5000)
+
+# Bytes read from the upload per chunk while decoding.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Only the first few row errors are kept for reporting; the rest are counted.
+MAX_REPORTED_ERRORS = 10
+
+
+class GLImportAborted(Exception):
+    """Raised inside the import transaction to roll back a file with row errors."""
+
+
+class ImportResult:
+    """Row and error counters shared by the CSV importers."""
+
+    def __init__(self):
+        self.rows_parsed = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+
+class GLImportResult(ImportResult):
+    """Summary of a GL import run."""
+
+    def __init__(self):
+        super().__init__()
+        self.rows_inserted = 0
+        self.rows_skipped = 0  # rows already in the ledger (matching fingerprint)
+
+
+class AccountImportResult(ImportResult):
+    """Summary of a Chart of Accounts import run."""
+
+    def __init__(self):
+        super().__init__()
+        self.accounts_created = 0
+        self.accounts_updated = 0
+
+
+def iter_decoded_lines(uploaded_file, encoding='utf-8-sig', chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Yields the lines of an uploaded file, decoding it chunk by chunk.
+    Only one chunk plus the current partial line is ever held in memory.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ''
+    for chunk in uploaded_file.chunks(chunk_size):
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(uploaded_file):
+    """Streams an uploaded CSV file as dictionaries keyed by the header row."""
+    return csv.DictReader(iter_decoded_lines(uploaded_file))
+
+
+def parse_gl_row(row, dimension_maps):
+    """
+    Validates a single GL CSV row and resolves its dimensions to keys.
+    Returns a dict of GLTransaction field values or raises ValueError.
+    """
+    account_id = dimension_maps['account'].get(row['Account Code'])
+    fund_id = dimension_maps['fund'].get(row['Fund Name'])
+    department_id = dimension_maps['department'].get(row['Department'])
+    state_id = dimension_maps['state'].get(row['State'])
+    sector_id = dimension_maps['sector'].get(row['Sector'])
+
+    if not all([account_id, fund_id, department_id, state_id, sector_id]):
+        missing_dims = []
+        if not account_id: missing_dims.append(f"Account Code: {row['Account Code']}")
+        if not fund_id: missing_dims.append(f"Fund Name: {row['Fund Name']}")
+        if not department_id: missing_dims.append(f"Department: {row['Department']}")
+        if not state_id: missing_dims.append(f"State: {row['State']}")
+        if not sector_id: missing_dims.append(f"Sector: {row['Sector']}")
+        raise ValueError(f"Missing Dimension Lookup: {'; '.join(missing_dims)}")
+
+    trans_date = datetime.strptime(row['Date'], '%Y-%m-%d').date()
+    try:
+        # Round the way PostgreSQL does for numeric(18, 2), so the stored
+        # amount (and the fingerprint) is the same whichever load path is used.
+        amount = Decimal(row['Amount']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    except InvalidOperation:
+        raise ValueError(f"Invalid Amount: {row['Amount']}")
+
+    values = {
+        'transaction_date': trans_date,
+        'account_id': account_id,
+        'fund_id': fund_id,
+        'department_id': department_id,
+        'state_id': state_id,
+        'sector_id': sector_id,
+        'description': row.get('Description', 'Imported GL Entry'),
+        'transaction_amount': amount,
+    }
+    values['fingerprint'] = gl_fingerprint(values)
+    return values
+
+
+def gl_fingerprint(values):
+    """
+    Content hash identifying a ledger row across imports.
+
+    Must stay in step with the SQL backfill in migration 0004: the fields are
+    joined with '|' using PostgreSQL's text output for each column.
+    """
+    amount = values['transaction_amount']
+    if amount == 0:
+        amount = Decimal('0.00')  # PostgreSQL has no negative zero
+    content = '|'.join([
+        values['transaction_date'].strftime('%Y-%m-%d'),
+        str(values['account_id']),
+        str(values['fund_id']),
+        str(values['department_id']),
+        str(values['state_id']),
+        str(values['sector_id']),
+        f"{amount:.2f}",
+        values['description'],
+    ])
+    return hashlib.md5(content.encode('utf-8')).hexdigest()
+
+
+def occurrence_fingerprint(fingerprint, occurrence):
+    """
+    Fingerprint of the n-th identical row within one file. The first copy
+    keeps the content hash; later copies hash it with their ordinal, so
+    genuinely repeated postings are all kept while re-importing the same
+    file still matches every row. Same expression as the merge in
+    `copy_gl_transactions` and the backfill in migration 0004.
+    """
+    if occurrence == 1:
+        return fingerprint
+    return hashlib.md5(f"{fingerprint}|{occurrence}".encode('utf-8')).hexdigest()
+
+
+def _insert_new_transactions(batch, result):
+    """
+    Inserts the batch, skipping rows whose fingerprint is already in the
+    ledger. Existing fingerprints are found with one
+    indexed query per batch rather than a lookup per row.
+    """
+    existing = set(
+        GLTransaction.objects.filter(fingerprint__in=[t.fingerprint for t in batch])
+        .values_list('fingerprint', flat=True)
+    )
+    new_transactions = []
+    for t in batch:
+        if t.fingerprint not in existing:
+            existing.add(t.fingerprint)
+            new_transactions.append(t)
+
+    if new_transactions:
+        dates = [t.transaction_date for t in new_transactions]
+        ensure_gl_partitions(min(dates), max(dates))
+    # ignore_conflicts covers rows committed by a concurrent import meanwhile.
+    GLTransaction.objects.bulk_create(new_transactions, ignore_conflicts=True)
+    mark_stale_actual_buckets(new_transactions)
+    result.rows_inserted += len(new_transactions)
+    result.rows_skipped += len(batch) - len(new_transactions)
+
+
+def import_gl_transactions(uploaded_file, scenario, batch_size=GL_IMPORT_BATCH_SIZE, progress=None):
+    """
+    Streams a GL CSV upload into GLTransaction in fixed-size batches.
+
+    The whole file is imported inside one transaction: batches are inserted
+    as they fill up, and if any row fails validation the transaction is
+    rolled back so a bad file never leaves a partial load behind. Rows that
+    are already in the ledger are skipped, so re-importing a file is safe;
+    identical rows within the file are kept (see occurrence_fingerprint).
+    `progress`, if given, is called with the running result every
+    `batch_size` rows and once at the end.
+    """
+    result = GLImportResult()
+    dimension_maps = get_gl_dimension_maps()
+    occurrences = {}
+    batch = []
+
+    try:
+        with transaction.atomic():
+            for i, row in enumerate(iter_csv_rows(uploaded_file)):
+                result.rows_parsed += 1
+                try:
+                    values = parse_gl_row(row, dimension_maps)
+                except Exception as e:
+                    result.add_error(f"Row {i + 1}: Could not process row. Error: {e}")
+                else:
+                    # Once a row has failed, the file will be rolled back, so
+                    # keep validating but stop building objects.
+                    if not result.error_count:
+                        occurrence = occurrences[values['fingerprint']] = occurrences.get(values['fingerprint'], 0) + 1
+                        values['fingerprint'] = occurrence_fingerprint(values['fingerprint'], occurrence)
+                        batch.append(GLTransaction(scenario=scenario, balance=0.00, **values))
+                        if len(batch) >= batch_size:
+                            _insert_new_transactions(batch, result)
+                            batch = []
+
+                if progress and result.rows_parsed % batch_size == 0:
+                    progress(result)
+
+            if result.error_count:
+                raise GLImportAborted()
+
+            if batch:
+                _insert_new_transactions(batch, result)
+    except GLImportAborted:
+        result.rows_inserted = 0
+        result.rows_skipped = 0
+
+    if progress:
+        progress(result)
+    return result
+
+
+# --- PostgreSQL COPY load path ---
+
+# Rows buffered per COPY statement into the staging table.
+GL_COPY_BATCH_SIZE = getattr(settings, 'GL_COPY_BATCH_SIZE', 50000)
+
+# Columns written by COPY; scenario and balance are constant per file and
+# are filled in when the staging table is merged into the ledger.
+GL_COPY_COLUMNS = [
+    'transaction_date', 'account_id', 'fund_id', 'department_id',
+    'state_id', 'sector_id', 'description', 'transaction_amount', 'fingerprint',
+]
+
+GL_STAGING_TABLE = 'gl_transaction_staging'
+
+
+def _copy_rows(cursor, table, columns, rows):
+    """Sends rows to `table` with COPY FROM STDIN using CSV framing."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(rows)
+    buffer.seek(0)
+
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    if hasattr(cursor, 'copy_expert'):
+        # psycopg2
+        cursor.copy_expert(sql, buffer)
+    else:
+        # psycopg (3)
+        with cursor.copy(sql) as copy:
+            while data := buffer.read(UPLOAD_CHUNK_SIZE):
+                copy.write(data)
+
+
+def copy_gl_transactions(uploaded_file, scenario, batch_size=GL_COPY_BATCH_SIZE, progress=None):
+    """
+    High-throughput GL load for PostgreSQL.
+
+    Rows are resolved in Python exactly as in `import_gl_transactions`, then
+    streamed with COPY FROM STDIN into a session-level staging table. Once
+    the whole file has validated, the staging rows are merged into the ledger
+    with a single INSERT ... SELECT in its own transaction, so the ledger only
+    ever sees the complete file or nothing at all. The merge numbers identical
+    rows within the file (see occurrence_fingerprint) and skips rows already
+    in the ledger with ON CONFLICT DO NOTHING against the unique
+    (fingerprint, transaction_date) index, so re-imports are safe while
+    repeated postings are kept.
+    Because only the merge is transactional, `progress` updates made while
+    staging are committed and visible to other connections.
+    """
+    if connection.vendor != 'postgresql':
+        raise ImproperlyConfigured("The COPY load path requires PostgreSQL.")
+
+    result = GLImportResult()
+    dimension_maps = get_gl_dimension_maps()
+    qn = connection.ops.quote_name
+    target = qn(GLTransaction._meta.db_table)
+    staging = qn(GL_STAGING_TABLE)
+    columns = [qn(c) for c in GL_COPY_COLUMNS]
+    batch = []
+
+    with connection.cursor() as cursor:
+        # Cloning the target columns keeps the staging types in step with
+        # the model. A table left behind by a failed run is replaced.
+        cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {staging} AS "
+            f"SELECT {', '.join(columns)} FROM {target} WITH NO DATA"
+        )
+
+        for i, row in enumerate(iter_csv_rows(uploaded_file)):
+            result.rows_parsed += 1
+            try:
+                values = parse_gl_row(row, dimension_maps)
+            except Exception as e:
+                result.add_error(f"Row {i + 1}: Could not process row. Error: {e}")
+            else:
+                if not result.error_count:
+                    batch.append([values[c] for c in GL_COPY_COLUMNS])
+                    if len(batch) >= batch_size:
+                        _copy_rows(cursor, staging, columns, batch)
+                        batch = []
+
+            if progress and result.rows_parsed % batch_size == 0:
+                progress(result)
+
+        if not result.error_count:
+            if batch:
+                _copy_rows(cursor, staging, columns, batch)
+            cursor.execute(f"SELECT MIN({qn('transaction_date')}), MAX({qn('transaction_date')}) FROM {staging}")
+            first_date, last_date = cursor.fetchone()
+            if first_date is not None:
+                ensure_gl_partitions(first_date, last_date)
+            # Identical rows are interchangeable, so their numbering needs no order.
+            fingerprint = qn('fingerprint')
+            select = [
+                f"CASE WHEN occurrence = 1 THEN {fingerprint} ELSE md5({fingerprint} || '|' || occurrence) END"
+                if column == fingerprint else column
+                for column in columns
+            ]
+            with transaction.atomic():
+                cursor.execute(
+                    f"INSERT INTO {target} ({', '.join(columns)}, {qn('scenario_id')}, {qn('balance')}) "
+                    f"SELECT {', '.join(select)}, %s, 0 FROM ("
+                    f"SELECT *, ROW_NUMBER() OVER (PARTITION BY {fingerprint}) AS occurrence FROM {staging}"
+                    f") AS numbered "
+                    f"ON CONFLICT ({fingerprint}, {qn('transaction_date')}) DO NOTHING",
+                    [scenario.pk],
+                )
+                result.rows_inserted = cursor.rowcount
+                result.rows_skipped = result.rows_parsed - result.rows_inserted
+
+                # Flag the touched (slice, month) buckets for incremental aggregation.
+                cursor.execute(
+                    f"INSERT INTO {qn(StaleActualBucket._meta.db_table)} "
+                    f"(account_id, fund_id, state_id, sector_id, year, month, marked_at) "
+                    f"SELECT DISTINCT account_id, fund_id, state_id, sector_id, "
+                    f"EXTRACT(YEAR FROM transaction_date)::integer, EXTRACT(MONTH FROM transaction_date)::integer, now() "
+                    f"FROM {staging} "
+                    f"ON CONFLICT (account_id, fund_id, state_id, sector_id, year, month) "
+                    f"DO UPDATE SET marked_at = EXCLUDED.marked_at"
+                )
+
+        cursor.execute(f"DROP TABLE {staging}")
+
+    if progress:
+        progress(result)
+    return result
+
+
+# --- Chart of Accounts importer ---
+
+ACCOUNT_IMPORT_BATCH_SIZE = 2000
+
+# Account fields written from the CSV, apart from the parent link.
+ACCOUNT_UPDATE_FIELDS = [
+    'account_name', 'account_type', 'statement_category',
+    'hierarchy_level_1', 'hierarchy_level_2', 'hierarchy_level_3', 'hierarchy_level_4',
+    'parent_account', 'is_leaf', 'display_order', 'active_flag',
+]
+
+
+def _parse_flag(value):
+    return value.strip().upper() in ['TRUE', '1', 'YES']
+
+
+def parse_account_row(row):
+    """Validates a single Chart of Accounts CSV row into Account field values."""
+    return {
+        'account_code': row['AccountCode'],
+        'account_name': row['AccountName'],
+        'account_type': row['AccountType'],
+        'statement_category': row['StatementCategory'],
+        'hierarchy_level_1': row.get('HierarchyLevel1'),
+        'hierarchy_level_2': row.get('HierarchyLevel2'),
+        'hierarchy_level_3': row.get('HierarchyLevel3'),
+        'hierarchy_level_4': row.get('HierarchyLevel4'),
+        'is_leaf': _parse_flag(row['IsLeaf']),
+        'display_order': int(row['DisplayOrder']),
+        'active_flag': _parse_flag(row['ActiveFlag']),
+    }
+
+
+def order_accounts_by_depth(parent_codes, existing_codes):
+    """
+    Groups account codes into levels so every parent is written before its children.
+
+    `parent_codes` maps each code in the file to its ParentAccountCode (or '').
+    A parent outside the file must already exist in `existing_codes`.
+    Returns (levels, errors), where levels[0] holds the top-level codes.
+    """
+    depths = {}  # code -> depth, or None when its parent chain is invalid
+    errors = []
+
+    for code in parent_codes:
+        path = []
+        current = code
+        # Walk up the parent chain until reaching a code whose depth is known.
+        while current not in depths:
+            if current in path:
+                errors.append(f"Account {code}: circular ParentAccountCode chain ({' -> '.join(path + [current])}).")
+                base = None
+                break
+            path.append(current)
+            parent = parent_codes[current]
+            if parent in parent_codes:
+                current = parent
+                continue
+            if parent and parent not in existing_codes:
+                errors.append(f"Account {current}: parent account {parent} does not exist.")
+                base = None
+            else:
+                base = -1  # `current` is a top-level account for this file
+            break
+        else:
+            base = depths[current]
+
+        for offset, visited in enumerate(reversed(path), start=1):
+            depths[visited] = None if base is None else base + offset
+
+    levels = []
+    for code, depth in depths.items():
+        if depth is None:
+            continue
+        while len(levels) <= depth:
+            levels.append([])
+        levels[depth].append(code)
+    return levels, errors
+
+
+def import_chart_of_accounts(uploaded_file, batch_size=ACCOUNT_IMPORT_BATCH_SIZE):
+    """
+    Inserts or updates the Chart of Accounts from a CSV upload with set-based writes.
+
+    Existing account codes come from the dimension cache and the file is
+    ordered by ParentAccountCode, so a child may appear before its parent.
+    Each hierarchy level is then written with a single bulk upsert on
+    account_code, giving one round trip per level (per `batch_size` rows)
+    instead of several queries per account. Nothing is written if any row fails.
+    """
+    result = AccountImportResult()
+    accounts = {}
+    parent_codes = {}
+
+    for i, row in enumerate(iter_csv_rows(uploaded_file)):
+        result.rows_parsed += 1
+        try:
+            values = parse_account_row(row)
+        except Exception as e:
+            result.add_error(f"Row {i + 2}: Error reading row - {e}")
+            continue
+        accounts[values['account_code']] = values
+        parent_codes[values['account_code']] = (row.get('ParentAccountCode') or '').strip()
+
+    if result.error_count:
+        return result
+
+    # Copied: the keys of new accounts are added to it below.
+    account_keys = dict(get_dimension_map('account'))
+    levels, errors = order_accounts_by_depth(parent_codes, account_keys)
+    for error in errors:
+        result.add_error(error)
+    if result.error_count:
+        return result
+
+    result.accounts_created = sum(1 for code in accounts if code not in account_keys)
+    result.accounts_updated = len(accounts) - result.accounts_created
+
+    with transaction.atomic():
+        for codes in levels:
+            level_accounts = []
+            for code in codes:
+                parent = parent_codes[code]
+                level_accounts.append(Account(parent_account_id=account_keys[parent] if parent else None,
+                                              **accounts[code]))
+            Account.objects.bulk_create(
+                level_accounts,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['account_code'],
+                update_fields=ACCOUNT_UPDATE_FIELDS,
+            )
+            # PostgreSQL returns the keys of inserted and updated rows, which
+            # the next level needs for its parent links.
+            account_keys.update((a.account_code, a.account_key) for a in level_accounts)
+        # bulk_create sends no post_save signals, so refresh the account
+        # hierarchy, the cube rollups (which hold account types and levels)
+        # and the cached account codes here.
+        rebuild_account_closure()
+        if result.accounts_updated:
+            mark_all_rollups_stale()
+        invalidate_dimension('account')
+
+    return result
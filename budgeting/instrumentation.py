@@ -0,0 +1,173 @@
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+# {'cache_miss': bool} for the request being handled. A dict rather than a
+# flag so changes made inside sync_to_async-wrapped code are still seen.
+_request_state = contextvars.ContextVar('budgeting_request_state', default=None)
+
+
+def query_budget(max_queries, cold=None):
+    """
+    Declares the most SQL queries a view should issue per request, and with
+    `cold` the most for a request that rebuilds cached data (see
+    record_cache_miss). Works on view functions; class-based views set
+    `query_budget` and `cold_query_budget` attributes instead.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        view.cold_query_budget = cold
+        return view
+    return decorator
+
+
+def _declared(view_func, attribute):
+    value = getattr(view_func, attribute, None)
+    if value is None:
+        value = getattr(getattr(view_func, 'view_class', None), attribute, None)
+    return value
+
+
+def get_query_budget(view_func, cold=False):
+    """
+    Returns the budget declared on a resolved view function or its class, if
+    any. With `cold`, the budget of a request that rebuilt cached data, which
+    defaults to the ordinary one.
+    """
+    budget = _declared(view_func, 'query_budget')
+    cold_budget = _declared(view_func, 'cold_query_budget') if cold else None
+    return budget if cold_budget is None else cold_budget
+
+
+def record_cache_miss():
+    """
+    Notes that the current request rebuilt cached data (a dimension map, a
+    variance run, a statement or the dashboard snapshot), so it is held to
+    its view's cold query budget. Does nothing outside a request.
+    """
+    state = _request_state.get()
+    if state is not None:
+        state['cache_miss'] = True
+
+
+class QueryRecorder:
+    """A connection.execute_wrapper that counts queries and their total time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def record_request(view_name, queries, db_time, total_time):
+    """Adds one request to the in-process per-view statistics."""
+    with _stats_lock:
+        stats = _stats.setdefault(view_name, {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'total_ms': 0.0, 'max_total_ms': 0.0,
+        })
+        stats['requests'] += 1
+        stats['queries'] += queries
+        stats['max_queries'] = max(stats['max_queries'], queries)
+        stats['db_ms'] += db_time * 1000
+        stats['total_ms'] += total_time * 1000
+        stats['max_total_ms'] = max(stats['max_total_ms'], total_time * 1000)
+
+
+def get_request_stats():
+    """
+    Returns the per-view statistics of this process, slowest total DB time
+    first, with per-request averages.
+    """
+    with _stats_lock:
+        snapshot = {name: dict(stats) for name, stats in _stats.items()}
+    rows = []
+    for name, stats in snapshot.items():
+        requests = stats['requests']
+        rows.append(dict(
+            stats,
+            view=name,
+            db_ms=round(stats['db_ms'], 2),
+            total_ms=round(stats['total_ms'], 2),
+            max_total_ms=round(stats['max_total_ms'], 2),
+            avg_queries=round(stats['queries'] / requests, 1),
+            avg_db_ms=round(stats['db_ms'] / requests, 2),
+            avg_total_ms=round(stats['total_ms'] / requests, 2),
+        ))
+    return sorted(rows, key=lambda row: row['db_ms'], reverse=True)
+
+
+def reset_request_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Records the number of SQL queries, the time spent in the database and the
+    total time of every request, per URL name. Each request is logged as a
+    JSON line on the `budgeting.instrumentation` logger; requests that exceed
+    their view's declared query budget are logged as warnings. Requests that
+    rebuilt cached data are held to the view's cold budget instead, and are
+    flagged with `request.cache_miss`.
+
+    Queries issued while a streaming response is consumed happen after the
+    view returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        state = {'cache_miss': False}
+        token = _request_state.set(state)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        total_time = time.perf_counter() - start
+        request.cache_miss = state['cache_miss']
+
+        match = request.resolver_match
+        if match is None:
+            return response
+        record_request(match.view_name, recorder.count, recorder.duration, total_time)
+
+        budget = get_query_budget(match.func, cold=state['cache_miss'])
+        over_budget = budget is not None and recorder.count > budget
+        logger.log(
+            logging.WARNING if over_budget else logging.INFO,
+            json.dumps({
+                'event': 'request',
+                'view': match.view_name,
+                'method': request.method,
+                'status': response.status_code,
+                'queries': recorder.count,
+                'query_budget': budget,
+                'cache_miss': state['cache_miss'],
+                'db_ms': round(recorder.duration * 1000, 2),
+                'total_ms': round(total_time * 1000, 2),
+            }),
+        )
+        return response
@@ -0,0 +1,27 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from budgeting.dashboard import refresh_dashboard_snapshot
+from budgeting.utils import aggregate_changed_actuals, aggregate_historical_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Aggregates GL transactions into monthly ACTUAL FinancialRecords. By default only "
+        "the buckets touched by GL imports since the last run are recomputed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fiscal-year', type=int,
+                            help="Fully re-aggregate this fiscal year instead of running incrementally.")
+        parser.add_argument('--cutoff-date', type=date.fromisoformat,
+                            help="Ignore GL transactions after this date (YYYY-MM-DD). Defaults to today.")
+
+    def handle(self, *args, **options):
+        if options['fiscal_year']:
+            created, updated = aggregate_historical_data(options['fiscal_year'], options['cutoff_date'])
+        else:
+            created, updated = aggregate_changed_actuals(options['cutoff_date'])
+        refresh_dashboard_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"ACTUAL records: {created} created, {updated} updated."))
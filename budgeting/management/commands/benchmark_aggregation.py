@@ -0,0 +1,131 @@
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from budgeting.models import (
+    Account, Department, FinancialRecord, Fund, GLTransaction, Region, Scenario, Sector, State,
+)
+from budgeting.partitions import ensure_gl_partitions
+from budgeting.utils import FISCAL_START_MONTH, aggregate_historical_data
+
+
+def legacy_aggregate_historical_data(fiscal_year, cutoff_date):
+    """The previous per-group update_or_create loop, kept as the regression baseline."""
+    actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
+    start_date = date(fiscal_year, FISCAL_START_MONTH, 1)
+    monthly_totals = GLTransaction.objects.filter(
+        transaction_date__gte=start_date,
+        transaction_date__lte=cutoff_date,
+        scenario=actual_scenario,
+    ).values('fund', 'account', 'state', 'sector').annotate(
+        month=ExtractMonth('transaction_date'),
+        year=ExtractYear('transaction_date'),
+        total_value=Sum('transaction_amount'),
+    )
+
+    records_created = 0
+    records_updated = 0
+    with transaction.atomic():
+        for item in monthly_totals:
+            record_fiscal_year = item['year'] - 1 if item['month'] < FISCAL_START_MONTH else item['year']
+            _, created = FinancialRecord.objects.update_or_create(
+                account_id=item['account'], fund_id=item['fund'],
+                state_id=item['state'], sector_id=item['sector'],
+                year=record_fiscal_year, month=item['month'], scenario=actual_scenario,
+                defaults={'value': item['total_value'], 'is_editable': False},
+            )
+            if created:
+                records_created += 1
+            else:
+                records_updated += 1
+    return records_created, records_updated
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks aggregate_historical_data against the previous per-group loop on "
+        "synthetic GL data and checks both produce the same FinancialRecords. "
+        "All data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--accounts', type=int, default=50)
+        parser.add_argument('--funds', type=int, default=5)
+        parser.add_argument('--states', type=int, default=5)
+        parser.add_argument('--sectors', type=int, default=3)
+        parser.add_argument('--transactions-per-slice', type=int, default=2,
+                            help="GL rows generated per slice and month.")
+
+    def handle(self, *args, **options):
+        fiscal_year = date.today().year - 1
+        cutoff_date = date(fiscal_year + 1, FISCAL_START_MONTH, 1) - timedelta(days=1)
+
+        with transaction.atomic():
+            gl_rows = self._create_fixtures(fiscal_year, options)
+            self.stdout.write(f"Generated {gl_rows:,} GL rows for FY{fiscal_year}.")
+
+            results = {}
+            for label, func in [('legacy loop', legacy_aggregate_historical_data),
+                                ('single statement', aggregate_historical_data)]:
+                for run in ('create', 'update'):
+                    sid = transaction.savepoint()
+                    if run == 'update':
+                        func(fiscal_year, cutoff_date)
+                    started = time.perf_counter()
+                    created, updated = func(fiscal_year, cutoff_date)
+                    elapsed = time.perf_counter() - started
+                    snapshot = sorted(FinancialRecord.objects.values_list(
+                        'account_id', 'fund_id', 'state_id', 'sector_id', 'year', 'month', 'value'))
+                    results[(label, run)] = snapshot
+                    transaction.savepoint_rollback(sid)
+                    self.stdout.write(
+                        f"{label:>16} | {run:>6} | {elapsed:8.2f}s | {created:,} created, {updated:,} updated"
+                    )
+
+            for run in ('create', 'update'):
+                same = results[('legacy loop', run)] == results[('single statement', run)]
+                self.stdout.write(f"Results match on {run}: {'yes' if same else 'NO'}")
+            transaction.set_rollback(True)
+
+    def _create_fixtures(self, fiscal_year, options):
+        region = Region.objects.create(region_name='BENCH Region')
+        states = State.objects.bulk_create(
+            [State(state_name=f'BENCH State {i}', region=region) for i in range(options['states'])])
+        funds = Fund.objects.bulk_create(
+            [Fund(fund_name=f'BENCH Fund {i}', fund_type='RSA') for i in range(options['funds'])])
+        sectors = Sector.objects.bulk_create(
+            [Sector(sector_name=f'BENCH Sector {i}') for i in range(options['sectors'])])
+        accounts = Account.objects.bulk_create([
+            Account(account_code=f'BENCH{i:05d}', account_name=f'Bench Account {i}',
+                    account_type='EXPENSE', statement_category='P&L')
+            for i in range(options['accounts'])
+        ])
+        department = Department.objects.create(department_name='BENCH Department')
+        scenario, _ = Scenario.objects.get_or_create(scenario_name='ACTUAL')
+
+        months = [date(fiscal_year + (m < FISCAL_START_MONTH), m, 15) for m in range(1, 13)]
+        ensure_gl_partitions(min(months), max(months))
+        batch = []
+        total = 0
+        for account in accounts:
+            for fund in funds:
+                for state in states:
+                    for sector in sectors:
+                        for month_date in months:
+                            for n in range(options['transactions_per_slice']):
+                                batch.append(GLTransaction(
+                                    account=account, fund=fund, department=department, state=state,
+                                    sector=sector, scenario=scenario, transaction_date=month_date,
+                                    description=f'Bench {n}', transaction_amount=Decimal(n + 1),
+                                ))
+                if len(batch) >= 50000:
+                    GLTransaction.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+        GLTransaction.objects.bulk_create(batch)
+        return total + len(batch)
@@ -0,0 +1,82 @@
+import csv
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from budgeting.importers import import_gl_transactions, copy_gl_transactions
+from budgeting.models import (
+    Account, Department, Fund, GLTransaction, Region, Scenario, Sector, State,
+)
+
+GL_HEADER = ['Date', 'Account Code', 'Fund Name', 'Department', 'State', 'Sector', 'Amount', 'Description']
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the batched ORM GL import against the PostgreSQL COPY path "
+        "on synthetic files. All data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000],
+            help="File sizes (in rows) to benchmark.",
+        )
+        parser.add_argument(
+            '--methods', nargs='+', choices=['orm', 'copy'], default=['orm', 'copy'],
+        )
+
+    def handle(self, *args, **options):
+        loaders = {'orm': import_gl_transactions, 'copy': copy_gl_transactions}
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for row_count in options['rows']:
+                csv_path = os.path.join(tmp_dir, f'gl_{row_count}.csv')
+                self._write_synthetic_file(csv_path, row_count)
+
+                for method in options['methods']:
+                    with transaction.atomic():
+                        scenario = self._create_fixtures()
+                        with open(csv_path, 'rb') as fh:
+                            started = time.perf_counter()
+                            result = loaders[method](File(fh), scenario)
+                            elapsed = time.perf_counter() - started
+                        transaction.set_rollback(True)
+
+                    rate = result.rows_inserted / elapsed if elapsed else 0
+                    self.stdout.write(
+                        f"{method:>5} | {row_count:>10,} rows | {elapsed:8.2f}s | {rate:>12,.0f} rows/s"
+                        + (f" | {result.error_count} errors" if result.error_count else "")
+                    )
+
+    def _create_fixtures(self):
+        """Creates the dimension rows referenced by the synthetic file."""
+        region = Region.objects.create(region_name='BENCH Region')
+        State.objects.create(state_name='BENCH State', region=region)
+        Fund.objects.create(fund_name='BENCH Fund', fund_type='RSA')
+        Department.objects.create(department_name='BENCH Department')
+        Sector.objects.create(sector_name='BENCH Sector')
+        Account.objects.bulk_create([
+            Account(account_code=f'BENCH{i:03d}', account_name=f'Bench Account {i}',
+                    account_type='EXPENSE', statement_category='P&L')
+            for i in range(100)
+        ])
+        scenario, _ = Scenario.objects.get_or_create(scenario_name='ACTUAL')
+        return scenario
+
+    def _write_synthetic_file(self, path, row_count):
+        start = date(2024, 1, 1)
+        with open(path, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(GL_HEADER)
+            for i in range(row_count):
+                writer.writerow([
+                    (start + timedelta(days=i % 365)).isoformat(),
+                    f'BENCH{i % 100:03d}', 'BENCH Fund', 'BENCH Department', 'BENCH State', 'BENCH Sector',
+                    f'{(i % 100000) / 100:.2f}', f'Benchmark entry {i}',
+                ])
@@ -0,0 +1,20 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from budgeting.date_dimension import generate_date_dimension
+
+
+class Command(BaseCommand):
+    help = "Generates (or refreshes) the Date Dimension for an inclusive date range."
+
+    def add_arguments(self, parser):
+        parser.add_argument('start_date', type=date.fromisoformat, help="First date, YYYY-MM-DD.")
+        parser.add_argument('end_date', type=date.fromisoformat, help="Last date, YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        try:
+            count = generate_date_dimension(options['start_date'], options['end_date'])
+        except ValueError as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(f"Successfully generated {count} dates."))
@@ -0,0 +1,38 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from budgeting.importers import import_gl_transactions, copy_gl_transactions
+from budgeting.models import Scenario
+
+
+class Command(BaseCommand):
+    help = "Loads a GL/Ledger CSV file into GLTransaction (e.g. for the nightly load)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="Path to the GL CSV file.")
+        parser.add_argument(
+            '--method', choices=['orm', 'copy'], default='copy',
+            help="'copy' streams through a PostgreSQL staging table; 'orm' uses batched bulk_create.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
+        except Scenario.DoesNotExist:
+            raise CommandError("'ACTUAL' Scenario not defined.")
+
+        loader = copy_gl_transactions if options['method'] == 'copy' else import_gl_transactions
+        with open(options['csv_path'], 'rb') as fh:
+            try:
+                result = loader(File(fh), actual_scenario)
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
+
+        if result.error_count:
+            raise CommandError(
+                f"Load failed due to data errors ({result.error_count} errors found). Top 10 errors:\n"
+                + "\n".join(result.errors)
+            )
+        self.stdout.write(self.style.SUCCESS(f"Successfully imported {result.rows_inserted} GL transactions "
+                                             f"({result.rows_skipped} already in the ledger were skipped)."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from budgeting.cube import rebuild_rollups, refresh_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the cube rollups of every (scenario, fiscal year) whose FinancialRecords "
+        "changed since they were last built."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help="Rebuild the rollups of every scenario and fiscal year from scratch.")
+
+    def handle(self, *args, **options):
+        pairs = rebuild_rollups() if options['all'] else refresh_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Rollups refreshed for {len(pairs)} scenario/fiscal year pair(s)."))
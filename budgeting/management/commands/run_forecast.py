@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from budgeting.forecasting import DEFAULT_HISTORY_MONTHS, FORECAST_METHODS, run_forecast
+from budgeting.models import Scenario
+
+
+class Command(BaseCommand):
+    help = "Forecasts the months after the actual cutoff for every slice and writes them to the FORECAST scenario."
+
+    def add_arguments(self, parser):
+        parser.add_argument('fiscal_year', type=int)
+        parser.add_argument('cutoff_month', type=int, help="Last month with actuals (1-12).")
+        parser.add_argument('cutoff_year', type=int, help="Calendar year of the last month with actuals.")
+        parser.add_argument('--method', choices=sorted(FORECAST_METHODS), default='run_rate')
+        parser.add_argument('--scenario', default='FORECAST', help="Scenario to write the forecast to.")
+        parser.add_argument('--history-months', type=int, default=DEFAULT_HISTORY_MONTHS,
+                            help="Months of ACTUAL history loaded for each slice.")
+        parser.add_argument('--window', type=int,
+                            help="Window in months for trailing_average and linear_trend.")
+
+    def handle(self, *args, **options):
+        params = {}
+        if options['window']:
+            params['window'] = options['window']
+        try:
+            created, updated = run_forecast(
+                options['fiscal_year'], options['cutoff_month'], options['cutoff_year'],
+                method=options['method'],
+                forecast_scenario_name=options['scenario'],
+                history_months=options['history_months'],
+                **params,
+            )
+        except (ValueError, TypeError, Scenario.DoesNotExist) as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(f"FORECAST records: {created} created, {updated} updated."))
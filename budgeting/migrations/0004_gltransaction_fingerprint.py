@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:53
+
+from django.db import migrations, models
+
+# Fingerprints existing ledger rows with the same expressions as
+# budgeting.importers.gl_fingerprint and occurrence_fingerprint. Where the
+# ledger already holds identical rows, the oldest copy gets the content hash
+# and the later copies are numbered, so the unique index can be created.
+BACKFILL_FINGERPRINTS_SQL = """
+UPDATE budgeting_gltransaction AS t
+SET fingerprint = CASE WHEN f.occurrence = 1 THEN f.fingerprint ELSE md5(f.fingerprint || '|' || f.occurrence) END
+FROM (
+    SELECT id, fingerprint,
+           ROW_NUMBER() OVER (PARTITION BY fingerprint ORDER BY id) AS occurrence
+    FROM (
+        SELECT id,
+               md5(concat_ws('|',
+                   to_char(transaction_date, 'YYYY-MM-DD'),
+                   account_id, fund_id, department_id, state_id, sector_id,
+                   transaction_amount, description
+               )) AS fingerprint
+        FROM budgeting_gltransaction
+    ) AS hashed
+) AS f
+WHERE t.id = f.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0003_datedimension_alter_state_options_remove_account_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gltransaction',
+            name='fingerprint',
+            field=models.CharField(editable=False, max_length=32, null=True, verbose_name='Row Fingerprint'),
+        ),
+        migrations.RunSQL(BACKFILL_FINGERPRINTS_SQL, reverse_sql=migrations.RunSQL.noop),
+        migrations.AlterField(
+            model_name='gltransaction',
+            name='fingerprint',
+            field=models.CharField(editable=False, max_length=32, null=True, unique=True, verbose_name='Row Fingerprint'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_fiscal_attributes(apps, schema_editor):
+    """Derives the fiscal attributes of existing dates, one UPDATE per calendar month."""
+    DateDimension = apps.get_model('budgeting', 'DateDimension')
+    start_month = settings.FISCAL_YEAR_START_MONTH
+    for month in range(1, 13):
+        fiscal_month = (month - start_month) % 12 + 1
+        DateDimension.objects.filter(month=month).update(
+            fiscal_year=F('year') - (0 if month >= start_month else 1),
+            fiscal_month=fiscal_month,
+            fiscal_quarter=(fiscal_month - 1) // 3 + 1,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0004_gltransaction_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datedimension',
+            name='fiscal_year',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Fiscal Year'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='datedimension',
+            name='fiscal_month',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Fiscal Period'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='datedimension',
+            name='fiscal_quarter',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Fiscal Quarter'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_fiscal_attributes, migrations.RunPython.noop),
+    ]
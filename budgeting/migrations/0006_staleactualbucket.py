@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:08
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0005_datedimension_fiscal_attributes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleActualBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Calendar Year')),
+                ('month', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)], verbose_name='Month')),
+                ('marked_at', models.DateTimeField(auto_now=True, verbose_name='Marked At')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budgeting.account')),
+                ('fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budgeting.fund')),
+                ('sector', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budgeting.sector')),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budgeting.state')),
+            ],
+            options={
+                'verbose_name': 'Stale ACTUAL Bucket',
+                'verbose_name_plural': 'Stale ACTUAL Buckets',
+                'unique_together': {('account', 'fund', 'state', 'sector', 'year', 'month')},
+            },
+        ),
+    ]
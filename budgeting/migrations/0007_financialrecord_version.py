@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0006_staleactualbucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialrecord',
+            name='version',
+            field=models.PositiveIntegerField(db_default=1, default=1, editable=False, verbose_name='Version'),
+        ),
+    ]
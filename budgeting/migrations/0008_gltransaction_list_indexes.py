@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0007_financialrecord_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gltransaction',
+            index=models.Index(fields=['-transaction_date', '-id'], name='gltxn_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gltransaction',
+            index=models.Index(fields=['fund', '-transaction_date', '-id'], name='gltxn_fund_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0008_gltransaction_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('account_name', config='simple'), name='account_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gltransaction',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('description', config='simple'), name='gltxn_description_search_idx'),
+        ),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:27
+
+from datetime import date
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = 'budgeting_gltransaction'
+
+
+def _fiscal_year(day):
+    start_month = settings.FISCAL_YEAR_START_MONTH
+    return day.year if day.month >= start_month else day.year - 1
+
+
+def _rebuild_ledger(schema_editor, partitioned):
+    """
+    Rebuilds the GL ledger as a table range-partitioned by fiscal year on
+    transaction_date (or back to a plain table). The rows are copied into a
+    new table, the old one is dropped, and every index and constraint is
+    recreated under its existing name; on a partitioned table the primary
+    key has to include the partition key, so it becomes (id, transaction_date).
+    Partitions are created for every fiscal year holding rows through the
+    next fiscal year; later years are added by budgeting.partitions.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    qn = schema_editor.quote_name
+    rebuilt = f'{TABLE}_rebuild'
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass)",
+            [TABLE, TABLE],
+        )
+        index_sql = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'c') ORDER BY contype DESC",
+            [TABLE],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(f"SELECT MIN(transaction_date), MAX(transaction_date) FROM {qn(TABLE)}")
+        first_date, last_date = cursor.fetchone()
+
+    schema_editor.execute(
+        f"CREATE TABLE {qn(rebuilt)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE)"
+        + (" PARTITION BY RANGE (transaction_date)" if partitioned else "")
+    )
+    if partitioned:
+        next_year = _fiscal_year(date.today()) + 1
+        first_year = min(_fiscal_year(first_date), next_year) if first_date else next_year - 1
+        last_year = max(_fiscal_year(last_date), next_year) if last_date else next_year
+        for fiscal_year in range(first_year, last_year + 1):
+            schema_editor.execute(
+                f"CREATE TABLE {qn(f'{TABLE}_fy{fiscal_year}')} PARTITION OF {qn(rebuilt)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [date(fiscal_year, settings.FISCAL_YEAR_START_MONTH, 1),
+                 date(fiscal_year + 1, settings.FISCAL_YEAR_START_MONTH, 1)],
+            )
+    schema_editor.execute(f"INSERT INTO {qn(rebuilt)} SELECT * FROM {qn(TABLE)}")
+    schema_editor.execute(f"DROP TABLE {qn(TABLE)}")
+    schema_editor.execute(f"ALTER TABLE {qn(rebuilt)} RENAME TO {qn(TABLE)}")
+    # LIKE ... INCLUDING IDENTITY gives the new table its own sequence.
+    schema_editor.execute(f"ALTER SEQUENCE {qn(f'{rebuilt}_id_seq')} RENAME TO {qn(f'{TABLE}_id_seq')}")
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {qn(TABLE)}",
+        [TABLE],
+    )
+
+    for name, kind, definition in constraints:
+        if kind == 'p':
+            definition = 'PRIMARY KEY (id, transaction_date)' if partitioned else 'PRIMARY KEY (id)'
+        schema_editor.execute(f"ALTER TABLE {qn(TABLE)} ADD CONSTRAINT {qn(name)} {definition}")
+    for sql in index_sql:
+        schema_editor.execute(sql)
+    schema_editor.execute(f"ANALYZE {qn(TABLE)}")
+
+
+def partition_ledger(apps, schema_editor):
+    _rebuild_ledger(schema_editor, partitioned=True)
+
+
+def unpartition_ledger(apps, schema_editor):
+    _rebuild_ledger(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0010_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='gltransaction',
+            name='fingerprint',
+            field=models.CharField(editable=False, max_length=32, null=True, verbose_name='Row Fingerprint'),
+        ),
+        migrations.AddIndex(
+            model_name='gltransaction',
+            index=models.Index(fields=['scenario', 'transaction_date'], include=('account', 'fund', 'state', 'sector', 'transaction_amount'), name='gltxn_scenario_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gltransaction',
+            index=models.Index(fields=['account', 'fund', 'state', 'sector', 'transaction_date'], name='gltxn_slice_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gltransaction',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['transaction_date'], name='gltxn_date_brin_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='gltransaction',
+            constraint=models.UniqueConstraint(fields=('fingerprint', 'transaction_date'), name='gltxn_fingerprint_date_uniq'),
+        ),
+        migrations.RunPython(partition_ledger, unpartition_ledger),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Same statement as budgeting.hierarchy.REBUILD_CLOSURE_SQL.
+BACKFILL_CLOSURE_SQL = """
+WITH RECURSIVE tree (ancestor_id, descendant_id, depth, path) AS (
+    SELECT account_key, account_key, 0, ARRAY[account_key]
+    FROM budgeting_account
+    UNION ALL
+    SELECT tree.ancestor_id, child.account_key, tree.depth + 1, tree.path || child.account_key
+    FROM tree
+    JOIN budgeting_account AS child ON child.parent_account_id = tree.descendant_id
+    WHERE child.account_key <> ALL(tree.path)
+)
+INSERT INTO budgeting_accountclosure (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, depth FROM tree;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0011_gltransaction_partitioning'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField(verbose_name='Depth')),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='budgeting.account', verbose_name='Ancestor')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='budgeting.account', verbose_name='Descendant')),
+            ],
+            options={
+                'verbose_name': 'Account Closure',
+                'verbose_name_plural': 'Account Closures',
+                'indexes': [models.Index(fields=['descendant', 'ancestor', 'depth'], name='account_closure_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='account_closure_uniq')],
+            },
+        ),
+        migrations.RunSQL(BACKFILL_CLOSURE_SQL, migrations.RunSQL.noop),
+    ]
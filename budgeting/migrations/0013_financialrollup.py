@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Marks every (scenario, fiscal year) with records stale, so the rollups are
+# built by the next `manage.py refresh_rollups`.
+MARK_ALL_STALE_SQL = """
+INSERT INTO budgeting_stalerollup (scenario_id, fiscal_year, marked_at)
+SELECT DISTINCT scenario_id, year, NOW() FROM budgeting_financialrecord;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('budgeting', '0012_accountclosure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grain', models.CharField(max_length=50, verbose_name='Grain')),
+                ('fiscal_year', models.IntegerField(verbose_name='Fiscal Year')),
+                ('fiscal_quarter', models.PositiveSmallIntegerField(null=True, verbose_name='Fiscal Quarter')),
+                ('fiscal_period', models.PositiveSmallIntegerField(null=True, verbose_name='Fiscal Period')),
+                ('account_type', models.CharField(max_length=20, null=True, verbose_name='Account Type')),
+                ('account_level_1', models.CharField(max_length=50, null=True, verbose_name='Level 1')),
+                ('account_level_2', models.CharField(max_length=50, null=True, verbose_name='Level 2')),
+                ('account_level_3', models.CharField(max_length=50, null=True, verbose_name='Level 3')),
+                ('account_level_4', models.CharField(max_length=50, null=True, verbose_name='Level 4')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=20, verbose_name='Value')),
+                ('record_count', models.PositiveIntegerField(verbose_name='Record Count')),
+            ],
+            options={
+                'verbose_name': 'Financial Rollup',
+                'verbose_name_plural': 'Financial Rollups',
+            },
+        ),
+        migrations.CreateModel(
+            name='StaleRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fiscal_year', models.IntegerField(verbose_name='Fiscal Year')),
+                ('marked_at', models.DateTimeField(auto_now=True, verbose_name='Marked At')),
+            ],
+            options={
+                'verbose_name': 'Stale Rollup',
+                'verbose_name_plural': 'Stale Rollups',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='financialrecord',
+            index=models.Index(fields=['scenario', 'year'], name='finrec_scenario_year_idx'),
+        ),
+        migrations.AddField(
+            model_name='financialrollup',
+            name='fund',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='budgeting.fund', verbose_name='Fund'),
+        ),
+        migrations.AddField(
+            model_name='financialrollup',
+            name='fund_category',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='budgeting.fundcategory', verbose_name='Fund Category'),
+        ),
+        migrations.AddField(
+            model_name='financialrollup',
+            name='region',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='budgeting.region', verbose_name='Region'),
+        ),
+        migrations.AddField(
+            model_name='financialrollup',
+            name='scenario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budgeting.scenario', verbose_name='Scenario'),
+        ),
+        migrations.AddField(
+            model_name='financialrollup',
+            name='sector',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='budgeting.sector', verbose_name='Sector'),
+        ),
+        migrations.AddField(
+            model_name='financialrollup',
+            name='state',
+            field=models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='budgeting.state', verbose_name='State'),
+        ),
+        migrations.AddField(
+            model_name='stalerollup',
+            name='scenario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='budgeting.scenario'),
+        ),
+        migrations.AddIndex(
+            model_name='financialrollup',
+            index=models.Index(fields=['grain', 'scenario', 'fiscal_year'], name='finrollup_grain_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stalerollup',
+            unique_together={('scenario', 'fiscal_year')},
+        ),
+        migrations.RunSQL(MARK_ALL_STALE_SQL, migrations.RunSQL.noop),
+    ]
@@ -1,4 +1,9 @@
+from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser # Import for custom user
@@ -136,10 +141,47 @@ class Account(models.Model):
         verbose_name = _("Account (Chart of Account)")
         verbose_name_plural = _("Accounts (Chart of Accounts)")
         ordering = ['account_code']
+        indexes = [
+            # Full-text search; must match budgeting.search.ACCOUNT_NAME_VECTOR.
+            GinIndex(SearchVector('account_name', config='simple'), name='account_name_search_idx'),
+        ]
+
+    def clean(self):
+        super().clean()
+        if self.parent_account_id and self.pk and AccountClosure.objects.filter(
+                ancestor_id=self.pk, descendant_id=self.parent_account_id).exists():
+            raise ValidationError({'parent_account': _("An account cannot be placed under itself or one of its sub-accounts.")})
 
     def __str__(self):
         return f"{self.account_code} - {self.account_name}"
 
+class AccountClosure(models.Model):
+    """
+    Closure table of the account hierarchy: one row for every (ancestor,
+    descendant) pair, including each account paired with itself at depth 0.
+    Kept in step with `parent_account` by budgeting.hierarchy, so the records
+    under any account are a single indexed join.
+    """
+    ancestor = models.ForeignKey(Account, on_delete=models.CASCADE, to_field='account_key',
+                                 related_name='descendant_links', verbose_name=_("Ancestor"))
+    descendant = models.ForeignKey(Account, on_delete=models.CASCADE, to_field='account_key',
+                                   related_name='ancestor_links', verbose_name=_("Descendant"))
+    depth = models.PositiveSmallIntegerField(verbose_name=_("Depth"))
+
+    class Meta:
+        verbose_name = _("Account Closure")
+        verbose_name_plural = _("Account Closures")
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='account_closure_uniq'),
+        ]
+        indexes = [
+            # Ancestors of an account, and roll-ups joining from the fact tables.
+            models.Index(fields=['descendant', 'ancestor', 'depth'], name='account_closure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
+
 class DateDimension(models.Model):
     """A standard date dimension table for slicing and dicing data by time."""
     full_date = models.DateField(primary_key=True, verbose_name=_("Full Date"))
@@ -152,13 +194,26 @@ class DateDimension(models.Model):
     quarter_name = models.CharField(max_length=10, verbose_name=_("Quarter Name"))
     year = models.PositiveSmallIntegerField(verbose_name=_("Year"))
     year_month = models.CharField(max_length=7, verbose_name=_("Year-Month (YYYY-MM)")) # e.g., 2024-01
-    year_quarter = models.CharField(max_length=6, verbose_name=_("Year-Quarter (YYYY-Q#)")) # e.g., 2024-Q1
+    year_quarter = models.CharField(max_length=7, verbose_name=_("Year-Quarter (YYYY-Q#)")) # e.g., 2024-Q1
+    # Fiscal attributes, derived from month/year and settings.FISCAL_YEAR_START_MONTH.
+    # The fiscal year is labelled by the calendar year in which it starts.
+    fiscal_year = models.PositiveSmallIntegerField(editable=False, verbose_name=_("Fiscal Year"))
+    fiscal_month = models.PositiveSmallIntegerField(editable=False, verbose_name=_("Fiscal Period"))
+    fiscal_quarter = models.PositiveSmallIntegerField(editable=False, verbose_name=_("Fiscal Quarter"))
 
     class Meta:
         verbose_name = _("Date Dimension")
         verbose_name_plural = _("Date Dimensions")
         ordering = ['full_date']
 
+    def save(self, *args, **kwargs):
+        month, year = int(self.month), int(self.year)
+        start_month = settings.FISCAL_YEAR_START_MONTH
+        self.fiscal_year = year if month >= start_month else year - 1
+        self.fiscal_month = (month - start_month) % 12 + 1
+        self.fiscal_quarter = (self.fiscal_month - 1) // 3 + 1
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.full_date.strftime('%Y-%m-%d')
 
@@ -198,10 +253,37 @@ class GLTransaction(models.Model):
     description = models.CharField(max_length=255, verbose_name=_("Description"))
     transaction_amount = models.DecimalField(max_digits=18, decimal_places=2, default=0.00, verbose_name=_("Transaction Amount"))
     balance = models.DecimalField(max_digits=18, decimal_places=2, default=0.00, verbose_name=_("Running Balance"))
+    # MD5 of the row content (see budgeting.importers.gl_fingerprint). The unique
+    # index lets re-imports skip rows that are already in the ledger; it includes
+    # transaction_date (already part of the hash) because the table is partitioned on it.
+    fingerprint = models.CharField(max_length=32, null=True, editable=False, verbose_name=_("Row Fingerprint"))
 
     class Meta:
+        # On PostgreSQL the table is range-partitioned by fiscal year on
+        # transaction_date, with the primary key (id, transaction_date); see
+        # migration 0011 and budgeting.partitions.
         verbose_name = _("GL Transaction")
         verbose_name_plural = _("GL Transactions")
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'transaction_date'], name='gltxn_fingerprint_date_uniq'),
+        ]
+        indexes = [
+            # ACTUAL aggregation: one scenario over a date range, grouped by slice.
+            # The included columns let it run as an index-only scan.
+            models.Index(
+                fields=['scenario', 'transaction_date'], name='gltxn_scenario_date_idx',
+                include=['account', 'fund', 'state', 'sector', 'transaction_amount'],
+            ),
+            # Incremental aggregation: one slice over one month.
+            models.Index(fields=['account', 'fund', 'state', 'sector', 'transaction_date'], name='gltxn_slice_date_idx'),
+            # Date-range scans within a partition; tiny because rows arrive roughly in date order.
+            BrinIndex(fields=['transaction_date'], name='gltxn_date_brin_idx'),
+            # Keyset pagination of the transaction list, newest first.
+            models.Index(fields=['-transaction_date', '-id'], name='gltxn_date_id_idx'),
+            models.Index(fields=['fund', '-transaction_date', '-id'], name='gltxn_fund_date_id_idx'),
+            # Full-text search; must match budgeting.search.DESCRIPTION_VECTOR.
+            GinIndex(SearchVector('description', config='simple'), name='gltxn_description_search_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.transaction_date}] {self.account.account_code}: {self.transaction_amount}"
@@ -217,12 +299,132 @@ class FinancialRecord(models.Model):
     is_editable = models.BooleanField(default=False, verbose_name=_("Is Editable Forecast"))
     state = models.ForeignKey(State, on_delete=models.PROTECT, null=True, blank=True, verbose_name=_("State"))
     sector = models.ForeignKey(Sector, on_delete=models.PROTECT, null=True, blank=True, verbose_name=_("Sector"))
+    # Bumped on every change to `value`; edits carry the version they were made against.
+    version = models.PositiveIntegerField(default=1, db_default=1, editable=False, verbose_name=_("Version"))
 
     class Meta:
         verbose_name = _("Monthly Financial Record")
         verbose_name_plural = _("Monthly Financial Records")
         unique_together = ('account', 'fund', 'year', 'month', 'scenario', 'state', 'sector')
         ordering = ['year', 'month']
+        indexes = [
+            # Per-scenario fiscal-year scans: statements and rollup refreshes.
+            models.Index(fields=['scenario', 'year'], name='finrec_scenario_year_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fund.fund_name} | {self.account.account_code} | {self.year}-{self.month} ({self.scenario.scenario_name})"
+
+class StaleActualBucket(models.Model):
+    """
+    A (slice, calendar month) whose GL rows changed since ACTUAL FinancialRecords
+    were last aggregated. Importers mark buckets as they insert GL rows, and
+    `aggregate_changed_actuals` recomputes and clears only these buckets.
+    """
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, to_field='account_key', related_name='+')
+    fund = models.ForeignKey(Fund, on_delete=models.CASCADE, related_name='+')
+    state = models.ForeignKey(State, on_delete=models.CASCADE, related_name='+')
+    sector = models.ForeignKey(Sector, on_delete=models.CASCADE, related_name='+')
+    year = models.IntegerField(verbose_name=_("Calendar Year"))
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)], verbose_name=_("Month"))
+    marked_at = models.DateTimeField(auto_now=True, verbose_name=_("Marked At"))
+
+    class Meta:
+        verbose_name = _("Stale ACTUAL Bucket")
+        verbose_name_plural = _("Stale ACTUAL Buckets")
+        unique_together = ('account', 'fund', 'state', 'sector', 'year', 'month')
+
+    def __str__(self):
+        return f"{self.account_id}/{self.fund_id}/{self.state_id}/{self.sector_id} {self.year}-{self.month}"
+
+class FinancialRollup(models.Model):
+    """
+    Pre-aggregated FinancialRecord totals for the cube API (budgeting.cube).
+    Every rollup ("grain") in budgeting.cube.ROLLUPS stores its rows here,
+    with the dimensions outside the grain left NULL. Rows are rebuilt per
+    (scenario, fiscal year) whenever that part of the fact table changes.
+    """
+    grain = models.CharField(max_length=50, verbose_name=_("Grain"))
+    scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE, related_name='+', verbose_name=_("Scenario"))
+    fiscal_year = models.IntegerField(verbose_name=_("Fiscal Year"))
+    fiscal_quarter = models.PositiveSmallIntegerField(null=True, verbose_name=_("Fiscal Quarter"))
+    fiscal_period = models.PositiveSmallIntegerField(null=True, verbose_name=_("Fiscal Period"))
+    # Dimension keys are not enforced: the table is derived data, rebuilt from FinancialRecord.
+    fund_category = models.ForeignKey(FundCategory, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                                      related_name='+', verbose_name=_("Fund Category"))
+    fund = models.ForeignKey(Fund, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                             related_name='+', verbose_name=_("Fund"))
+    region = models.ForeignKey(Region, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                               related_name='+', verbose_name=_("Region"))
+    state = models.ForeignKey(State, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                              related_name='+', verbose_name=_("State"))
+    sector = models.ForeignKey(Sector, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                               related_name='+', verbose_name=_("Sector"))
+    account_type = models.CharField(max_length=20, null=True, verbose_name=_("Account Type"))
+    account_level_1 = models.CharField(max_length=50, null=True, verbose_name=_("Level 1"))
+    account_level_2 = models.CharField(max_length=50, null=True, verbose_name=_("Level 2"))
+    account_level_3 = models.CharField(max_length=50, null=True, verbose_name=_("Level 3"))
+    account_level_4 = models.CharField(max_length=50, null=True, verbose_name=_("Level 4"))
+    value = models.DecimalField(max_digits=20, decimal_places=2, verbose_name=_("Value"))
+    record_count = models.PositiveIntegerField(verbose_name=_("Record Count"))
+
+    class Meta:
+        verbose_name = _("Financial Rollup")
+        verbose_name_plural = _("Financial Rollups")
+        indexes = [
+            models.Index(fields=['grain', 'scenario', 'fiscal_year'], name='finrollup_grain_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.grain} {self.scenario_id}/{self.fiscal_year}: {self.value}"
+
+class StaleRollup(models.Model):
+    """
+    A (scenario, fiscal year) whose FinancialRecords changed since its rollups
+    were last built. Single-record writes mark it; budgeting.cube.refresh_rollups
+    rebuilds and clears it.
+    """
+    scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE, related_name='+')
+    fiscal_year = models.IntegerField(verbose_name=_("Fiscal Year"))
+    marked_at = models.DateTimeField(auto_now=True, verbose_name=_("Marked At"))
+
+    class Meta:
+        verbose_name = _("Stale Rollup")
+        verbose_name_plural = _("Stale Rollups")
+        unique_together = ('scenario', 'fiscal_year')
+
+    def __str__(self):
+        return f"{self.scenario_id}/{self.fiscal_year}"
+
+class DataVersion(models.Model):
+    """
+    A named counter that moves whenever the data behind it changes (see
+    budgeting.data_versions). Cached lookups and reports put the version in
+    their cache key; keeping the counters in the database means every
+    process sees the same versions, whatever cache backend is configured.
+    """
+    name = models.CharField(max_length=100, primary_key=True, verbose_name=_("Name"))
+    version = models.PositiveBigIntegerField(default=1, verbose_name=_("Version"))
+
+    class Meta:
+        verbose_name = _("Data Version")
+        verbose_name_plural = _("Data Versions")
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class DashboardSnapshot(models.Model):
+    """
+    Pre-computed dashboard KPIs. Refreshed after GL imports and aggregation
+    (see budgeting.dashboard) so the home page reads a single row.
+    """
+    key = models.CharField(max_length=50, unique=True, verbose_name=_("Snapshot Key"))
+    data = models.JSONField(encoder=DjangoJSONEncoder, default=dict, verbose_name=_("KPI Data"))
+    refreshed_at = models.DateTimeField(auto_now=True, verbose_name=_("Refreshed At"))
+
+    class Meta:
+        verbose_name = _("Dashboard Snapshot")
+        verbose_name_plural = _("Dashboard Snapshots")
 
     def __str__(self):
-        return f"{self.fund.fund_name} | {self.account.account_code} | {self.year}-{self.month} ({self.scenario.scenario_name})"
\ No newline at end of file
+        return f"{self.key} ({self.refreshed_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,107 @@
+import json
+
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.db import connection
+from django.db.models import Q
+
+CURSOR_SEPARATOR = '_'
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, with cursors for its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def encode_cursor(obj, keys):
+    return CURSOR_SEPARATOR.join(str(getattr(obj, key)) for key in keys)
+
+
+def decode_cursor(model, cursor, keys):
+    """Turns a cursor back into key values; raises ValueError if it is malformed."""
+    parts = cursor.split(CURSOR_SEPARATOR)
+    if len(parts) != len(keys):
+        raise ValueError("Invalid cursor.")
+    try:
+        return [model._meta.get_field(key).to_python(part) for key, part in zip(keys, parts)]
+    except ValidationError as e:
+        raise ValueError("Invalid cursor.") from e
+
+
+def _beyond(keys, values, lookup):
+    """
+    Builds the row-value comparison (k1, k2, ...) < (v1, v2, ...) as
+    k1 <= v1 AND (k1 < v1 OR (k1 = v1 AND k2 < v2 ...)). The leading
+    inclusive bound lets the database range-scan the composite index.
+    """
+    condition = Q(**{f'{keys[-1]}__{lookup}': values[-1]})
+    for key, value in zip(reversed(keys[:-1]), reversed(values[:-1])):
+        condition = Q(**{f'{key}__{lookup}': value}) | (Q(**{key: value}) & condition)
+    return Q(**{f'{keys[0]}__{lookup}e': values[0]}) & condition
+
+
+def paginate_by_keyset(queryset, keys, per_page, after=None, before=None):
+    """
+    Returns a KeysetPage of `queryset` ordered by `keys` descending.
+
+    Pages are addressed by the keys of the row they follow (`after`) or
+    precede (`before`) rather than by OFFSET, so every page costs one index
+    range scan of per_page + 1 rows no matter how deep it is. `keys` must be
+    unique together and backed by a composite index.
+    """
+    model = queryset.model
+    descending = [f'-{key}' for key in keys]
+    if before:
+        values = decode_cursor(model, before, keys)
+        rows = list(queryset.filter(_beyond(keys, values, 'gt')).order_by(*keys)[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        previous_cursor = encode_cursor(rows[0], keys) if has_more else None
+        next_cursor = encode_cursor(rows[-1], keys) if rows else None
+    else:
+        if after:
+            queryset = queryset.filter(_beyond(keys, decode_cursor(model, after, keys), 'lt'))
+        rows = list(queryset.order_by(*descending)[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1], keys) if has_more else None
+        previous_cursor = encode_cursor(rows[0], keys) if after and rows else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def estimate_count(queryset):
+    """
+    Returns the planner's row estimate for `queryset` instead of running
+    COUNT(*). Unfiltered tables are estimated from pg_class statistics, so
+    the figure is only as fresh as the last ANALYZE. Other databases fall
+    back to an exact count.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
@@ -0,0 +1,69 @@
+from datetime import date
+
+from django.db import connection
+
+from .models import GLTransaction
+from .utils import FISCAL_START_MONTH, get_current_fiscal_year
+
+# On PostgreSQL the GL ledger is range-partitioned on transaction_date with one
+# partition per fiscal year (see migration 0011), so fiscal-year scans only
+# read the partitions they need. Rows can only be inserted once the partition
+# for their fiscal year exists; the importers call ensure_gl_partitions first.
+
+
+def gl_partition_name(fiscal_year):
+    return f'{GLTransaction._meta.db_table}_fy{fiscal_year}'
+
+
+def fiscal_year_bounds(fiscal_year):
+    """Returns the [start, end) dates of a fiscal year."""
+    return date(fiscal_year, FISCAL_START_MONTH, 1), date(fiscal_year + 1, FISCAL_START_MONTH, 1)
+
+
+def get_gl_partitions():
+    """
+    Returns the names of the ledger's partitions, or None when the ledger is
+    not a partitioned table (non-PostgreSQL databases, or migration 0011 not
+    applied).
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT p.relkind, c.relname FROM pg_class p "
+            "LEFT JOIN pg_inherits i ON i.inhparent = p.oid "
+            "LEFT JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE p.oid = %s::regclass",
+            [GLTransaction._meta.db_table],
+        )
+        rows = cursor.fetchall()
+    if not rows or rows[0][0] != 'p':
+        return None
+    return {name for _, name in rows if name}
+
+
+def ensure_gl_partitions(first_date, last_date):
+    """
+    Creates the missing fiscal-year partitions covering first_date..last_date.
+    Does nothing when the ledger is not partitioned. Returns the names of the
+    partitions created.
+    """
+    existing = get_gl_partitions()
+    if existing is None:
+        return []
+
+    qn = connection.ops.quote_name
+    created = []
+    with connection.cursor() as cursor:
+        for fiscal_year in range(get_current_fiscal_year(first_date), get_current_fiscal_year(last_date) + 1):
+            name = gl_partition_name(fiscal_year)
+            if name in existing:
+                continue
+            start, end = fiscal_year_bounds(fiscal_year)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(GLTransaction._meta.db_table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+            created.append(name)
+    return created
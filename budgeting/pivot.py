@@ -0,0 +1,178 @@
+import calendar
+
+import numpy as np
+from django.db.models import Count, Max, Min, Q, Sum
+
+from .dimension_cache import get_dimension_labels, get_dimension_map
+from .models import Account, FinancialRecord
+from .utils import get_fiscal_months
+
+
+class PivotGrid:
+    """
+    Account x fund by fiscal month grid for one fiscal year.
+
+    Cells are held in (rows x months) NumPy arrays instead of one object or
+    dict per cell.
+    """
+
+    def __init__(self, columns, accounts, fund_names, row_keys, values, record_ids, versions, editable, present,
+                 offset=0, total_rows=None):
+        self.columns = columns
+        self.accounts = accounts
+        self.fund_names = fund_names
+        self.row_keys = row_keys
+        self.values = values
+        self.record_ids = record_ids
+        self.versions = versions
+        self.editable = editable
+        self.present = present
+        self.offset = offset
+        self.total_rows = len(row_keys) if total_rows is None else total_rows
+
+    def __len__(self):
+        return len(self.row_keys)
+
+    def to_columnar(self):
+        """
+        Serialises the grid for the JSON grid API. Row attributes are parallel
+        lists and the cells are (rows x months) lists, so the payload does not
+        repeat a key for every cell.
+        """
+        accounts = [self.accounts[account_id] for account_id, _ in self.row_keys]
+        return {
+            'offset': self.offset,
+            'total_rows': self.total_rows,
+            'columns': self.columns,
+            'rows': {
+                'account_id': [account.pk for account in accounts],
+                'account_code': [account.account_code for account in accounts],
+                'account_name': [account.account_name for account in accounts],
+                'fund_id': [fund_id for _, fund_id in self.row_keys],
+                'fund_name': [self.fund_names[fund_id] for _, fund_id in self.row_keys],
+            },
+            'values': np.round(self.values, 2).tolist(),
+            'record_ids': self.record_ids.tolist(),
+            'versions': self.versions.tolist(),
+            'editable': self.editable.tolist(),
+            'present': self.present.tolist(),
+        }
+
+
+def fiscal_columns(fiscal_year, actual_cutoff_month, actual_cutoff_year):
+    """
+    Describes the fiscal months of the year in order. Months up to and
+    including the cutoff are ACTUAL, later months are FORECAST.
+    """
+    return [
+        {
+            'month': month,
+            'year': year,
+            'name': calendar.month_abbr[month],
+            'is_actual': (year, month) <= (actual_cutoff_year, actual_cutoff_month),
+        }
+        for month, year in get_fiscal_months(fiscal_year)
+    ]
+
+
+GRID_PAGE_SIZE = 200
+MAX_GRID_PAGE_SIZE = 1000
+
+GRID_FILTER_FIELDS = {
+    'fund': 'fund_id',
+    'state': 'state_id',
+    'sector': 'sector_id',
+    'level_1': 'account__hierarchy_level_1',
+    'level_2': 'account__hierarchy_level_2',
+    'level_3': 'account__hierarchy_level_3',
+    'level_4': 'account__hierarchy_level_4',
+}
+
+
+def build_pivot_grid(fiscal_year, actual_cutoff_month, actual_cutoff_year,
+                     actual_scenario_name='ACTUAL', forecast_scenario_name='FORECAST',
+                     filters=None, offset=0, limit=None):
+    """
+    Builds the Module 1 grid: ACTUAL months up to the cutoff, FORECAST months after it.
+
+    `filters` maps GRID_FILTER_FIELDS names to values. `offset`/`limit` select a
+    window of account x fund rows in display order; only the cells of that
+    window are aggregated. The grid costs the same handful of queries
+    whatever its size: the row window (plus a count when windowed), one
+    aggregate query for the cells and one for the accounts. Scenario and
+    fund names come from the dimension cache.
+
+    States and sectors are summed together. A cell keeps its record id, and
+    can be edited, only when it is backed by exactly one editable record.
+    """
+    columns = fiscal_columns(fiscal_year, actual_cutoff_month, actual_cutoff_year)
+    scenario_ids = get_dimension_map('scenario')
+    actual_months = [c['month'] for c in columns if c['is_actual']]
+    forecast_months = [c['month'] for c in columns if not c['is_actual']]
+
+    records = (
+        FinancialRecord.objects
+        .filter(year=fiscal_year)
+        .filter(
+            Q(scenario_id=scenario_ids.get(actual_scenario_name), month__in=actual_months)
+            | Q(scenario_id=scenario_ids.get(forecast_scenario_name), month__in=forecast_months)
+        )
+        .filter(**{GRID_FILTER_FIELDS[name]: value for name, value in (filters or {}).items()})
+    )
+
+    rows = (
+        records.values_list('account_id', 'fund_id')
+        .order_by('account__display_order', 'account__account_code', 'fund__fund_name')
+        .distinct()
+    )
+    if limit is None:
+        row_keys = [tuple(key) for key in rows[offset:]]
+        total_rows = offset + len(row_keys)
+    else:
+        row_keys = [tuple(key) for key in rows[offset:offset + limit]]
+        total_rows = rows.count() if row_keys or offset else 0
+
+    account_ids = {key[0] for key in row_keys}
+    fund_ids = {key[1] for key in row_keys}
+    if limit is not None:
+        records = records.filter(account_id__in=account_ids, fund_id__in=fund_ids)
+    cells = (
+        records
+        .values('account_id', 'fund_id', 'month')
+        .annotate(
+            total=Sum('value'),
+            records=Count('id'),
+            editable_records=Count('id', filter=Q(is_editable=True)),
+            record_id=Min('id'),
+            version=Max('version'),
+        )
+        .values_list('account_id', 'fund_id', 'month', 'total', 'records', 'editable_records', 'record_id', 'version')
+        .order_by()
+    )
+    row_index = {key: i for i, key in enumerate(row_keys)}
+    # The account/fund filter above is a cross product; drop pairs outside the window.
+    cells = [c for c in cells if (c[0], c[1]) in row_index]
+
+    accounts = Account.objects.only('account_key', 'account_code', 'account_name', 'display_order').in_bulk(account_ids)
+    fund_names = get_dimension_labels('fund')
+    column_index = {c['month']: i for i, c in enumerate(columns)}
+
+    shape = (len(row_keys), len(columns))
+    values = np.zeros(shape)
+    record_ids = np.zeros(shape, dtype=np.int64)
+    versions = np.zeros(shape, dtype=np.int64)
+    editable = np.zeros(shape, dtype=bool)
+    present = np.zeros(shape, dtype=bool)
+    if cells:
+        row_numbers = np.array([row_index[(c[0], c[1])] for c in cells])
+        cols = np.array([column_index[c[2]] for c in cells])
+        counts = np.array([c[4] for c in cells])
+        single = counts == 1
+        values[row_numbers, cols] = [float(c[3]) for c in cells]
+        present[row_numbers, cols] = True
+        record_ids[row_numbers, cols] = np.where(single, [c[6] for c in cells], 0)
+        versions[row_numbers, cols] = np.where(single, [c[7] for c in cells], 0)
+        editable[row_numbers, cols] = single & (np.array([c[5] for c in cells]) == 1)
+
+    return PivotGrid(columns, accounts, fund_names, row_keys, values, record_ids, versions, editable, present,
+                     offset=offset, total_rows=total_rows)
@@ -0,0 +1,51 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import Q
+
+from .models import Account
+
+# The 'simple' configuration neither stems nor drops stop words, which suits
+# ledger descriptions and account names (codes, abbreviations, names).
+SEARCH_CONFIG = 'simple'
+
+# These expressions must match the GIN expression indexes on GLTransaction
+# and Account exactly, or PostgreSQL will not use them.
+DESCRIPTION_VECTOR = SearchVector('description', config=SEARCH_CONFIG)
+ACCOUNT_NAME_VECTOR = SearchVector('account_name', config=SEARCH_CONFIG)
+
+
+def build_prefix_query(text):
+    """
+    Turns free text into a tsquery that matches rows containing every word,
+    the last one (and every other) as a prefix, so partial input still matches.
+    Returns None when the text has no searchable words.
+    """
+    words = re.findall(r'\w+', text.lower())
+    if not words:
+        return None
+    return SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config=SEARCH_CONFIG)
+
+
+def search_gl_transactions(queryset, text, ranked=False):
+    """
+    Filters GL transactions whose description or account name matches `text`.
+
+    Matching account keys are resolved first from the (small) Account table so
+    the ledger condition is two index lookups OR'ed together rather than a
+    join. With `ranked`, rows are annotated with `search_rank`.
+    """
+    query = build_prefix_query(text)
+    if query is None:
+        return queryset.none()
+
+    account_keys = list(
+        Account.objects.annotate(search=ACCOUNT_NAME_VECTOR).filter(search=query).values_list('account_key', flat=True)
+    )
+    queryset = queryset.annotate(search=DESCRIPTION_VECTOR).filter(Q(search=query) | Q(account_id__in=account_keys))
+    if ranked:
+        queryset = queryset.annotate(
+            search_rank=SearchRank(DESCRIPTION_VECTOR, query)
+            + SearchRank(SearchVector('account__account_name', config=SEARCH_CONFIG), query)
+        )
+    return queryset
@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+from .instrumentation import get_query_budget
+
+
+def _check_query_count(context, limit, label):
+    if len(context) > limit:
+        queries = '\n'.join(f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, 1))
+        raise AssertionError(f"{label}: {len(context)} queries executed, {limit} allowed:\n{queries}")
+
+
+@contextmanager
+def assert_max_queries(limit, using=DEFAULT_DB_ALIAS):
+    """
+    Fails with AssertionError when the block runs more than `limit` queries.
+    The captured queries are listed in the message.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    _check_query_count(context, limit, 'Block')
+
+
+def assert_within_query_budget(client, path, method='get', cold=False, **kwargs):
+    """
+    Requests `path` with the test client and fails if the view that served
+    it ran more queries than its declared @query_budget. With `cold`, the
+    request must rebuild cached data and is held to the cold budget;
+    otherwise it must be served from the caches. Returns the response.
+    """
+    with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as context:
+        response = getattr(client, method)(path, **kwargs)
+    match = response.resolver_match
+    budget = get_query_budget(match.func, cold=cold)
+    if budget is None:
+        raise AssertionError(f"{match.view_name} does not declare a query budget.")
+    if response.wsgi_request.cache_miss != cold:
+        state = "was served from the caches" if cold else "rebuilt cached data"
+        raise AssertionError(f"{match.view_name}: request {state}.")
+    _check_query_count(context, budget, f"{match.view_name} ({'cold' if cold else 'cached'})")
+    return response
@@ -1,3 +1,483 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock, skipIf
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from .cube import ROLLUPS, cube_query, rebuild_rollups, refresh_rollups
+from .exports import Workbook, write_xlsx
+from .forecasting import (
+    holt_winters, linear_trend, load_actual_matrix, run_forecast, run_rate, seasonal_naive, trailing_average,
+)
+from .hierarchy import get_subtree_totals, rebuild_account_closure
+from .importers import copy_gl_transactions, gl_fingerprint, import_gl_transactions, occurrence_fingerprint
+from .models import (
+    Account, AccountClosure, DashboardSnapshot, Department, FinancialRecord, Fund, FundCategory, GLTransaction,
+    Region, Scenario, Sector, StaleRollup, State,
+)
+from .testing import assert_max_queries, assert_within_query_budget
+from .utils import FISCAL_START_MONTH
+from .variance import VARIANCE_GROUPINGS, compute_variance
+
+FISCAL_YEAR = 2030
+
+
+class DimensionsTestCase(TestCase):
+    """
+    Creates one of each dimension, the three scenarios and a staff user.
+    Cached dimension maps and results are cleared before each test: version
+    bumps run on commit, which never happens inside a TestCase.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('budget', password='budget', is_staff=True)
+        cls.actual, cls.budget, cls.forecast = (
+            Scenario.objects.create(scenario_name=name) for name in ('ACTUAL', 'BUDGET', 'FORECAST')
+        )
+        cls.fund_category = FundCategory.objects.create(category_name='Equity')
+        cls.fund = Fund.objects.create(fund_type='MUTUAL', fund_name='Growth Fund', fund_category=cls.fund_category)
+        cls.region = Region.objects.create(region_name='South West')
+        cls.state = State.objects.create(state_name='Lagos', region=cls.region)
+        cls.sector = Sector.objects.create(sector_name='Banking')
+        cls.department = Department.objects.create(department_name='Finance')
+        cls.revenue = Account.objects.create(
+            account_code='4000', account_name='Fee Income', account_type='REVENUE', statement_category='P&L',
+            hierarchy_level_1='Income')
+        cls.expense = Account.objects.create(
+            account_code='5000', account_name='Salaries', account_type='EXPENSE', statement_category='P&L',
+            hierarchy_level_1='Expenses')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_record(self, scenario, value, account=None, period=0, **kwargs):
+        """Creates a FinancialRecord in fiscal `period` (0-11) of FISCAL_YEAR."""
+        return FinancialRecord.objects.create(
+            account=account or self.revenue, fund=self.fund, year=FISCAL_YEAR,
+            month=(FISCAL_START_MONTH - 1 + period) % 12 + 1, scenario=scenario, value=Decimal(value), **kwargs)
+
+
+class GLFingerprintTests(SimpleTestCase):
+    values = {
+        'transaction_date': date(2030, 1, 15), 'account_id': 1, 'fund_id': 2, 'department_id': 3,
+        'state_id': 4, 'sector_id': 5, 'transaction_amount': Decimal('10.50'), 'description': 'Fees',
+    }
+
+    def test_fingerprint_depends_on_every_field(self):
+        fingerprint = gl_fingerprint(self.values)
+        self.assertEqual(gl_fingerprint(dict(self.values)), fingerprint)
+        for field, value in [('account_id', 9), ('transaction_amount', Decimal('10.51')), ('description', 'Fee')]:
+            with self.subTest(field=field):
+                self.assertNotEqual(gl_fingerprint(dict(self.values, **{field: value})), fingerprint)
+
+    def test_negative_zero_matches_zero(self):
+        self.assertEqual(gl_fingerprint(dict(self.values, transaction_amount=Decimal('-0.00'))),
+                         gl_fingerprint(dict(self.values, transaction_amount=Decimal('0.00'))))
+
+    def test_later_occurrences_get_their_own_fingerprint(self):
+        fingerprint = gl_fingerprint(self.values)
+        self.assertEqual(occurrence_fingerprint(fingerprint, 1), fingerprint)
+        repeats = {occurrence_fingerprint(fingerprint, n) for n in (2, 3)}
+        self.assertEqual(len(repeats), 2)
+        self.assertNotIn(fingerprint, repeats)
+
+
+class GLImportTests(DimensionsTestCase):
+    """Runs against both load paths: the batched ORM import and COPY."""
+
+    loaders = {'orm': import_gl_transactions, 'copy': copy_gl_transactions}
+
+    def gl_file(self, *lines):
+        rows = ['Date,Account Code,Fund Name,Department,State,Sector,Description,Amount']
+        rows += [f'{day},4000,Growth Fund,Finance,Lagos,Banking,Fees,{amount}' for day, amount in lines]
+        return ContentFile('\n'.join(rows).encode())
+
+    def load(self, loader, *lines, **kwargs):
+        result = self.loaders[loader](self.gl_file(*lines), self.actual, **kwargs)
+        self.assertEqual(result.error_count, 0, result.errors)
+        return result
+
+    def test_repeated_lines_are_kept_and_reimports_skipped(self):
+        lines = [('2030-01-15', '10.00')] * 3 + [('2030-02-01', '7.25')]
+        for loader in self.loaders:
+            with self.subTest(loader=loader):
+                GLTransaction.objects.all().delete()
+                result = self.load(loader, *lines, batch_size=2)
+                self.assertEqual((result.rows_inserted, result.rows_skipped), (4, 0))
+                result = self.load(loader, *lines, batch_size=2)
+                self.assertEqual((result.rows_inserted, result.rows_skipped), (0, 4))
+                # A fourth copy in a later file is a new posting.
+                result = self.load(loader, *[('2030-01-15', '10.00')] * 4)
+                self.assertEqual((result.rows_inserted, result.rows_skipped), (1, 3))
+                self.assertEqual(GLTransaction.objects.count(), 5)
+
+    def test_load_paths_share_fingerprints(self):
+        lines = [('2030-01-15', '10.00')] * 2 + [('2030-03-31', '-0.004')]
+        for first, second in [('orm', 'copy'), ('copy', 'orm')]:
+            with self.subTest(first=first, second=second):
+                GLTransaction.objects.all().delete()
+                self.assertEqual(self.load(first, *lines).rows_inserted, 3)
+                self.assertEqual(self.load(second, *lines).rows_inserted, 0)
+
+
+class ForecastMethodTests(SimpleTestCase):
+    def assert_forecast(self, forecast, expected):
+        np.testing.assert_allclose(forecast, np.array(expected, dtype=float))
+
+    def test_run_rate(self):
+        self.assert_forecast(run_rate(np.array([[1., 2, 3], [4, 5, 0]]), 2), [[3, 3], [0, 0]])
+
+    def test_trailing_average(self):
+        self.assert_forecast(trailing_average(np.array([[1., 2, 3, 7]]), 2), [[4, 4]])
+        self.assert_forecast(trailing_average(np.array([[1., 2, 3, 7]]), 1, window=2), [[5]])
+
+    def test_linear_trend(self):
+        # y = 1 + 2x fitted over x = 0..3, extended to x = 4, 5.
+        self.assert_forecast(linear_trend(np.array([[9., 1, 3, 5, 7]]), 2, window=4), [[9, 11]])
+
+    def test_seasonal_naive(self):
+        history = np.array([[1., 2, 3, 4, 5, 6, 7, 8]])
+        self.assert_forecast(seasonal_naive(history, 6, season_length=4), [[5, 6, 7, 8, 5, 6]])
+
+    def test_holt_winters(self):
+        # Level 2, trend 0.5 and seasonals (-1, 1) from the first two seasons,
+        # then four smoothing steps with alpha = beta = gamma = 0.5.
+        forecast = holt_winters(np.array([[1., 3, 2, 4]]), 2, alpha=0.5, beta=0.5, gamma=0.5, season_length=2)
+        self.assert_forecast(forecast, [[2.556640625, 4.724609375]])
+
+    def test_short_history_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "at least 24 months"):
+            holt_winters(np.zeros((1, 23)), 1)
+
+
+class RunForecastTests(DimensionsTestCase):
+    def setUp(self):
+        super().setUp()
+        for period, value in enumerate([10, 20, 30, 40, 50, 60]):
+            self.create_record(self.actual, value, period=period, state=self.state, sector=self.sector)
+            # No sector: its forecasts must still be updated rather than duplicated.
+            self.create_record(self.actual, value * 2, account=self.expense, period=period, state=self.state)
+        # The last month with actuals is fiscal period 5.
+        self.cutoff_month = (FISCAL_START_MONTH + 4) % 12 + 1
+        self.cutoff_year = FISCAL_YEAR + (self.cutoff_month < FISCAL_START_MONTH)
+
+    def forecasts(self, account):
+        return list(FinancialRecord.objects.filter(scenario=self.forecast, account=account)
+                    .order_by('year', 'month').values_list('value', 'version', 'is_editable'))
+
+    def test_creates_then_updates_the_rest_of_the_year(self):
+        created = run_forecast(FISCAL_YEAR, self.cutoff_month, self.cutoff_year, method='run_rate')
+        self.assertEqual(created, (12, 0))
+        self.assertEqual(self.forecasts(self.revenue), [(Decimal('60.00'), 1, True)] * 6)
+
+        updated = run_forecast(FISCAL_YEAR, self.cutoff_month, self.cutoff_year, method='trailing_average', window=3)
+        self.assertEqual(updated, (0, 12))
+        self.assertEqual(self.forecasts(self.revenue), [(Decimal('50.00'), 2, True)] * 6)
+        self.assertEqual(self.forecasts(self.expense), [(Decimal('100.00'), 2, True)] * 6)
+
+    def test_records_sharing_a_month_are_added_up(self):
+        self.create_record(self.actual, '100', period=5)
+        self.create_record(self.actual, '5', period=5)
+        first = FISCAL_YEAR * 12
+        slices, matrix = load_actual_matrix(first, first + 5)
+        self.assertEqual(matrix[slices.index((self.revenue.pk, self.fund.pk, None, None)), 5], 105)
+
+    def test_unknown_method_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Unknown forecast method"):
+            run_forecast(FISCAL_YEAR, self.cutoff_month, self.cutoff_year, method='magic')
+
+
+class UpdateForecastValuesTests(DimensionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.create_record(self.forecast, '100', period=10, is_editable=True)
+        self.second = self.create_record(self.forecast, '200', period=11, is_editable=True)
+        StaleRollup.objects.all().delete()
+
+    def post(self, *changes):
+        return self.client.post(
+            reverse('budgeting:update_forecast_values'),
+            data={'changes': [{'id': r.pk, 'value': value, 'version': version} for r, value, version in changes]},
+            content_type='application/json',
+        )
+
+    def assert_record(self, record, value, version):
+        record.refresh_from_db()
+        self.assertEqual((record.value, record.version), (Decimal(value), version))
+
+    def test_batch_is_saved_and_bumps_versions(self):
+        response = assert_within_query_budget(
+            self.client, reverse('budgeting:update_forecast_values'), method='post', content_type='application/json',
+            data={'changes': [{'id': self.first.pk, 'value': '110.555', 'version': 1},
+                              {'id': self.second.pk, 'value': 200, 'version': 1}]},
+        )
+        self.assertEqual(response.json()['status'], 'success')
+        self.assert_record(self.first, '110.56', 2)
+        # Unchanged values keep their version.
+        self.assert_record(self.second, '200', 1)
+        self.assertEqual(list(StaleRollup.objects.values_list('scenario_id', 'fiscal_year')),
+                         [(self.forecast.pk, FISCAL_YEAR)])
+
+    def test_stale_version_is_returned_as_a_conflict(self):
+        self.post((self.first, '150', 1))
+        response = self.post((self.first, '175', 1), (self.second, '250', 1))
+        data = response.json()
+        self.assertEqual(data['status'], 'conflict')
+        self.assertEqual(data['conflicts'], [{'id': self.first.pk, 'value': '150.00', 'version': 2}])
+        self.assertEqual(data['applied'], [{'id': self.second.pk, 'value': '250.00', 'version': 2}])
+        self.assert_record(self.first, '150', 2)
+        self.assert_record(self.second, '250', 2)
+
+    def test_non_editable_record_rejects_the_batch(self):
+        actual = self.create_record(self.actual, '100')
+        response = self.post((self.first, '150', 1), (actual, '150', 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(actual.pk), response.json()['message'])
+        self.assert_record(self.first, '100', 1)
+        self.assert_record(actual, '100', 1)
+
+    def test_non_privileged_user_is_forbidden(self):
+        self.client.force_login(get_user_model().objects.create_user('viewer', password='viewer'))
+        response = self.post((self.first, '150', 1))
+        self.assertEqual(response.status_code, 403)
+        self.assert_record(self.first, '100', 1)
+
+
+class AccountHierarchyTests(DimensionsTestCase):
+    """Tree: 1000 > 1100 > 1110 > 1111, and 2000 on its own."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = self.create_account('1000')
+        self.middle = self.create_account('1100', self.root)
+        self.leaf_parent = self.create_account('1110', self.middle)
+        self.leaf = self.create_account('1111', self.leaf_parent)
+        self.other_root = self.create_account('2000')
+
+    def create_account(self, code, parent=None):
+        return Account.objects.create(account_code=code, account_name=f'Account {code}', account_type='ASSET',
+                                      statement_category='BS', parent_account=parent)
+
+    def ancestors(self, account):
+        """(ancestor code, depth) pairs of an account, nearest first."""
+        return list(AccountClosure.objects.filter(descendant=account).order_by('depth')
+                    .values_list('ancestor__account_code', 'depth'))
+
+    def assert_matches_rebuild(self):
+        closure = set(AccountClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+        self.assertEqual(rebuild_account_closure(), len(closure))
+        self.assertEqual(set(AccountClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth')), closure)
+
+    def test_new_accounts_are_linked_to_every_ancestor(self):
+        self.assertEqual(self.ancestors(self.leaf), [('1111', 0), ('1110', 1), ('1100', 2), ('1000', 3)])
+        self.assert_matches_rebuild()
+
+    def test_moving_a_subtree_relinks_all_of_it(self):
+        self.leaf_parent.parent_account = self.other_root
+        self.leaf_parent.save()
+        self.assertEqual(self.ancestors(self.leaf), [('1111', 0), ('1110', 1), ('2000', 2)])
+        self.assertEqual(self.ancestors(self.middle), [('1100', 0), ('1000', 1)])
+        self.assert_matches_rebuild()
+
+        self.leaf_parent.parent_account = None
+        self.leaf_parent.save()
+        self.assertEqual(self.ancestors(self.leaf), [('1111', 0), ('1110', 1)])
+        self.assert_matches_rebuild()
+
+    def test_deleting_a_middle_node_makes_its_children_top_level(self):
+        self.middle.delete()
+        self.assertEqual(self.ancestors(self.leaf_parent), [('1110', 0)])
+        self.assertEqual(self.ancestors(self.leaf), [('1111', 0), ('1110', 1)])
+        self.assertFalse(AccountClosure.objects.filter(descendant__account_code='1100').exists())
+        self.assert_matches_rebuild()
+
+    def test_rebuild_restores_a_lost_closure(self):
+        AccountClosure.objects.all().delete()
+        rebuild_account_closure()
+        self.assertEqual(self.ancestors(self.leaf), [('1111', 0), ('1110', 1), ('1100', 2), ('1000', 3)])
+
+    def test_clean_rejects_cycles(self):
+        for parent in (self.root, self.leaf):
+            with self.subTest(parent=parent.account_code):
+                self.root.parent_account = parent
+                with self.assertRaises(ValidationError) as raised:
+                    self.root.clean()
+                self.assertIn('parent_account', raised.exception.message_dict)
+        self.root.parent_account = self.other_root
+        self.root.clean()
+
+    def test_subtree_totals_include_sub_accounts(self):
+        self.create_record(self.actual, '1', account=self.middle)
+        self.create_record(self.actual, '10', account=self.leaf_parent)
+        self.create_record(self.actual, '5', account=self.leaf)
+        self.create_record(self.actual, '7', account=self.other_root)
+        records = FinancialRecord.objects.filter(scenario=self.actual)
+        self.assertEqual(get_subtree_totals(records), {
+            self.root.pk: Decimal('16'), self.middle.pk: Decimal('16'), self.leaf_parent.pk: Decimal('15'),
+            self.leaf.pk: Decimal('5'), self.other_root.pk: Decimal('7'),
+        })
+        self.assertEqual(get_subtree_totals(records, ancestors=[self.middle.pk, self.other_root.pk]),
+                         {self.middle.pk: Decimal('16'), self.other_root.pk: Decimal('7')})
+
+
+class QueryBudgetTests(DimensionsTestCase):
+    """
+    Each budgeted page is requested cold, with the caches and the dashboard
+    snapshot empty, and then again served from them.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.create_record(self.actual, '100', state=self.state)
+        self.create_record(self.budget, '90', state=self.state)
+        self.create_record(self.forecast, '120', period=11, state=self.state, is_editable=True)
+
+    def assert_within_budgets(self, path, cached_only=False):
+        cache.clear()
+        DashboardSnapshot.objects.all().delete()
+        if not cached_only:
+            assert_within_query_budget(self.client, path, cold=True)
+        response = assert_within_query_budget(self.client, path)
+        self.assertEqual(response.status_code, 200)
+
+    def test_home(self):
+        self.assert_within_budgets(reverse('budgeting:home'))
+
+    def test_historical_data(self):
+        self.assert_within_budgets(reverse('budgeting:historical_data'))
+        self.assert_within_budgets(reverse('budgeting:historical_data_grid') + f'?fiscal_year={FISCAL_YEAR}')
+
+    def test_performance_management(self):
+        self.assert_within_budgets(reverse('budgeting:performance_management') + f'?fiscal_year={FISCAL_YEAR}')
+        for group_by in VARIANCE_GROUPINGS:
+            with self.subTest(group_by=group_by):
+                self.assert_within_budgets(
+                    reverse('budgeting:performance_management_variance') + f'?fiscal_year={FISCAL_YEAR}&group_by={group_by}')
+
+    def test_reports(self):
+        self.assert_within_budgets(reverse('reporting:financial_statement', args=['pl']) + f'?fiscal_year={FISCAL_YEAR}')
+        self.assert_within_budgets(reverse('reporting:cube') + '?dimensions=fund,state,region,sector,scenario')
+
+    def test_list_pages_use_no_cached_data(self):
+        self.assert_within_budgets(reverse('budgeting:gltransaction_list'), cached_only=True)
+        self.assert_within_budgets(reverse('budgeting:fund_list'), cached_only=True)
+
+    def test_cached_request_that_rebuilds_cached_data_fails(self):
+        cache.clear()
+        with self.assertRaisesMessage(AssertionError, 'rebuilt cached data'):
+            assert_within_query_budget(self.client, reverse('budgeting:performance_management'))
+
+    def test_assert_max_queries_fails_over_limit(self):
+        with self.assertRaises(AssertionError):
+            with assert_max_queries(1):
+                list(get_user_model().objects.all())
+                list(get_user_model().objects.all())
+
+
+@skipIf(Workbook is None, "openpyxl is not installed.")
+class XlsxExportTests(SimpleTestCase):
+    def test_rows_past_the_sheet_limit_continue_on_new_sheets(self):
+        from openpyxl import load_workbook
+
+        output = write_xlsx(((i,) for i in range(7)), ['n'], title='GL Transactions', max_sheet_rows=4)
+        sheets = [(ws.title, [row[0] for row in ws.iter_rows(values_only=True)]) for ws in load_workbook(output)]
+        self.assertEqual(sheets, [
+            ('GL Transactions', ['n', 0, 1, 2]),
+            ('GL Transactions (2)', ['n', 3, 4, 5]),
+            ('GL Transactions (3)', ['n', 6]),
+        ])
+
+
+class ProcessDataTests(DimensionsTestCase):
+    def test_get_is_rejected(self):
+        self.assertEqual(self.client.get(reverse('budgeting:process_data')).status_code, 405)
+
+    def test_post_aggregates_and_returns_to_historical_data(self):
+        response = self.client.post(reverse('budgeting:process_data'))
+        self.assertRedirects(response, reverse('budgeting:historical_data'), fetch_redirect_response=False)
+
+
+class VarianceTests(DimensionsTestCase):
+    def test_records_sharing_a_cell_are_added_up(self):
+        # Missing state and sector are not covered by the unique constraint.
+        self.create_record(self.actual, '100')
+        self.create_record(self.actual, '5')
+        self.create_record(self.actual, '40', account=self.expense, state=self.state, sector=self.sector)
+        self.create_record(self.budget, '80')
+        self.create_record(self.forecast, '30', period=11)
+
+        result = compute_variance(FISCAL_YEAR, periods=6, group_by='slice')
+        actual_total = FinancialRecord.objects.filter(scenario=self.actual).aggregate(total=Sum('value'))['total']
+        totals = result.totals()
+        self.assertEqual(totals['ytd_actual'], float(actual_total))
+        self.assertEqual(totals['ytd_budget'], 80)
+        self.assertEqual(totals['fy_outlook'], float(actual_total) + 30)
+
+    def test_expense_under_budget_is_favourable(self):
+        self.create_record(self.actual, '90', account=self.expense)
+        self.create_record(self.budget, '100', account=self.expense)
+
+        result = compute_variance(FISCAL_YEAR, periods=12, group_by='account')
+        self.assertEqual(result.ytd_variance.tolist(), [-10])
+        self.assertEqual(result.favourable.tolist(), [True])
+
+
+class CubeTests(DimensionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_record(self.actual, '100')
+        self.create_record(self.actual, '5')
+        self.create_record(self.actual, '250.50', period=4, state=self.state, sector=self.sector)
+        self.create_record(self.actual, '75', account=self.expense, period=11, state=self.state)
+        self.create_record(self.budget, '300', period=4, state=self.state, sector=self.sector)
+        rebuild_rollups()
+
+    def from_facts(self, dimensions, **kwargs):
+        with mock.patch('budgeting.cube.choose_rollup', return_value=None):
+            return cube_query(dimensions, **kwargs)
+
+    def test_every_grain_matches_the_fact_table(self):
+        for grain, dimensions in ROLLUPS.items():
+            dimensions = ['scenario', 'fiscal_year', *dimensions]
+            with self.subTest(grain=grain):
+                result = cube_query(dimensions, measures=('value', 'records'))
+                self.assertEqual(result.source, grain)
+                self.assertEqual(result.rows, self.from_facts(dimensions, measures=('value', 'records')).rows)
+
+    def test_record_edit_is_served_from_the_fact_table_until_refreshed(self):
+        record = FinancialRecord.objects.get(scenario=self.budget)
+        record.value = Decimal('320')
+        record.save()
+        self.assertTrue(StaleRollup.objects.filter(scenario=self.budget, fiscal_year=FISCAL_YEAR).exists())
+
+        expected = self.from_facts(['scenario', 'region'], measures=('value', 'records')).rows
+        self.assertIn((self.budget.pk, self.region.pk, Decimal('320'), 1), expected)
+        self.assertEqual(cube_query(['scenario', 'region'], measures=('value', 'records')).rows, expected)
+        self.assertTrue(StaleRollup.objects.exists())
+
+        self.assertEqual(refresh_rollups(), [(self.budget.pk, FISCAL_YEAR)])
+        self.assertEqual(cube_query(['scenario', 'region'], measures=('value', 'records')).rows, expected)
+
+    def test_account_level_change_marks_its_records_stale(self):
+        self.expense.hierarchy_level_1 = 'Staff Costs'
+        self.expense.save()
+        self.assertEqual(list(StaleRollup.objects.values_list('scenario_id', 'fiscal_year')),
+                         [(self.actual.pk, FISCAL_YEAR)])
+        result = cube_query(['account_level_1'], filters={'scenario': self.actual.pk})
+        self.assertEqual(dict(result.rows)['Staff Costs'], Decimal('75'))
+
+    def test_labels_are_read_in_one_version_query(self):
+        result = cube_query(['fund', 'state', 'region', 'sector', 'scenario'])
+        result.to_columnar()
+        with assert_max_queries(1):
+            data = result.to_columnar()
+        self.assertIn('Lagos', data['rows']['state_label'])
@@ -14,17 +14,24 @@ urlpatterns = [
     path('upload/gl/', views.upload_gl_data, name='upload_gl'),
     path('upload/gl/template/', views.download_gl_template, name='download_gl_template'),
     
+    # Query counts and timings per view (staff only)
+    path('system/query-stats/', views.query_stats, name='query_stats'),
+
     # User Profile (New Feature)
     path('profile/', views.user_profile, name='profile'),
 
     # --- Module URLs ---
     path('module/historical-data/', views.historical_data, name='historical_data'),
+    path('module/historical-data/grid/', views.historical_data_grid, name='historical_data_grid'),
+    path('module/historical-data/forecast-values/', views.update_forecast_values, name='update_forecast_values'),
+    path('module/historical-data/process/', views.process_data, name='process_data'),
     
     # Placeholder URLs for modules under development
     path('module/aum-details/', lambda request: views.placeholder_view(request, 'aum_details'), name='aum_details'),
     path('module/hod-submission/', lambda request: views.placeholder_view(request, 'hod_submission'), name='hod_submission'),
     path('module/final-forecast/', lambda request: views.placeholder_view(request, 'final_forecast'), name='final_forecast'),
-    path('module/performance-management/', lambda request: views.placeholder_view(request, 'performance_management'), name='performance_management'),
+    path('module/performance-management/', views.performance_management, name='performance_management'),
+    path('module/performance-management/variance/', views.performance_management_variance, name='performance_management_variance'),
 
     # --- CRUD URLs for Setup Tables ---
     # Example for Departments
@@ -91,6 +98,7 @@ urlpatterns = [
 
     # Read-Only URL for GL Transactions
     path('data/gl-transactions/', views.GLTransactionListView.as_view(), name='gltransaction_list'),
+    path('data/gl-transactions/export/<str:export_format>/', views.export_gl_transactions, name='gltransaction_export'),
 
     # CRUD URLs for Date Dimension
     path('setup/dates/', views.DateDimensionListView.as_view(), name='datedimension_list'),
@@ -1,8 +1,10 @@
 from datetime import date
 from django.conf import settings
 from django.db.models import Sum, Q
-from django.db import transaction
-from .models import GLTransaction, FinancialRecord, Account, Scenario
+from django.db import connection, transaction
+from .cube import refresh_rollups
+from .data_versions import bump_scenario_versions
+from .models import GLTransaction, FinancialRecord, Account, Scenario, StaleActualBucket
 
 FISCAL_START_MONTH = settings.FISCAL_YEAR_START_MONTH
 
@@ -37,10 +39,45 @@ def get_fiscal_months(fiscal_year):
         months.append((month, fiscal_year + 1))
     return months
 
+# Rolls GL rows up into monthly ACTUAL FinancialRecords in one statement.
+# The xmax system column is 0 only for freshly inserted rows, which lets the
+# statement report how many records were created versus updated.
+AGGREGATE_ACTUALS_SQL = """
+WITH upserted AS (
+    INSERT INTO {financial_record} (
+        account_id, fund_id, state_id, sector_id, year, month, scenario_id, value, is_editable
+    )
+    SELECT
+        gl.account_id, gl.fund_id, gl.state_id, gl.sector_id,
+        CASE WHEN EXTRACT(MONTH FROM gl.transaction_date) < %(fiscal_start_month)s
+             THEN EXTRACT(YEAR FROM gl.transaction_date)::integer - 1
+             ELSE EXTRACT(YEAR FROM gl.transaction_date)::integer
+        END AS fiscal_year,
+        EXTRACT(MONTH FROM gl.transaction_date)::integer AS month,
+        gl.scenario_id,
+        SUM(gl.transaction_amount),
+        FALSE
+    FROM {gl_transaction} AS gl
+    WHERE gl.transaction_date >= %(start_date)s
+      AND gl.transaction_date <= %(cutoff_date)s
+      AND gl.scenario_id = %(scenario_id)s
+    GROUP BY gl.account_id, gl.fund_id, gl.state_id, gl.sector_id, gl.scenario_id,
+             EXTRACT(YEAR FROM gl.transaction_date), EXTRACT(MONTH FROM gl.transaction_date)
+    ON CONFLICT (account_id, fund_id, year, month, scenario_id, state_id, sector_id)
+    DO UPDATE SET value = EXCLUDED.value, is_editable = FALSE
+    RETURNING (xmax = 0) AS created
+)
+SELECT COUNT(*) FILTER (WHERE created), COUNT(*) FILTER (WHERE NOT created) FROM upserted
+"""
+
 def aggregate_historical_data(fiscal_year, cutoff_date=None):
     """
     Aggregates raw GLTransaction data into monthly FinancialRecords up to the cutoff date.
     This creates/updates ACTUAL records in the FinancialRecord table.
+
+    The roll-up, fiscal-year mapping and upsert all run in the database as a
+    single INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE statement.
+    Returns a (records_created, records_updated) tuple.
     """
     if cutoff_date is None:
         cutoff_date = date.today()
@@ -50,79 +87,238 @@ def aggregate_historical_data(fiscal_year, cutoff_date=None):
         actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
     except Scenario.DoesNotExist:
         print("Error: 'ACTUAL' Scenario not defined.")
-        return 0
+        return 0, 0
 
-    # 1. Filter GL transactions for the fiscal year up to the cutoff date
-    # Determine the fiscal year end date for the filter query
+    # We only care about transactions from the fiscal year start up to the cutoff date
     start_date = date(fiscal_year, FISCAL_START_MONTH, 1)
-    
-    # We only care about transactions that occurred up to the cutoff date
-    transactions_to_aggregate = GLTransaction.objects.filter(
-        transaction_date__gte=start_date,
-        transaction_date__lte=cutoff_date,
-        scenario=actual_scenario # Should always be ACTUAL for GL data
+
+    sql = AGGREGATE_ACTUALS_SQL.format(
+        financial_record=connection.ops.quote_name(FinancialRecord._meta.db_table),
+        gl_transaction=connection.ops.quote_name(GLTransaction._meta.db_table),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'fiscal_start_month': FISCAL_START_MONTH,
+            'start_date': start_date,
+            'cutoff_date': cutoff_date,
+            'scenario_id': actual_scenario.pk,
+        })
+        records_created, records_updated = cursor.fetchone()
+
+        # Everything up to the cutoff is now current, so pending incremental
+        # work for those months is no longer needed.
+        cursor.execute(CLEAR_STALE_BUCKETS_SQL.format(
+            stale_bucket=connection.ops.quote_name(StaleActualBucket._meta.db_table),
+            where="make_date(year, month, 1) >= %(start_date)s",
+        ), {'start_date': start_date, 'cutoff_date': cutoff_date})
+        refresh_rollups([
+            (actual_scenario.pk, year) for year in range(fiscal_year, get_current_fiscal_year(cutoff_date) + 1)
+        ])
+        bump_scenario_versions(actual_scenario.pk)
+
+    return records_created, records_updated
+
+
+# --- Incremental ACTUAL aggregation ---
+
+def mark_stale_actual_buckets(transactions):
+    """
+    Records the (slice, month) buckets touched by newly inserted GL transactions
+    so the next incremental aggregation recomputes them. Uses one upsert for
+    the whole batch; the upsert also locks any bucket already pending, which
+    orders it after an aggregation run that is processing that bucket.
+    """
+    buckets = {
+        (t.account_id, t.fund_id, t.state_id, t.sector_id, t.transaction_date.year, t.transaction_date.month)
+        for t in transactions
+    }
+    StaleActualBucket.objects.bulk_create(
+        [
+            StaleActualBucket(account_id=account_id, fund_id=fund_id, state_id=state_id,
+                              sector_id=sector_id, year=year, month=month)
+            for account_id, fund_id, state_id, sector_id, year, month in buckets
+        ],
+        update_conflicts=True,
+        unique_fields=['account', 'fund', 'state', 'sector', 'year', 'month'],
+        update_fields=['marked_at'],
     )
 
-    # 2. Group by month, year, account, and fund
-    monthly_totals = transactions_to_aggregate.values(
-        'fund', 'account', 'state', 'sector'
-    ).annotate(
-        # Extract the year and month from the transaction date for grouping
-        month=models.functions.ExtractMonth('transaction_date'),
-        year=models.functions.ExtractYear('transaction_date'),
-        total_value=Sum('transaction_amount')
+
+# Removes pending buckets whose month ended on or before the cutoff date.
+# A bucket for a month that is still open stays pending, so GL rows dated
+# after the cutoff are picked up by a later run.
+CLEAR_STALE_BUCKETS_SQL = """
+DELETE FROM {stale_bucket}
+WHERE {where}
+  AND (make_date(year, month, 1) + INTERVAL '1 month' - INTERVAL '1 day')::date <= %(cutoff_date)s
+"""
+
+# Recomputes the claimed buckets from the GL and upserts their ACTUAL records.
+# Buckets whose GL rows have all been removed are reset to zero rather than
+# being inserted as new empty records.
+AGGREGATE_CLAIMED_BUCKETS_SQL = """
+WITH totals AS (
+    SELECT b.account_id, b.fund_id, b.state_id, b.sector_id, b.year, b.month,
+           CASE WHEN b.month < %(fiscal_start_month)s THEN b.year - 1 ELSE b.year END AS fiscal_year,
+           COALESCE(SUM(gl.transaction_amount), 0) AS total_value,
+           COUNT(gl.id) AS row_count
+    FROM claimed_buckets AS b
+    LEFT JOIN {gl_transaction} AS gl
+           ON gl.account_id = b.account_id AND gl.fund_id = b.fund_id
+          AND gl.state_id = b.state_id AND gl.sector_id = b.sector_id
+          AND gl.scenario_id = %(scenario_id)s
+          AND gl.transaction_date >= make_date(b.year, b.month, 1)
+          AND gl.transaction_date < make_date(b.year, b.month, 1) + INTERVAL '1 month'
+          AND gl.transaction_date <= %(cutoff_date)s
+    GROUP BY b.account_id, b.fund_id, b.state_id, b.sector_id, b.year, b.month
+),
+upserted AS (
+    INSERT INTO {financial_record} (
+        account_id, fund_id, state_id, sector_id, year, month, scenario_id, value, is_editable
     )
+    SELECT account_id, fund_id, state_id, sector_id, fiscal_year, month, %(scenario_id)s, total_value, FALSE
+    FROM totals
+    WHERE row_count > 0
+    ON CONFLICT (account_id, fund_id, year, month, scenario_id, state_id, sector_id)
+    DO UPDATE SET value = EXCLUDED.value, is_editable = FALSE
+    RETURNING (xmax = 0) AS created
+),
+emptied AS (
+    UPDATE {financial_record} AS fr
+    SET value = 0
+    FROM totals AS t
+    WHERE t.row_count = 0
+      AND fr.account_id = t.account_id AND fr.fund_id = t.fund_id
+      AND fr.state_id = t.state_id AND fr.sector_id = t.sector_id
+      AND fr.year = t.fiscal_year AND fr.month = t.month
+      AND fr.scenario_id = %(scenario_id)s
+    RETURNING fr.id
+)
+SELECT (SELECT COUNT(*) FROM upserted WHERE created),
+       (SELECT COUNT(*) FROM upserted WHERE NOT created) + (SELECT COUNT(*) FROM emptied)
+"""
 
-    records_created = 0
-    records_updated = 0
-    
-    # 3. Create or update FinancialRecord objects
-    with transaction.atomic():
-        for item in monthly_totals:
-            # Determine the fiscal year for the grouped month/year
-            current_month = item['month']
-            current_year = item['year']
-            
-            # Adjust the stored year to be the fiscal year start year
-            if current_month < FISCAL_START_MONTH:
-                record_fiscal_year = current_year - 1
-            else:
-                record_fiscal_year = current_year
-
-            # Find or create the FinancialRecord
-            record, created = FinancialRecord.objects.update_or_create(
-                account_id=item['account'],
-                fund_id=item['fund'],
-                state_id=item['state'],
-                sector_id=item['sector'],
-                year=record_fiscal_year,
-                month=current_month,
-                scenario=actual_scenario,
-                defaults={
-                    'value': item['total_value'],
-                    'is_editable': False # Actuals are never editable
-                }
+def aggregate_changed_actuals(cutoff_date=None):
+    """
+    Incremental counterpart of `aggregate_historical_data`.
+
+    Only the buckets marked stale by GL imports since the last run are
+    recomputed, so a daily refresh costs time in proportion to the new data
+    rather than to the size of the ledger. Buckets are claimed with
+    SELECT ... FOR UPDATE, so an import that marks the same bucket while a
+    run is in progress waits and is picked up by the next run.
+
+    GL rows removed with bulk deletes are not tracked; run
+    `aggregate_historical_data` for the affected fiscal year afterwards.
+    Returns a (records_created, records_updated) tuple.
+    """
+    if cutoff_date is None:
+        cutoff_date = date.today()
+
+    try:
+        actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
+    except Scenario.DoesNotExist:
+        print("Error: 'ACTUAL' Scenario not defined.")
+        return 0, 0
+
+    qn = connection.ops.quote_name
+    stale_bucket = qn(StaleActualBucket._meta.db_table)
+    params = {
+        'fiscal_start_month': FISCAL_START_MONTH,
+        'cutoff_date': cutoff_date,
+        'scenario_id': actual_scenario.pk,
+    }
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE claimed_buckets ON COMMIT DROP AS "
+            f"SELECT account_id, fund_id, state_id, sector_id, year, month FROM {stale_bucket} "
+            f"WHERE make_date(year, month, 1) <= %(cutoff_date)s FOR UPDATE",
+            params,
+        )
+        cursor.execute(AGGREGATE_CLAIMED_BUCKETS_SQL.format(
+            financial_record=qn(FinancialRecord._meta.db_table),
+            gl_transaction=qn(GLTransaction._meta.db_table),
+        ), params)
+        records_created, records_updated = cursor.fetchone()
+
+        if records_created or records_updated:
+            cursor.execute(
+                "SELECT DISTINCT year - (month < %(fiscal_start_month)s)::integer FROM claimed_buckets", params,
             )
-            if created:
-                records_created += 1
-            else:
-                records_updated += 1
+            refresh_rollups([(actual_scenario.pk, year) for (year,) in cursor.fetchall()])
+
+        cursor.execute(CLEAR_STALE_BUCKETS_SQL.format(
+            stale_bucket=stale_bucket,
+            where=(
+                "(account_id, fund_id, state_id, sector_id, year, month) IN "
+                "(SELECT account_id, fund_id, state_id, sector_id, year, month FROM claimed_buckets)"
+            ),
+        ), params)
+        if records_created or records_updated:
+            bump_scenario_versions(actual_scenario.pk)
 
-    return records_created + records_updated
+    return records_created, records_updated
 
 
+# Seeds FORECAST records from each slice's last ACTUAL value in one statement.
+# DISTINCT ON picks the latest ACTUAL at or before the cutoff for every slice
+# that has ACTUALs in the fiscal year; months are compared in fiscal order.
+SEED_FORECAST_SQL = """
+WITH slices AS (
+    SELECT DISTINCT account_id, fund_id, state_id, sector_id
+    FROM {financial_record}
+    WHERE year = %(fiscal_year)s AND scenario_id = %(actual_scenario_id)s
+),
+last_actuals AS (
+    SELECT DISTINCT ON (fr.account_id, fr.fund_id, fr.state_id, fr.sector_id)
+           fr.account_id, fr.fund_id, fr.state_id, fr.sector_id, fr.value
+    FROM {financial_record} AS fr
+    JOIN slices AS s
+      ON s.account_id = fr.account_id AND s.fund_id = fr.fund_id
+     AND s.state_id IS NOT DISTINCT FROM fr.state_id
+     AND s.sector_id IS NOT DISTINCT FROM fr.sector_id
+    WHERE fr.scenario_id = %(actual_scenario_id)s
+      AND (fr.year, (fr.month - %(fiscal_start_month)s + 12) %% 12) <= (%(cutoff_fiscal_year)s, %(cutoff_period)s)
+    ORDER BY fr.account_id, fr.fund_id, fr.state_id, fr.sector_id,
+             fr.year DESC, (fr.month - %(fiscal_start_month)s + 12) %% 12 DESC
+),
+seeded AS (
+    INSERT INTO {financial_record} (
+        account_id, fund_id, state_id, sector_id, year, month, scenario_id, value, is_editable
+    )
+    SELECT s.account_id, s.fund_id, s.state_id, s.sector_id, %(fiscal_year)s, m.month,
+           %(forecast_scenario_id)s, COALESCE(la.value, 0), TRUE
+    FROM slices AS s
+    LEFT JOIN last_actuals AS la
+      ON la.account_id = s.account_id AND la.fund_id = s.fund_id
+     AND la.state_id IS NOT DISTINCT FROM s.state_id
+     AND la.sector_id IS NOT DISTINCT FROM s.sector_id
+    CROSS JOIN unnest(%(forecast_months)s::integer[]) AS m(month)
+    ON CONFLICT (account_id, fund_id, year, month, scenario_id, state_id, sector_id)
+    DO UPDATE SET value = EXCLUDED.value, is_editable = TRUE, version = {financial_record}.version + 1
+    RETURNING (xmax = 0) AS created
+)
+SELECT COUNT(*) FILTER (WHERE created), COUNT(*) FILTER (WHERE NOT created) FROM seeded
+"""
+
 def initialize_forecast_data(fiscal_year, actual_cutoff_month, actual_cutoff_year, forecast_scenario_name='FORECAST'):
     """
     Initializes FinancialRecord entries for months in the fiscal year 
     that fall after the last actual month. Uses a simple estimate (e.g., 
     last actual month's value or 0).
+
+    The last ACTUAL of every slice is found with one DISTINCT ON query and all
+    forecast rows are written with one upsert, in a single statement.
+    Returns an exact (records_created, records_updated) tuple.
     """
     # Get the 'FORECAST' scenario instance
     try:
         forecast_scenario = Scenario.objects.get(scenario_name=forecast_scenario_name)
-    except Scenario.DoesNotExist:
-        print(f"Error: '{forecast_scenario_name}' Scenario not defined.")
-        return 0
+        actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
+    except Scenario.DoesNotExist as e:
+        print(f"Error: required Scenario not defined ({e}).")
+        return 0, 0
 
     all_fiscal_months = get_fiscal_months(fiscal_year)
     
@@ -131,54 +327,31 @@ def initialize_forecast_data(fiscal_year, actual_cutoff_month, actual_cutoff_yea
     found_cutoff = False
     for month, year in all_fiscal_months:
         if found_cutoff:
-            forecast_months.append((month, year))
+            forecast_months.append(month)
         elif month == actual_cutoff_month and year == actual_cutoff_year:
             found_cutoff = True
-            
+
+    if not forecast_months:
+        return 0, 0
+
     # Simple initialization logic: replicate the final actual month's data
     # (In a real app, this would use sophisticated forecasting models)
-    
-    # 1. Get the list of all unique slices (Account, Fund, State, Sector)
-    unique_slices = FinancialRecord.objects.filter(
-        year=fiscal_year,
-        scenario__scenario_name='ACTUAL'
-    ).values('account', 'fund', 'state', 'sector').distinct()
-    
-    records_to_create = []
-
-    # 2. Iterate through each slice and each forecast month
-    for slice_data in unique_slices:
-        # Try to find the last actual value for this slice
-        try:
-            last_actual_record = FinancialRecord.objects.filter(
-                account_id=slice_data['account'],
-                fund_id=slice_data['fund'],
-                state_id=slice_data['state'],
-                sector_id=slice_data['sector'],
-                year__lte=actual_cutoff_year,
-                month__lte=actual_cutoff_month,
-                scenario__scenario_name='ACTUAL'
-            ).order_by('-year', '-month').first()
-            
-            initial_value = last_actual_record.value if last_actual_record else 0.00
-        except Exception:
-            initial_value = 0.00
-        
-        # Create forecast records for all future months
-        for month, year in forecast_months:
-            # Use update_or_create to prevent duplicates if initialization runs again
-            FinancialRecord.objects.update_or_create(
-                account_id=slice_data['account'],
-                fund_id=slice_data['fund'],
-                state_id=slice_data['state'],
-                sector_id=slice_data['sector'],
-                year=fiscal_year,
-                month=month,
-                scenario=forecast_scenario,
-                defaults={
-                    'value': initial_value,
-                    'is_editable': True 
-                }
-            )
+    cutoff_fiscal_year = get_current_fiscal_year(date(actual_cutoff_year, actual_cutoff_month, 1))
+    sql = SEED_FORECAST_SQL.format(
+        financial_record=connection.ops.quote_name(FinancialRecord._meta.db_table),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql, {
+            'fiscal_year': fiscal_year,
+            'fiscal_start_month': FISCAL_START_MONTH,
+            'cutoff_fiscal_year': cutoff_fiscal_year,
+            'cutoff_period': (actual_cutoff_month - FISCAL_START_MONTH) % 12,
+            'actual_scenario_id': actual_scenario.pk,
+            'forecast_scenario_id': forecast_scenario.pk,
+            'forecast_months': forecast_months,
+        })
+        records_created, records_updated = cursor.fetchone()
+        refresh_rollups([(forecast_scenario.pk, fiscal_year)])
+        bump_scenario_versions(forecast_scenario.pk)
 
-    return len(forecast_months) * len(unique_slices) # approximate count
\ No newline at end of file
+    return records_created, records_updated
@@ -0,0 +1,267 @@
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .data_versions import get_versions, scenario_version_name
+from .dimension_cache import dimension_version_name, get_dimension_labels, get_dimension_map
+from .instrumentation import record_cache_miss
+from .models import Account, FinancialRecord
+from .utils import FISCAL_START_MONTH, get_current_fiscal_year
+
+# Budget-vs-actual variance for one fiscal year. ACTUAL, BUDGET and FORECAST
+# records are loaded in one query and aligned on (account, fund, state,
+# sector) x fiscal period as dense NumPy matrices; every measure is then a
+# whole-array operation rather than per-record Python.
+
+VARIANCE_SCENARIOS = ('ACTUAL', 'BUDGET', 'FORECAST')
+
+# group_by option -> columns of the slice key it keeps
+VARIANCE_GROUPINGS = {
+    'account': ('account',),
+    'fund': ('fund',),
+    'state': ('state',),
+    'sector': ('sector',),
+    'account_fund': ('account', 'fund'),
+    'slice': ('account', 'fund', 'state', 'sector'),
+}
+SLICE_COLUMNS = ('account', 'fund', 'state', 'sector')
+
+# Account types where spending less than budget is favourable.
+COST_ACCOUNT_TYPES = ('EXPENSE',)
+
+CACHE_PREFIX = 'budgeting:variance'
+VARIANCE_CACHE_TIMEOUT = getattr(settings, 'VARIANCE_CACHE_TIMEOUT', 60 * 60)
+
+# Missing state/sector ids come back as 0 so every column is numeric.
+LOAD_SCENARIOS_SQL = """
+SELECT account_id, fund_id, COALESCE(state_id, 0), COALESCE(sector_id, 0),
+       scenario_id, (month - %(fiscal_start_month)s + 12) %% 12 AS period, value::float8
+FROM {financial_record}
+WHERE year = %(fiscal_year)s AND scenario_id = ANY(%(scenario_ids)s) {extra_where}
+"""
+
+
+def closed_periods(fiscal_year, today=None):
+    """Number of fiscal periods of the year up to and including the current month (0-12)."""
+    today = today or date.today()
+    current_year = get_current_fiscal_year(today)
+    if fiscal_year < current_year:
+        return 12
+    if fiscal_year > current_year:
+        return 0
+    return (today.month - FISCAL_START_MONTH) % 12 + 1
+
+
+def load_scenario_matrices(fiscal_year, scenario_ids, fund=None, state=None):
+    """
+    Loads the scenarios' records for a fiscal year as aligned (slices x 12)
+    matrices. Returns (keys, matrices): keys is an (n x 4) int array of
+    (account, fund, state, sector) ids, with 0 for a missing state or sector,
+    and matrices maps each scenario id to its values (0 where no record exists).
+    """
+    extra_where, params = '', {
+        'fiscal_start_month': FISCAL_START_MONTH,
+        'fiscal_year': fiscal_year,
+        'scenario_ids': [pk for pk in scenario_ids if pk is not None],
+    }
+    if fund:
+        extra_where += ' AND fund_id = %(fund)s'
+        params['fund'] = fund
+    if state:
+        extra_where += ' AND state_id = %(state)s'
+        params['state'] = state
+    sql = LOAD_SCENARIOS_SQL.format(
+        financial_record=connection.ops.quote_name(FinancialRecord._meta.db_table),
+        extra_where=extra_where,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = np.array(cursor.fetchall(), dtype=float).reshape(-1, 7)
+
+    ids = rows[:, :6].astype(np.int64)
+    keys, slice_rows = np.unique(ids[:, :4], axis=0, return_inverse=True)
+    slice_rows = slice_rows.reshape(-1)
+    matrices = {}
+    for scenario_id in scenario_ids:
+        matrix = np.zeros((len(keys), 12))
+        if scenario_id is not None:
+            mask = ids[:, 4] == scenario_id
+            # Rows with no state or sector share a cell with 0 ids; add them up.
+            np.add.at(matrix, (slice_rows[mask], ids[mask, 5]), rows[mask, 6])
+        matrices[scenario_id] = matrix
+    return keys, matrices
+
+
+def _percent(variance, base):
+    """variance / |base| * 100, NaN where the base is 0."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(base != 0, variance / np.abs(base) * 100, np.nan)
+
+
+class VarianceResult:
+    """
+    Variance measures for one fiscal year, one row per group key. Measures
+    are NumPy arrays parallel to `keys`; YTD covers the first `periods` fiscal
+    periods, and the outlook is YTD actuals plus the remaining FORECAST.
+    """
+
+    def __init__(self, fiscal_year, periods, group_by, keys, actual, budget, forecast):
+        self.fiscal_year = fiscal_year
+        self.periods = periods
+        self.group_by = group_by
+        self.columns = VARIANCE_GROUPINGS[group_by]
+        self.keys = keys
+        self.actual = actual
+        self.budget = budget
+
+        self.ytd_actual = actual[:, :periods].sum(axis=1)
+        self.ytd_budget = budget[:, :periods].sum(axis=1)
+        self.ytd_variance = self.ytd_actual - self.ytd_budget
+        self.ytd_variance_pct = _percent(self.ytd_variance, self.ytd_budget)
+        self.fy_budget = budget.sum(axis=1)
+        self.fy_outlook = self.ytd_actual + forecast[:, periods:].sum(axis=1)
+        self.outlook_variance = self.fy_outlook - self.fy_budget
+        self.outlook_variance_pct = _percent(self.outlook_variance, self.fy_budget)
+        self.labels = {}
+        self.favourable = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def totals(self):
+        """Organisation-wide measures over all rows."""
+        ytd_variance = self.ytd_variance.sum()
+        outlook_variance = self.outlook_variance.sum()
+        return {
+            'ytd_actual': self.ytd_actual.sum(),
+            'ytd_budget': self.ytd_budget.sum(),
+            'ytd_variance': ytd_variance,
+            'ytd_variance_pct': _percent(ytd_variance, self.ytd_budget.sum()),
+            'fy_budget': self.fy_budget.sum(),
+            'fy_outlook': self.fy_outlook.sum(),
+            'outlook_variance': outlook_variance,
+            'outlook_variance_pct': _percent(outlook_variance, self.fy_budget.sum()),
+        }
+
+    def order_by_impact(self):
+        """Row indexes by absolute YTD variance, largest first."""
+        return np.argsort(-np.abs(self.ytd_variance), kind='stable')
+
+    def to_columnar(self, rows=None):
+        """
+        Serialises the result for the variance API as parallel lists. `rows`
+        selects and orders row indexes (all rows by default). NaN percentages
+        become null.
+        """
+        rows = np.arange(len(self.keys)) if rows is None else rows
+
+        def values(array):
+            return [None if np.isnan(v) else v for v in np.round(array[rows], 2).tolist()]
+
+        data = {
+            'fiscal_year': self.fiscal_year,
+            'periods': self.periods,
+            'group_by': self.group_by,
+            'rows': {
+                f'{column}_id': [key or None for key in self.keys[rows, i].tolist()]
+                for i, column in enumerate(self.columns)
+            },
+            'measures': {
+                name: values(getattr(self, name))
+                for name in ('ytd_actual', 'ytd_budget', 'ytd_variance', 'ytd_variance_pct',
+                             'fy_budget', 'fy_outlook', 'outlook_variance', 'outlook_variance_pct')
+            },
+            'totals': {
+                name: None if np.isnan(value) else round(float(value), 2) for name, value in self.totals().items()
+            },
+        }
+        for column in self.columns:
+            column_labels = self.labels.get(column, {})
+            data['rows'][f'{column}_label'] = [
+                column_labels.get(key, '') for key in self.keys[rows, self.columns.index(column)].tolist()
+            ]
+        if self.favourable is not None:
+            data['rows']['favourable'] = self.favourable[rows].tolist()
+        return data
+
+
+def _group(keys, matrix, columns):
+    """Sums the rows of `matrix` sharing the same values in the kept key columns."""
+    group_keys, inverse = np.unique(keys[:, columns], axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    grouped = np.zeros((len(group_keys), matrix.shape[1]))
+    np.add.at(grouped, inverse, matrix)
+    return group_keys, grouped
+
+
+def compute_variance(fiscal_year, periods=None, group_by='account', fund=None, state=None):
+    """
+    Computes budget-vs-actual variance for a fiscal year, grouped by the
+    dimensions named in VARIANCE_GROUPINGS. `periods` is the number of closed
+    fiscal periods counted as YTD (the periods up to today by default).
+    """
+    periods = closed_periods(fiscal_year) if periods is None else periods
+    scenarios = get_dimension_map('scenario')
+    scenario_ids = [scenarios.get(name) for name in VARIANCE_SCENARIOS]
+    keys, matrices = load_scenario_matrices(fiscal_year, scenario_ids, fund=fund, state=state)
+    columns = [SLICE_COLUMNS.index(column) for column in VARIANCE_GROUPINGS[group_by]]
+
+    if len(keys):
+        stacked = np.hstack([matrices[scenario_id] for scenario_id in scenario_ids])
+        group_keys, grouped = _group(keys, stacked, columns)
+    else:
+        group_keys, grouped = np.zeros((0, len(columns)), dtype=np.int64), np.zeros((0, 36))
+    actual, budget, forecast = np.hsplit(grouped, 3)
+    result = VarianceResult(fiscal_year, periods, group_by, group_keys, actual, budget, forecast)
+
+    for column in result.columns:
+        if column == 'account':
+            accounts = Account.objects.filter(pk__in=np.unique(group_keys[:, 0]).tolist()).values_list(
+                'account_key', 'account_code', 'account_name', 'account_type')
+            account_types = {}
+            result.labels['account'] = {}
+            for key, code, name, account_type in accounts:
+                result.labels['account'][key] = f'{code} - {name}'
+                account_types[key] = account_type
+            is_cost = np.array(
+                [account_types.get(key) in COST_ACCOUNT_TYPES for key in group_keys[:, 0].tolist()], dtype=bool)
+            result.favourable = np.where(is_cost, result.ytd_variance <= 0, result.ytd_variance >= 0)
+        else:
+            result.labels[column] = get_dimension_labels(column)
+    return result
+
+
+def variance_cache_key(fiscal_year, periods, group_by, fund=None, state=None):
+    """
+    Cache key of a variance run. It includes the data version of each
+    scenario involved, so new actuals, budgets or forecasts make it stale,
+    and the versions of the grouped dimensions, whose labels it carries.
+    The versions are shared by all processes (budgeting.data_versions), so
+    out-of-process aggregation and forecast runs invalidate it too. All of
+    them are read in one query.
+    """
+    scenarios = get_dimension_map('scenario')
+    scenario_ids = [scenarios.get(name) for name in VARIANCE_SCENARIOS]
+    versions = get_versions(
+        [scenario_version_name(pk) for pk in scenario_ids if pk is not None]
+        + [dimension_version_name(column) for column in VARIANCE_GROUPINGS[group_by]]
+    )
+    return ':'.join([
+        CACHE_PREFIX, str(fiscal_year), str(periods), group_by, str(fund or ''), str(state or ''),
+        ','.join(f'{name}v{version}' for name, version in versions.items()),
+    ])
+
+
+def get_variance(fiscal_year, periods=None, group_by='account', fund=None, state=None):
+    """Returns the variance run from the cache, computing and caching it on a miss."""
+    periods = closed_periods(fiscal_year) if periods is None else periods
+    key = variance_cache_key(fiscal_year, periods, group_by, fund, state)
+    result = cache.get(key)
+    if result is None:
+        record_cache_miss()
+        result = compute_variance(fiscal_year, periods, group_by, fund, state)
+        cache.set(key, result, timeout=VARIANCE_CACHE_TIMEOUT)
+    return result
@@ -1,36 +1,67 @@
 import csv
 import io
-from datetime import datetime
+import json
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
 import http
 from django.shortcuts import render, redirect
 from django.urls import reverse, reverse_lazy
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import urlencode
 from django.contrib.auth import login
 from django.contrib import messages
 from django.db import transaction
-from django.http import HttpResponse
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.views.decorators.http import require_POST
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 
-from .forms import GLUploadForm, ProfileUpdateForm, CustomUserCreationForm, FundForm, SectorForm, GradeForm, ScenarioForm, FundCategoryForm, RegionForm, StateForm, LocationForm, AccountForm, AccountUploadForm, DateDimensionForm, DateDimensionUploadForm
+from .forms import GLTransactionFilterForm, GLUploadForm, ProfileUpdateForm, CustomUserCreationForm, FundForm, SectorForm, GradeForm, ScenarioForm, FundCategoryForm, RegionForm, StateForm, LocationForm, AccountForm, AccountUploadForm, DateDimensionForm, DateDimensionUploadForm
 from .models import (
     GLTransaction, Account, Fund, Department, State, Sector, Scenario, Grade, FundCategory, Region, Location, DateDimension,
     FinancialRecord, CustomUser
 )
+from .cube import mark_rollups_stale
+from .dashboard import get_dashboard_snapshot, refresh_dashboard_snapshot
+from .data_versions import bump_scenario_versions
+from .dimension_cache import get_dimension_choices, get_dimension_maps, resolve as resolve_dimension
+from .exports import GL_EXPORT_COLUMNS, iter_gl_export_rows, stream_csv, write_xlsx
+from .importers import import_chart_of_accounts
+from .instrumentation import get_request_stats, query_budget, reset_request_stats
+from .pagination import estimate_count, paginate_by_keyset
+from .variance import VARIANCE_GROUPINGS, closed_periods, get_variance
+from .search import search_gl_transactions
+from .pivot import GRID_FILTER_FIELDS, GRID_PAGE_SIZE, MAX_GRID_PAGE_SIZE, build_pivot_grid, fiscal_columns
+from .utils import aggregate_changed_actuals, get_current_fiscal_year
+from transactions.models import GLImportJob
 
 @login_required
+@query_budget(5, cold=20)
 def home(request):
     """
-    Renders the main application dashboard.
+    Renders the main application dashboard from the stored KPI snapshot.
     """
-    last_import = GLTransaction.objects.order_by('-transaction_date').first()
+    snapshot = get_dashboard_snapshot()
+    kpis = snapshot.data
     context = {
-        'current_fiscal_year': datetime.now().year,
-        'last_gl_import_date': last_import.transaction_date if last_import else None,
-        'total_funds': Fund.objects.count(),
+        'current_fiscal_year': kpis['fiscal_year'],
+        'last_gl_import_date': parse_date(kpis['last_gl_transaction_date'] or ''),
+        'last_gl_import_at': parse_datetime(kpis['last_gl_import_at'] or ''),
+        'total_funds': kpis['total_funds'],
+        'gl_transaction_count': kpis['gl_transaction_count'],
+        'financial_record_count': kpis['financial_record_count'],
+        'ytd_by_category': kpis['ytd_by_category'],
+        'ytd_by_fund': kpis['ytd_by_fund'],
+        'snapshot_refreshed_at': snapshot.refreshed_at,
     }
     return render(request, 'budgeting/dashboard.html', context)
 
+MAX_FORECAST_EDITS = 500
+# FinancialRecord.value holds 18 digits, 2 of them decimals.
+MAX_FORECAST_VALUE = Decimal(10) ** 16
+
 # Custom decorator for privileged users (e.g., Finance team/Admin)
 def is_privileged_user(user):
     # This is a placeholder for your actual permission logic
@@ -40,80 +71,27 @@ def is_privileged_user(user):
 @user_passes_test(is_privileged_user)
 def upload_gl_data(request):
     """
-    Handles the upload of GL/Ledger data via CSV file. (Previous code)
+    Handles the upload of GL/Ledger data via CSV file.
+    The file is queued as a GLImportJob and imported by the background worker.
     """
-    # ... (GL Upload logic remains the same) ...
     if request.method == 'POST':
         form = GLUploadForm(request.POST, request.FILES)
         if form.is_valid():
             csv_file = request.FILES['csv_file']
-            file_data = csv_file.read().decode('utf-8')
-            csv_data = io.StringIO(file_data)
-            reader = csv.DictReader(csv_data)
-            
-            transactions_to_create = []
-            errors = []
-            
-            account_map = {acc.account_code: acc for acc in Account.objects.all()}
-            fund_map = {f.fund_name: f for f in Fund.objects.all()}
-            dept_map = {d.department_name: d for d in Department.objects.all()}
-            state_map = {s.state_name: s for s in State.objects.all()}
-            sector_map = {s.sector_name: s for s in Sector.objects.all()}
 
-            try:
-                actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
-            except Scenario.DoesNotExist:
+            if resolve_dimension('scenario', 'ACTUAL') is None:
                 messages.error(request, "Setup Error: 'ACTUAL' Scenario not found in Settings. Please create it first.")
                 return render(request, 'budgeting/upload_gl.html', {'form': form})
-            
-            for i, row in enumerate(reader):
-                try:
-                    account = account_map.get(row['Account Code'])
-                    fund = fund_map.get(row['Fund Name'])
-                    department = dept_map.get(row['Department'])
-                    state = state_map.get(row['State'])
-                    sector = sector_map.get(row['Sector'])
-                    
-                    if not all([account, fund, department, state, sector]):
-                        missing_dims = []
-                        if not account: missing_dims.append(f"Account Code: {row['Account Code']}")
-                        if not fund: missing_dims.append(f"Fund Name: {row['Fund Name']}")
-                        if not department: missing_dims.append(f"Department: {row['Department']}")
-                        if not state: missing_dims.append(f"State: {row['State']}")
-                        if not sector: missing_dims.append(f"Sector: {row['Sector']}")
-                        raise ValueError(f"Missing Dimension Lookup: {'; '.join(missing_dims)}")
-
-                    trans_date = datetime.strptime(row['Date'], '%Y-%m-%d').date() 
-                    amount = float(row['Amount'])
-                    
-                    transactions_to_create.append(
-                        GLTransaction(
-                            transaction_date=trans_date,
-                            account=account,
-                            fund=fund,
-                            department=department,
-                            state=state,
-                            sector=sector,
-                            scenario=actual_scenario, 
-                            description=row.get('Description', 'Imported GL Entry'),
-                            transaction_amount=amount,
-                            balance=0.00 
-                        )
-                    )
-                
-                except Exception as e:
-                    errors.append(f"Row {i + 1}: Could not process row. Error: {e}")
-
-            if errors:
-                error_summary = "\n".join(errors[:10])
-                messages.error(request, f"Upload failed due to data errors ({len(errors)} errors found). Top 10 errors:\n{error_summary}")
-                return render(request, 'budgeting/upload_gl.html', {'form': form})
 
-            with transaction.atomic():
-                GLTransaction.objects.bulk_create(transactions_to_create)
-            
-            messages.success(request, f"Successfully imported {len(transactions_to_create)} GL transactions.")
-            return redirect(reverse('budgeting:upload_gl'))
+            # The file is persisted and handed to the background worker
+            # (`manage.py run_gl_import_worker`), so the request returns immediately.
+            job = GLImportJob.objects.create(
+                csv_file=csv_file,
+                original_filename=csv_file.name,
+                submitted_by=request.user,
+            )
+            messages.success(request, f"GL file queued for import (job #{job.pk}).")
+            return redirect(reverse('transactions:gl_import_job_detail', args=[job.pk]))
     
     else:
         form = GLUploadForm()
@@ -159,49 +137,22 @@ def upload_accounts(request):
         form = AccountUploadForm(request.POST, request.FILES)
         if form.is_valid():
             csv_file = request.FILES['csv_file']
-            file_data = csv_file.read().decode('utf-8')
-            csv_data = io.StringIO(file_data)
-            reader = csv.DictReader(csv_data)
-            
-            errors = []
-            accounts_to_process = []
-
-            for i, row in enumerate(reader):
-                try:
-                    accounts_to_process.append(row)
-                except Exception as e:
-                    errors.append(f"Row {i + 2}: Error reading row - {e}")
-
-            if errors:
-                messages.error(request, f"Upload failed due to file read errors: {', '.join(errors)}")
-                return redirect('budgeting:upload_accounts')
 
             try:
-                with transaction.atomic():
-                    for row in accounts_to_process:
-                        parent = None
-                        if row.get('ParentAccountCode'):
-                            parent = Account.objects.get(account_code=row['ParentAccountCode'])
-
-                        Account.objects.update_or_create(
-                            account_code=row['AccountCode'],
-                            defaults={
-                                'account_name': row['AccountName'],
-                                'account_type': row['AccountType'],
-                                'statement_category': row['StatementCategory'],
-                                'hierarchy_level_1': row.get('HierarchyLevel1'),
-                                'hierarchy_level_2': row.get('HierarchyLevel2'),
-                                'hierarchy_level_3': row.get('HierarchyLevel3'),
-                                'hierarchy_level_4': row.get('HierarchyLevel4'),
-                                'parent_account': parent,
-                                'is_leaf': row['IsLeaf'].strip().upper() in ['TRUE', '1', 'YES'],
-                                'display_order': int(row['DisplayOrder']),
-                                'active_flag': row['ActiveFlag'].strip().upper() in ['TRUE', '1', 'YES'],
-                            }
-                        )
-                messages.success(request, f"Successfully processed {len(accounts_to_process)} account records.")
+                result = import_chart_of_accounts(csv_file)
             except Exception as e:
                 messages.error(request, f"An error occurred during processing: {e}")
+                return redirect('budgeting:account_list')
+
+            if result.error_count:
+                messages.error(request, f"Upload failed due to data errors ({result.error_count} errors found): {', '.join(result.errors)}")
+                return redirect('budgeting:upload_accounts')
+
+            messages.success(
+                request,
+                f"Successfully processed {result.rows_parsed} account records "
+                f"({result.accounts_created} created, {result.accounts_updated} updated)."
+            )
             
             return redirect('budgeting:account_list')
     else:
@@ -308,23 +259,228 @@ def register(request):
     return render(request, 'registration/register.html', {'form': form})
 
 @login_required
+@query_budget(8, cold=10)
 def historical_data(request):
     """
     Renders the Module 1: Historical Data & Editable Forecasts page.
+    The page is a shell: its rows are loaded from historical_data_grid as the table is scrolled.
     """
-    # Basic context to render the template without errors.
-    # A full implementation would calculate these values.
+    today = date.today()
+    fiscal_year, filters = _grid_request_params(request, today)
     context = {
-        'fiscal_year': datetime.now().year,
-        'today_month': datetime.now().month,
-        'today_year': datetime.now().year,
+        'fiscal_year': fiscal_year,
+        'today': today,
         'is_privileged': is_privileged_user(request.user),
-        'fiscal_months': [(m, datetime.now().year) for m in range(1, 13)],
-        'report_data': [], # Placeholder for actual data
+        'fiscal_months': fiscal_columns(fiscal_year, today.month, today.year),
+        'filters': filters,
+        'grid_query': dict(filters, fiscal_year=fiscal_year),
+        'grid_page_size': GRID_PAGE_SIZE,
+        'funds': get_dimension_choices('fund'),
+        'states': get_dimension_choices('state'),
+        'sectors': get_dimension_choices('sector'),
+        'hierarchy_levels': (
+            Account.objects.exclude(hierarchy_level_1__isnull=True).exclude(hierarchy_level_1='')
+            .order_by('hierarchy_level_1').values_list('hierarchy_level_1', flat=True).distinct()
+        ),
     }
     return render(request, 'budgeting/historical_data.html', context)
 
 
+def _grid_request_params(request, today):
+    """Reads the fiscal year and the grid filters shared by the Module 1 page and its grid API."""
+    try:
+        fiscal_year = int(request.GET.get('fiscal_year', ''))
+    except ValueError:
+        fiscal_year = get_current_fiscal_year(today)
+    filters = {name: request.GET[name] for name in GRID_FILTER_FIELDS if request.GET.get(name)}
+    return fiscal_year, filters
+
+
+@login_required
+@query_budget(10, cold=12)
+def historical_data_grid(request):
+    """
+    Returns a window of Module 1 grid rows (offset/limit) as columnar JSON.
+    """
+    today = date.today()
+    fiscal_year, filters = _grid_request_params(request, today)
+    try:
+        offset = max(int(request.GET.get('offset', 0)), 0)
+        limit = min(max(int(request.GET.get('limit', GRID_PAGE_SIZE)), 1), MAX_GRID_PAGE_SIZE)
+        grid = build_pivot_grid(fiscal_year, today.month, today.year, filters=filters, offset=offset, limit=limit)
+    except (ValueError, ValidationError):
+        return JsonResponse({'status': 'error', 'message': "Invalid grid parameters."}, status=400)
+    return JsonResponse(dict(grid.to_columnar(), fiscal_year=fiscal_year))
+
+
+@login_required
+@require_POST
+@query_budget(8)
+def update_forecast_values(request):
+    """
+    Applies a batch of forecast cell edits in one transaction.
+
+    Expects {"changes": [{"id": ..., "value": ..., "version": ...}, ...]}. Each
+    edit carries the record version it was made against; records changed by
+    someone else since are returned under "conflicts" with their current value
+    instead of being overwritten. The other edits are saved with one bulk_update.
+    """
+    if not is_privileged_user(request.user):
+        return JsonResponse({'status': 'error', 'message': "You do not have permission to edit forecasts."}, status=403)
+
+    try:
+        changes = json.loads(request.body)['changes']
+        edits = {
+            int(change['id']): (
+                Decimal(str(change['value'])).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+                int(change['version']),
+            )
+            for change in changes
+        }
+    except (ValueError, KeyError, TypeError, InvalidOperation):
+        return JsonResponse({'status': 'error', 'message': "Invalid request body."}, status=400)
+    if not edits or len(edits) > MAX_FORECAST_EDITS:
+        return JsonResponse({'status': 'error', 'message': f"Send between 1 and {MAX_FORECAST_EDITS} changes."}, status=400)
+    if any(not value.is_finite() or abs(value) >= MAX_FORECAST_VALUE for value, _ in edits.values()):
+        return JsonResponse({'status': 'error', 'message': "Invalid Amount"}, status=400)
+
+    applied, conflicts, changed = [], [], []
+    with transaction.atomic():
+        records = (
+            FinancialRecord.objects.select_for_update()
+            .only('id', 'value', 'version', 'is_editable', 'scenario_id', 'year')
+            .in_bulk(edits)
+        )
+        not_editable = sorted(pk for pk in edits if pk not in records or not records[pk].is_editable)
+        if not_editable:
+            return JsonResponse({
+                'status': 'error',
+                'message': f"Records are missing or not editable: {', '.join(map(str, not_editable))}",
+            }, status=400)
+
+        for pk, (value, version) in edits.items():
+            record = records[pk]
+            if record.version != version:
+                conflicts.append(record)
+                continue
+            if record.value != value:
+                record.value = value
+                record.version += 1
+                changed.append(record)
+            applied.append(record)
+        FinancialRecord.objects.bulk_update(changed, ['value', 'version'])
+        mark_rollups_stale((record.scenario_id, record.year) for record in changed)
+        bump_scenario_versions(*(record.scenario_id for record in changed))
+
+    def serialise(records):
+        return [{'id': r.pk, 'value': str(r.value), 'version': r.version} for r in records]
+
+    return JsonResponse({
+        'status': 'conflict' if conflicts else 'success',
+        'applied': serialise(applied),
+        'conflicts': serialise(conflicts),
+    })
+
+
+@login_required
+@user_passes_test(is_privileged_user)
+def query_stats(request):
+    """
+    Returns this process's per-view query counts and timings as JSON, worst
+    total DB time first. POST resets the counters.
+    """
+    if request.method == 'POST':
+        reset_request_stats()
+    return JsonResponse({'views': get_request_stats()})
+
+
+@login_required
+@user_passes_test(is_privileged_user)
+@require_POST
+def process_data(request):
+    """
+    Refreshes ACTUAL FinancialRecords for the GL buckets changed since the last run.
+    """
+    records_created, records_updated = aggregate_changed_actuals()
+    refresh_dashboard_snapshot()
+    messages.success(request, f"Data aggregation complete: {records_created} records created, {records_updated} updated.")
+    return redirect(reverse('budgeting:historical_data'))
+
+
+VARIANCE_PAGE_ROWS = 200
+
+
+def _variance_request_params(request, today):
+    """
+    Reads the variance filters shared by the Module 5 page and its API.
+    Raises ValueError for malformed or unknown values.
+    """
+    fiscal_year = int(request.GET.get('fiscal_year') or get_current_fiscal_year(today))
+    periods = request.GET.get('periods')
+    periods = closed_periods(fiscal_year, today) if not periods else int(periods)
+    if not 0 <= periods <= 12:
+        raise ValueError("periods must be between 0 and 12.")
+    group_by = request.GET.get('group_by') or 'account'
+    if group_by not in VARIANCE_GROUPINGS:
+        raise ValueError(f"Unknown group_by: {group_by}")
+    fund = int(request.GET['fund']) if request.GET.get('fund') else None
+    state = int(request.GET['state']) if request.GET.get('state') else None
+    return {'fiscal_year': fiscal_year, 'periods': periods, 'group_by': group_by, 'fund': fund, 'state': state}
+
+
+@login_required
+@query_budget(6, cold=12)
+def performance_management(request):
+    """
+    Module 5: Budget-vs-Actual variance. Shows the organisation totals and the
+    rows with the largest YTD variance; the full result is available from
+    performance_management_variance.
+    """
+    today = date.today()
+    try:
+        params = _variance_request_params(request, today)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect(reverse('budgeting:performance_management'))
+
+    result = get_variance(**params)
+    choice_maps = get_dimension_maps('fund', 'state')
+    data = result.to_columnar(result.order_by_impact()[:VARIANCE_PAGE_ROWS])
+    labels = [data['rows'][f'{column}_label'] for column in result.columns]
+    favourable = data['rows'].get('favourable')
+    variance_rows = [
+        {
+            'label': ' / '.join(column_labels[i] or '-' for column_labels in labels),
+            'favourable': favourable[i] if favourable is not None else None,
+            **{name: values[i] for name, values in data['measures'].items()},
+        }
+        for i in range(len(labels[0]) if labels else 0)
+    ]
+    context = {
+        'params': params,
+        'totals': data['totals'],
+        'variance_rows': variance_rows,
+        'row_count': len(result),
+        'groupings': list(VARIANCE_GROUPINGS),
+        'funds': get_dimension_choices('fund', choice_maps['fund']),
+        'states': get_dimension_choices('state', choice_maps['state']),
+        'api_query': urlencode({name: value for name, value in params.items() if value is not None}),
+    }
+    return render(request, 'budgeting/performance_management.html', context)
+
+
+@login_required
+@query_budget(6, cold=15)
+def performance_management_variance(request):
+    """Returns a full variance run as columnar JSON (rows ordered by YTD variance impact)."""
+    try:
+        params = _variance_request_params(request, date.today())
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    result = get_variance(**params)
+    return JsonResponse(result.to_columnar(result.order_by_impact()))
+
+
 @login_required
 def placeholder_view(request, module_name):
     """
@@ -334,7 +490,6 @@ def placeholder_view(request, module_name):
         'aum_details': "Track and forecast Assets Under Management (AUM) based on various drivers.",
         'hod_submission': "Allow Heads of Department to submit their annual budget requests.",
         'final_forecast': "Consolidate departmental budgets into a final, multi-year financial forecast.",
-        'performance_management': "Analyze budget vs. actual performance and other key metrics.",
     }
     
     context = {
@@ -345,13 +500,60 @@ def placeholder_view(request, module_name):
 
 # --- CRUD Views for Setup Tables ---
 
-class DepartmentListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class SetupListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+    """
+    Base for the setup table list pages: staff only, paginated, and sortable
+    with ?sort=<key> or ?sort=-<key> over the columns named in `sort_fields`.
+    Subclasses declare the relations their template shows in `related_fields`
+    (joined with select_related) and the columns it reads in `list_fields`
+    (loaded with only()), so a page costs the same queries at any table size.
+    """
+    paginate_by = 50
+    related_fields = ()
+    list_fields = None
+    # sort key -> ORM field path
+    sort_fields = {}
+    default_sort = None
+    query_budget = 5
+
+    def test_func(self): return is_privileged_user(self.request.user)
+
+    def get_sort(self):
+        sort = self.request.GET.get('sort', '')
+        return sort if sort.lstrip('-') in self.sort_fields else self.default_sort
+
+    def get_ordering(self):
+        sort = self.get_sort()
+        if not sort:
+            return None
+        direction = '-' if sort.startswith('-') else ''
+        # The primary key keeps rows with equal sort values on a stable page.
+        return [direction + self.sort_fields[sort.lstrip('-')], direction + 'pk']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.related_fields:
+            queryset = queryset.select_related(*self.related_fields)
+        if self.list_fields:
+            queryset = queryset.only(*self.list_fields)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        sort = self.get_sort()
+        context['current_sort'] = sort or ''
+        # The ?sort= value each column header links to: ascending, or descending when already ascending.
+        context['sort_toggle'] = {key: f'-{key}' if sort == key else key for key in self.sort_fields}
+        return context
+
+
+class DepartmentListView(SetupListView):
     """Lists all departments."""
     model = Department
     template_name = 'budgeting/department_list.html'
     context_object_name = 'departments'
-
-    def test_func(self): return is_privileged_user(self.request.user)
+    sort_fields = {'name': 'department_name'}
+    default_sort = 'name'
 
 class DepartmentCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     """View to create a new department."""
@@ -390,11 +592,12 @@ class DepartmentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def test_func(self): return is_privileged_user(self.request.user)
 
 # --- CRUD for Sectors ---
-class SectorListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class SectorListView(SetupListView):
     model = Sector
     template_name = 'budgeting/sector_list.html'
     context_object_name = 'sectors'
-    def test_func(self): return is_privileged_user(self.request.user)
+    sort_fields = {'name': 'sector_name'}
+    default_sort = 'name'
 
 class SectorCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Sector
@@ -426,11 +629,12 @@ class SectorDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # --- CRUD for Grades ---
-class GradeListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class GradeListView(SetupListView):
     model = Grade
     template_name = 'budgeting/grade_list.html'
     context_object_name = 'grades'
-    def test_func(self): return is_privileged_user(self.request.user)
+    sort_fields = {'name': 'grade_name', 'order': 'display_order'}
+    default_sort = 'order'
 
 class GradeCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Grade
@@ -462,11 +666,12 @@ class GradeDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # --- CRUD for Scenarios ---
-class ScenarioListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class ScenarioListView(SetupListView):
     model = Scenario
     template_name = 'budgeting/scenario_list.html'
     context_object_name = 'scenarios'
-    def test_func(self): return is_privileged_user(self.request.user)
+    sort_fields = {'name': 'scenario_name'}
+    default_sort = 'name'
 
 class ScenarioCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Scenario
@@ -497,23 +702,26 @@ class ScenarioDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     def test_func(self): return is_privileged_user(self.request.user)
 
 
-class FundListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class FundListView(SetupListView):
     """Lists all funds."""
     model = Fund
     template_name = 'budgeting/fund_list.html'
     context_object_name = 'funds'
-
-    def test_func(self):
-        return is_privileged_user(self.request.user)
+    related_fields = ('fund_category',)
+    list_fields = ('fund_name', 'fund_type', 'fund_category__category_name')
+    sort_fields = {'name': 'fund_name', 'type': 'fund_type', 'category': 'fund_category__category_name'}
+    default_sort = 'name'
 
 
 # --- CRUD for Date Dimension ---
-class DateDimensionListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class DateDimensionListView(SetupListView):
     model = DateDimension
     template_name = 'budgeting/datedimension_list.html'
     context_object_name = 'dates'
     paginate_by = 31
-    def test_func(self): return is_privileged_user(self.request.user)
+    list_fields = ('full_date', 'year', 'month_name', 'day', 'week_of_year', 'quarter_name', 'year_month')
+    sort_fields = {'date': 'full_date'}
+    default_sort = 'date'
 
 class DateDimensionCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = DateDimension
@@ -545,12 +753,21 @@ class DateDimensionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteVie
 
 
 # --- CRUD for Accounts ---
-class AccountListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class AccountListView(SetupListView):
     model = Account
     template_name = 'budgeting/account_list.html'
     context_object_name = 'accounts'
-    paginate_by = 25  # Add pagination for long lists
-    def test_func(self): return is_privileged_user(self.request.user)
+    related_fields = ('parent_account',)
+    list_fields = (
+        'account_code', 'account_name', 'account_type', 'active_flag',
+        'hierarchy_level_1', 'hierarchy_level_2', 'hierarchy_level_3', 'hierarchy_level_4',
+        'parent_account__account_code',
+    )
+    sort_fields = {
+        'code': 'account_code', 'name': 'account_name', 'type': 'account_type',
+        'parent': 'parent_account__account_code',
+    }
+    default_sort = 'code'
 
 class AccountCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Account
@@ -582,30 +799,115 @@ class AccountDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # --- Read-Only View for GL Transactions ---
+def filter_gl_transactions(queryset, form, ranked=False):
+    """Applies a bound GLTransactionFilterForm to a GL queryset; invalid or unbound forms filter nothing."""
+    if not (form.is_bound and form.is_valid()):
+        return queryset
+    data = form.cleaned_data
+    for field in ('scenario', 'fund', 'department', 'state'):
+        if data[field]:
+            queryset = queryset.filter(**{field: data[field]})
+    if data['date_from']:
+        queryset = queryset.filter(transaction_date__gte=data['date_from'])
+    if data['date_to']:
+        queryset = queryset.filter(transaction_date__lte=data['date_to'])
+    # Add search functionality
+    if data['q']:
+        queryset = search_gl_transactions(queryset, data['q'], ranked=ranked)
+    return queryset
+
+
 class GLTransactionListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+    """
+    Lists GL transactions newest first with keyset pagination on
+    (transaction_date, id): pages are addressed by ?after=/?before= cursors
+    instead of page numbers, and the total is the planner's estimate.
+    A search ordered by relevance shows only the best `paginate_by` matches.
+    """
     model = GLTransaction
     template_name = 'budgeting/gltransaction_list.html'
     context_object_name = 'transactions'
     paginate_by = 50
+    query_budget = 12
+    pagination_keys = ('transaction_date', 'id')
 
     def test_func(self):
         return is_privileged_user(self.request.user)
 
+    def get_filter_form(self):
+        if not hasattr(self, '_filter_form'):
+            self._filter_form = GLTransactionFilterForm(self.request.GET or None)
+        return self._filter_form
+
     def get_queryset(self):
-        queryset = super().get_queryset().select_related('account', 'fund', 'department', 'scenario').order_by('-transaction_date')
-        # Add search functionality
-        query = self.request.GET.get('q')
-        if query:
-            queryset = queryset.filter(models.Q(description__icontains=query) | models.Q(account__account_name__icontains=query))
-        return queryset
+        queryset = super().get_queryset().select_related('account', 'fund')
+        return filter_gl_transactions(queryset, self.get_filter_form(), ranked=self.ranked_by_relevance)
+
+    @property
+    def ranked_by_relevance(self):
+        form = self.get_filter_form()
+        return form.is_bound and form.is_valid() and bool(form.cleaned_data['q']) and form.cleaned_data['order'] == 'relevance'
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.ranked_by_relevance:
+            return None, None, list(queryset.order_by('-search_rank', '-transaction_date', '-id')[:page_size]), False
+        try:
+            page = paginate_by_keyset(
+                queryset, self.pagination_keys, page_size,
+                after=self.request.GET.get('after'), before=self.request.GET.get('before'),
+            )
+        except ValueError:
+            raise Http404("Invalid page cursor.")
+        return None, page, page.object_list, page.has_next or page.has_previous
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filters = self.request.GET.copy()
+        filters.pop('after', None)
+        filters.pop('before', None)
+        context.update({
+            'filter_form': self.get_filter_form(),
+            'filter_query': filters.urlencode(),
+            'estimated_count': estimate_count(self.object_list),
+        })
+        return context
+
+
+@login_required
+@user_passes_test(is_privileged_user)
+def export_gl_transactions(request, export_format):
+    """
+    Exports the GL transactions matching the list view's filters, newest first.
+    CSV is streamed as it is read from the database; XLSX is built in a
+    temporary file first because the format cannot be written incrementally.
+    """
+    if export_format not in ('csv', 'xlsx'):
+        raise Http404("Unknown export format.")
+    form = GLTransactionFilterForm(request.GET or None)
+    queryset = filter_gl_transactions(GLTransaction.objects.all(), form).order_by('-transaction_date', '-id')
+    header = [title for title, _ in GL_EXPORT_COLUMNS]
+    rows = iter_gl_export_rows(queryset)
+
+    if export_format == 'xlsx':
+        try:
+            output = write_xlsx(rows, header, title='GL Transactions')
+        except ImproperlyConfigured as e:
+            messages.error(request, str(e))
+            return redirect(reverse('budgeting:gltransaction_list'))
+        return FileResponse(output, as_attachment=True, filename='gl_transactions.xlsx')
+
+    response = StreamingHttpResponse(stream_csv(rows, header), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="gl_transactions.csv"'
+    return response
 
 
 # --- CRUD for Regions ---
-class RegionListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class RegionListView(SetupListView):
     model = Region
     template_name = 'budgeting/region_list.html'
     context_object_name = 'regions'
-    def test_func(self): return is_privileged_user(self.request.user)
+    sort_fields = {'name': 'region_name'}
+    default_sort = 'name'
 
 class RegionCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Region
@@ -637,11 +939,14 @@ class RegionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # --- CRUD for States ---
-class StateListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class StateListView(SetupListView):
     model = State
     template_name = 'budgeting/state_list.html'
     context_object_name = 'states'
-    def test_func(self): return is_privileged_user(self.request.user)
+    related_fields = ('region',)
+    list_fields = ('state_name', 'region__region_name')
+    sort_fields = {'name': 'state_name', 'region': 'region__region_name'}
+    default_sort = 'name'
 
 class StateCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = State
@@ -673,11 +978,14 @@ class StateDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # --- CRUD for Locations ---
-class LocationListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class LocationListView(SetupListView):
     model = Location
     template_name = 'budgeting/location_list.html'
     context_object_name = 'locations'
-    def test_func(self): return is_privileged_user(self.request.user)
+    related_fields = ('state', 'region')
+    list_fields = ('location_name', 'state__state_name', 'region__region_name')
+    sort_fields = {'name': 'location_name', 'state': 'state__state_name', 'region': 'region__region_name'}
+    default_sort = 'name'
 
 class LocationCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = Location
@@ -709,11 +1017,12 @@ class LocationDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # --- CRUD for Fund Categories ---
-class FundCategoryListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class FundCategoryListView(SetupListView):
     model = FundCategory
     template_name = 'budgeting/fundcategory_list.html'
     context_object_name = 'fund_categories'
-    def test_func(self): return is_privileged_user(self.request.user)
+    sort_fields = {'name': 'category_name'}
+    default_sort = 'name'
 
 class FundCategoryCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
     model = FundCategory
@@ -0,0 +1,27 @@
+import calendar
+
+from django import forms
+
+from budgeting.dimension_cache import get_dimension_choices, get_dimension_maps
+from budgeting.utils import get_fiscal_months
+
+
+class StatementFilterForm(forms.Form):
+    """Selects the fiscal year, scenario, period and slice of a financial statement."""
+    fiscal_year = forms.IntegerField(min_value=1900, max_value=2999, widget=forms.NumberInput(attrs={'class': 'form-control form-control-sm'}))
+    scenario = forms.TypedChoiceField(coerce=int, widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    through_period = forms.TypedChoiceField(coerce=int, label="Through", widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    fund = forms.TypedChoiceField(coerce=int, required=False, empty_value=None, widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+    state = forms.TypedChoiceField(coerce=int, required=False, empty_value=None, widget=forms.Select(attrs={'class': 'form-control form-control-sm'}))
+
+    def __init__(self, *args, fiscal_year, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Choices come from the cached dimension maps, so building the form costs one version query.
+        maps = get_dimension_maps('scenario', 'fund', 'state')
+        self.fields['scenario'].choices = get_dimension_choices('scenario', maps['scenario'])
+        self.fields['fund'].choices = [('', 'All funds')] + get_dimension_choices('fund', maps['fund'])
+        self.fields['state'].choices = [('', 'All states')] + get_dimension_choices('state', maps['state'])
+        self.fields['through_period'].choices = [
+            (period, f"P{period} ({calendar.month_abbr[month]} {year})")
+            for period, (month, year) in enumerate(get_fiscal_months(fiscal_year), start=1)
+        ]
@@ -0,0 +1,202 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from django.db.models.functions import Trim, Upper
+
+from budgeting.data_versions import get_versions, scenario_version_name
+from budgeting.dimension_cache import dimension_version_name
+from budgeting.instrumentation import record_cache_miss
+from budgeting.models import Account, FinancialRecord
+from budgeting.utils import get_fiscal_months
+
+# Statement definitions. `categories` are the Account.statement_category
+# values (compared upper-cased) that belong to the statement; `sections` are
+# account types in presentation order with the sign they carry in the
+# bottom-line result. A Balance Sheet shows balances, i.e. movements summed
+# over all earlier years as well; a P&L only sums the fiscal year.
+STATEMENTS = {
+    'pl': {
+        'title': 'Profit & Loss',
+        'categories': ['P&L', 'PL', 'PNL', 'PROFIT & LOSS', 'PROFIT AND LOSS', 'INCOME STATEMENT'],
+        'sections': [('REVENUE', 1), ('EXPENSE', -1)],
+        'result_label': 'Net Profit / (Loss)',
+        'cumulative': False,
+    },
+    'bs': {
+        'title': 'Balance Sheet',
+        'categories': ['BS', 'BALANCE SHEET'],
+        'sections': [('ASSET', 1), ('LIABILITY', -1), ('EQUITY', -1)],
+        'result_label': 'Assets less Liabilities and Equity',
+        'cumulative': True,
+    },
+}
+
+CACHE_PREFIX = 'reporting:statement'
+STATEMENT_CACHE_TIMEOUT = getattr(settings, 'STATEMENT_CACHE_TIMEOUT', 60 * 60)
+
+
+class StatementLine:
+    """One account on a statement. `amount` is its own value, `total` includes its sub-accounts."""
+
+    def __init__(self, account_key, account_code, account_name, account_type, depth):
+        self.account_key = account_key
+        self.account_code = account_code
+        self.account_name = account_name
+        self.account_type = account_type
+        self.depth = depth
+        self.has_children = False
+        self.amount = 0
+        self.total = 0
+
+
+class StatementSection:
+    def __init__(self, account_type, label, sign):
+        self.account_type = account_type
+        self.label = label
+        self.sign = sign
+        self.lines = []
+        self.total = 0
+
+
+class FinancialStatement:
+    """A built P&L or Balance Sheet: sections of account lines in display order, with subtotals."""
+
+    def __init__(self, statement, fiscal_year, through_period, scenario_id, funds, states, sections):
+        definition = STATEMENTS[statement]
+        self.statement = statement
+        self.title = definition['title']
+        self.result_label = definition['result_label']
+        self.fiscal_year = fiscal_year
+        self.through_period = through_period
+        self.scenario_id = scenario_id
+        self.funds = funds
+        self.states = states
+        self.sections = sections
+        self.result = sum(section.sign * section.total for section in sections)
+
+
+def _statement_accounts(statement):
+    return (
+        Account.objects.alias(category=Upper(Trim('statement_category')))
+        .filter(category__in=STATEMENTS[statement]['categories'])
+    )
+
+
+def _account_amounts(statement, fiscal_year, through_period, scenario_id, funds, states):
+    """Sums FinancialRecord values per account for the statement's period and filters, in one query."""
+    months = [month for month, _ in get_fiscal_months(fiscal_year)[:through_period]]
+    period = Q(year=fiscal_year, month__in=months)
+    if STATEMENTS[statement]['cumulative']:
+        period |= Q(year__lt=fiscal_year)
+    records = (
+        FinancialRecord.objects.alias(category=Upper(Trim('account__statement_category')))
+        .filter(period, scenario_id=scenario_id, category__in=STATEMENTS[statement]['categories'])
+    )
+    if funds:
+        records = records.filter(fund_id__in=funds)
+    if states:
+        records = records.filter(state_id__in=states)
+    return dict(records.order_by().values_list('account_id').annotate(total=Sum('value')))
+
+
+def build_statement(statement, fiscal_year, scenario_id, through_period=12, funds=None, states=None):
+    """
+    Builds a statement from two queries: the statement's accounts, and the
+    account totals pre-aggregated in the database. Accounts are arranged by
+    parent_account (siblings by display_order, then code), and subtotals are
+    accumulated bottom-up in a single pass over the lines in reverse order.
+    Accounts whose parent is on another statement start a top-level tree.
+    """
+    definition = STATEMENTS[statement]
+    amounts = _account_amounts(statement, fiscal_year, through_period, scenario_id, funds, states)
+    accounts = {
+        row[0]: row for row in _statement_accounts(statement).values_list(
+            'account_key', 'account_code', 'account_name', 'account_type', 'parent_account_id', 'display_order',
+        )
+    }
+
+    children = {}
+    roots = []
+    for key, (_, code, _, _, parent, order) in accounts.items():
+        (children.setdefault(parent, []) if parent in accounts else roots).append((order, code, key))
+    for siblings in children.values():
+        siblings.sort()
+    roots.sort()
+
+    # Depth-first, so every account's sub-accounts follow it.
+    lines = []
+    parents = []  # index in `lines` of each line's parent, or None
+    stack = [(key, 0, None) for _, _, key in reversed(roots)]
+    seen = set()
+    while stack:
+        key, depth, parent_index = stack.pop()
+        if key in seen:
+            continue
+        seen.add(key)
+        _, code, name, account_type, _, _ = accounts[key]
+        line = StatementLine(key, code, name, account_type, depth)
+        line.amount = line.total = amounts.get(key, 0)
+        index = len(lines)
+        lines.append(line)
+        parents.append(parent_index)
+        for _, _, child in reversed(children.get(key, [])):
+            stack.append((child, depth + 1, index))
+
+    for index in range(len(lines) - 1, -1, -1):
+        parent_index = parents[index]
+        if parent_index is not None:
+            lines[parent_index].total += lines[index].total
+            lines[parent_index].has_children = True
+
+    type_labels = dict(Account.ACCOUNT_TYPE_CHOICES)
+    sections = {
+        account_type: StatementSection(account_type, type_labels.get(account_type, account_type), sign)
+        for account_type, sign in definition['sections']
+    }
+    section = None
+    for line, parent_index in zip(lines, parents):
+        if parent_index is None:
+            section = sections.get(line.account_type)
+            if section is None:
+                section = sections[line.account_type] = StatementSection(
+                    line.account_type, type_labels.get(line.account_type, line.account_type), 0)
+            section.total += line.total
+        section.lines.append(line)
+
+    return FinancialStatement(
+        statement, fiscal_year, through_period, scenario_id, funds, states,
+        [section for section in sections.values() if section.lines],
+    )
+
+
+def statement_cache_key(statement, fiscal_year, scenario_id, through_period=12, funds=None, states=None):
+    """
+    Cache key of a statement. It includes the scenario's data version and the
+    account dimension version, read in one query from the shared version
+    table, so any change to the records or the chart of accounts, made by
+    any process, makes earlier entries unreachable.
+    """
+    data_version, account_version = get_versions(
+        [scenario_version_name(scenario_id), dimension_version_name('account')]).values()
+    filters = '|'.join([
+        ','.join(map(str, sorted(funds or []))),
+        ','.join(map(str, sorted(states or []))),
+    ])
+    return ':'.join([
+        CACHE_PREFIX, statement, str(fiscal_year), str(through_period), str(scenario_id),
+        hashlib.md5(filters.encode()).hexdigest(),
+        f'd{data_version}', f'a{account_version}',
+    ])
+
+
+def get_statement(statement, fiscal_year, scenario_id, through_period=12, funds=None, states=None):
+    """Returns the statement from the cache, building and caching it on a miss."""
+    key = statement_cache_key(statement, fiscal_year, scenario_id, through_period, funds, states)
+    result = cache.get(key)
+    if result is None:
+        record_cache_miss()
+        result = build_statement(statement, fiscal_year, scenario_id, through_period, funds, states)
+        cache.set(key, result, timeout=STATEMENT_CACHE_TIMEOUT)
+    return result
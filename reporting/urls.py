@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'reporting'
+
+urlpatterns = [
+    # Financial statements: 'pl' (Profit & Loss) or 'bs' (Balance Sheet)
+    path('statements/<str:statement>/', views.financial_statement, name='financial_statement'),
+    # Slice-and-dice API over FinancialRecord (see budgeting.cube)
+    path('cube/', views.cube, name='cube'),
+]
@@ -1,3 +1,75 @@
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
 from django.shortcuts import render
 
-# Create your views here.
+from budgeting.cube import cube_query
+from budgeting.dimension_cache import resolve as resolve_dimension
+from budgeting.instrumentation import query_budget
+from budgeting.utils import get_current_fiscal_year
+from .forms import StatementFilterForm
+from .statements import STATEMENTS, get_statement
+
+
+@login_required
+@query_budget(6, cold=12)
+def financial_statement(request, statement):
+    """
+    Renders a P&L or Balance Sheet for the selected fiscal year, scenario,
+    period and slice. Defaults to the current fiscal year's ACTUALs in full.
+    Statements are served from the cache until their data changes.
+    """
+    if statement not in STATEMENTS:
+        raise Http404("Unknown statement.")
+
+    fiscal_year = get_current_fiscal_year(date.today())
+    data = {
+        'fiscal_year': fiscal_year,
+        'scenario': resolve_dimension('scenario', 'ACTUAL'),
+        'through_period': 12,
+    }
+    data.update(request.GET.dict())
+    try:
+        fiscal_year = int(data['fiscal_year'])
+    except (TypeError, ValueError):
+        pass
+    form = StatementFilterForm(data, fiscal_year=fiscal_year)
+
+    result = None
+    if form.is_valid():
+        filters = form.cleaned_data
+        result = get_statement(
+            statement, filters['fiscal_year'], filters['scenario'], filters['through_period'],
+            funds=[filters['fund']] if filters['fund'] else None,
+            states=[filters['state']] if filters['state'] else None,
+        )
+
+    return render(request, 'reporting/statement.html', {
+        'statement': statement,
+        'title': STATEMENTS[statement]['title'],
+        'form': form,
+        'result': result,
+    })
+
+
+@login_required
+@query_budget(6, cold=10)
+def cube(request):
+    """
+    Cube query over FinancialRecords as columnar JSON, e.g.
+    ?dimensions=region,fiscal_quarter&measures=value,records&scenario=1&fiscal_year=2025.
+    Any other parameter named after a dimension filters on it; repeat it or
+    comma-separate values to keep several. Answered from the rollups where possible.
+    """
+    dimensions = [name for name in request.GET.get('dimensions', '').split(',') if name]
+    measures = [name for name in request.GET.get('measures', 'value').split(',') if name]
+    filters = {
+        name: [value for values in request.GET.getlist(name) for value in values.split(',') if value]
+        for name in request.GET if name not in ('dimensions', 'measures')
+    }
+    try:
+        result = cube_query(dimensions, measures, filters)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse(result.to_columnar())
@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import GLImportJob
+
+
+@admin.register(GLImportJob)
+class GLImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'original_filename', 'status', 'rows_parsed', 'rows_rejected', 'rows_inserted', 'rows_skipped',
+                    'submitted_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('original_filename', 'submitted_by__username')
+    readonly_fields = [f.name for f in GLImportJob._meta.fields]
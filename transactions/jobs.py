@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from budgeting.dashboard import refresh_dashboard_snapshot
+from budgeting.importers import import_gl_transactions, copy_gl_transactions
+from budgeting.models import Scenario
+from .models import GLImportJob
+
+GL_IMPORT_JOB_TIMEOUT = getattr(settings, 'GL_IMPORT_JOB_TIMEOUT', 30 * 60)
+GL_IMPORT_JOB_MAX_ATTEMPTS = getattr(settings, 'GL_IMPORT_JOB_MAX_ATTEMPTS', 3)
+
+
+def claim_next_gl_import_job():
+    """
+    Atomically marks the oldest pending job as running and returns it.
+    SKIP LOCKED lets several workers poll the queue without claiming the same job.
+
+    A RUNNING job whose heartbeat is older than GL_IMPORT_JOB_TIMEOUT was left
+    by a worker that died, and is claimed again; re-running it is safe because
+    the import skips rows already in the ledger. A job that has already used
+    GL_IMPORT_JOB_MAX_ATTEMPTS claims is failed instead.
+    """
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                GLImportJob.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=GLImportJob.STATUS_PENDING)
+                    | Q(status=GLImportJob.STATUS_RUNNING,
+                        heartbeat_at__lt=now - timedelta(seconds=GL_IMPORT_JOB_TIMEOUT))
+                )
+                .order_by('created_at')
+                .first()
+            )
+            if job is None:
+                return None
+            if job.attempts >= GL_IMPORT_JOB_MAX_ATTEMPTS:
+                _finish(job, GLImportJob.STATUS_FAILED,
+                        f"The import worker stopped responding {job.attempts} times while processing this file.")
+                continue
+            job.status = GLImportJob.STATUS_RUNNING
+            job.started_at = job.heartbeat_at = now
+            job.attempts += 1
+            job.save(update_fields=['status', 'started_at', 'heartbeat_at', 'attempts'])
+        return job
+
+
+def run_gl_import_job(job):
+    """Imports the job's CSV file, recording progress and the final outcome on the job."""
+
+    def report_progress(result):
+        GLImportJob.objects.filter(pk=job.pk).update(
+            heartbeat_at=timezone.now(),
+            rows_parsed=result.rows_parsed,
+            rows_rejected=result.error_count,
+            rows_inserted=result.rows_inserted,
+            rows_skipped=result.rows_skipped,
+        )
+
+    try:
+        actual_scenario = Scenario.objects.get(scenario_name='ACTUAL')
+    except Scenario.DoesNotExist:
+        _finish(job, GLImportJob.STATUS_FAILED,
+                "Setup Error: 'ACTUAL' Scenario not found in Settings. Please create it first.")
+        return job
+
+    # The COPY path commits progress (and so the heartbeat) while it stages
+    # rows; the ORM path runs in a single transaction, so its progress is
+    # only seen at the end.
+    loader = copy_gl_transactions if connection.vendor == 'postgresql' else import_gl_transactions
+
+    try:
+        with job.csv_file.open('rb') as csv_file:
+            result = loader(csv_file, actual_scenario, progress=report_progress)
+    except Exception as e:
+        _finish(job, GLImportJob.STATUS_FAILED, f"An error occurred during processing: {e}")
+        return job
+
+    job.rows_parsed = result.rows_parsed
+    job.rows_rejected = result.error_count
+    job.rows_inserted = result.rows_inserted
+    job.rows_skipped = result.rows_skipped
+    if result.error_count:
+        error_summary = "\n".join(result.errors)
+        _finish(job, GLImportJob.STATUS_FAILED,
+                f"Upload failed due to data errors ({result.error_count} errors found). Top 10 errors:\n{error_summary}")
+    else:
+        _finish(job, GLImportJob.STATUS_SUCCEEDED)
+        refresh_dashboard_snapshot()
+    return job
+
+
+def _finish(job, status, error_message=''):
+    """Records the outcome and deletes the uploaded file, which is not needed again."""
+    job.status = status
+    job.error_message = error_message
+    job.finished_at = timezone.now()
+    if job.csv_file:
+        job.csv_file.delete(save=False)
+    job.save(update_fields=['status', 'error_message', 'finished_at', 'csv_file',
+                            'rows_parsed', 'rows_rejected', 'rows_inserted', 'rows_skipped'])
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from transactions.jobs import claim_next_gl_import_job, run_gl_import_job
+
+
+class Command(BaseCommand):
+    help = "Processes queued GL upload jobs in the background."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait between polls when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Process all pending jobs and exit instead of polling forever.")
+
+    def handle(self, *args, **options):
+        self.stdout.write("GL import worker started.")
+        while True:
+            job = claim_next_gl_import_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Processing {job}...")
+            run_gl_import_job(job)
+            self.stdout.write(f"Finished {job}: {job.rows_inserted} inserted, {job.rows_skipped} skipped, {job.rows_rejected} rejected.")
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GLImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('csv_file', models.FileField(upload_to='gl_imports/%Y/%m/', verbose_name='GL CSV File')),
+                ('original_filename', models.CharField(max_length=255, verbose_name='Original File Name')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('SUCCEEDED', 'Succeeded'), ('FAILED', 'Failed')], db_index=True, default='PENDING', max_length=10, verbose_name='Status')),
+                ('rows_parsed', models.PositiveIntegerField(default=0, verbose_name='Rows Parsed')),
+                ('rows_rejected', models.PositiveIntegerField(default=0, verbose_name='Rows Rejected')),
+                ('rows_inserted', models.PositiveIntegerField(default=0, verbose_name='Rows Inserted')),
+                ('error_message', models.TextField(blank=True, verbose_name='Errors')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Submitted At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+                ('submitted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gl_import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Submitted By')),
+            ],
+            options={
+                'verbose_name': 'GL Import Job',
+                'verbose_name_plural': 'GL Import Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='glimportjob',
+            name='rows_skipped',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rows Skipped (Already Imported)'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_gl_import_job_rows_skipped'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='glimportjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Attempts'),
+        ),
+        migrations.AddField(
+            model_name='glimportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Last Heartbeat'),
+        ),
+        migrations.AlterField(
+            model_name='glimportjob',
+            name='csv_file',
+            field=models.FileField(blank=True, upload_to='gl_imports/%Y/%m/', verbose_name='GL CSV File'),
+        ),
+    ]
@@ -1,3 +1,54 @@
+from django.conf import settings
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class GLImportJob(models.Model):
+    """
+    A GL/Ledger CSV upload waiting for, or processed by, the background import worker.
+    Web requests only persist the file and this row; the worker does the import.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_SUCCEEDED = 'SUCCEEDED'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # Deleted once the job has finished.
+    csv_file = models.FileField(upload_to='gl_imports/%Y/%m/', blank=True, verbose_name=_("GL CSV File"))
+    original_filename = models.CharField(max_length=255, verbose_name=_("Original File Name"))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING,
+                              db_index=True, verbose_name=_("Status"))
+    submitted_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='gl_import_jobs', verbose_name=_("Submitted By"))
+
+    # Progress counters, updated by the worker while the file is processed.
+    rows_parsed = models.PositiveIntegerField(default=0, verbose_name=_("Rows Parsed"))
+    rows_rejected = models.PositiveIntegerField(default=0, verbose_name=_("Rows Rejected"))
+    rows_inserted = models.PositiveIntegerField(default=0, verbose_name=_("Rows Inserted"))
+    rows_skipped = models.PositiveIntegerField(default=0, verbose_name=_("Rows Skipped (Already Imported)"))
+    error_message = models.TextField(blank=True, verbose_name=_("Errors"))
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Submitted At"))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Started At"))
+    # Refreshed with every progress update; a stale heartbeat means the worker died.
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Last Heartbeat"))
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name=_("Attempts"))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Finished At"))
+
+    class Meta:
+        verbose_name = _("GL Import Job")
+        verbose_name_plural = _("GL Import Jobs")
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"GL import #{self.pk} ({self.original_filename}) - {self.status}"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'transactions'
+
+urlpatterns = [
+    # Background GL upload jobs
+    path('gl-imports/<int:pk>/', views.gl_import_job_detail, name='gl_import_job_detail'),
+    path('gl-imports/<int:pk>/status/', views.gl_import_job_status, name='gl_import_job_status'),
+]
@@ -1,3 +1,34 @@
-from django.shortcuts import render
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
 
-# Create your views here.
+from budgeting.views import is_privileged_user
+from .models import GLImportJob
+
+
+@login_required
+@user_passes_test(is_privileged_user)
+def gl_import_job_detail(request, pk):
+    """Shows a queued GL upload and polls its progress until the worker finishes."""
+    job = get_object_or_404(GLImportJob, pk=pk)
+    return render(request, 'transactions/gl_import_job_detail.html', {'job': job})
+
+
+@login_required
+@user_passes_test(is_privileged_user)
+def gl_import_job_status(request, pk):
+    """Returns the current progress of a GL upload job as JSON."""
+    job = get_object_or_404(GLImportJob, pk=pk)
+    return JsonResponse({
+        'id': job.pk,
+        'status': job.status,
+        'is_finished': job.is_finished,
+        'rows_parsed': job.rows_parsed,
+        'rows_rejected': job.rows_rejected,
+        'rows_inserted': job.rows_inserted,
+        'rows_skipped': job.rows_skipped,
+        'error_message': job.error_message,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    })